@@ -42,7 +42,13 @@ DEFAULT_CONFIG = {
     },
     'ADMIN': {
         'ADMIN_PASSWORD_HASH_FILE': '.admin_hash',
-        'BACKUP_DIR': 'backups'
+        'BACKUP_DIR': 'backups',
+        'BACKUP_COMPRESSION': 'gzip',  # gzip, zstd (requiere zstandard) o none
+        'BACKUP_COMPRESSION_LEVEL': '0',  # 0 = nivel por defecto del compresor
+        'BACKUP_PAGES_PER_STEP': '1024',  # solo fuera de modo WAL
+        'BACKUP_INTEGRITY_CHECK': 'true',
+        'BACKUP_KEEP': '10',  # copias que se conservan
+        'BACKUP_MAX_AGE_DAYS': '0'  # 0 = sin límite de antigüedad
     }
 }
 
@@ -62,13 +68,27 @@ PASSWORD_REQUIRE_DIGITS = config.getboolean('SECURITY', 'PASSWORD_REQUIRE_DIGITS
 PASSWORD_REQUIRE_SPECIAL = config.getboolean('SECURITY', 'PASSWORD_REQUIRE_SPECIAL', fallback=True)
 
 try:
-    from app import app
-    from models import db, Usuario, AuditLog
+    from app import create_app, init_tareas
+    from models import db, Usuario, AuditLog, Recluta
+    from db_routing import use_read_replica
+    from seed_data import sembrar
+    from slow_queries import resumir
+    from backup import BackupError, crear_backup, aplicar_retencion
+    from janitor import Janitor
+    from file_cleanup import FileCleanup
+    from reminders import ReminderScheduler
+    from mail_queue import MailQueue
+    from delta_sync import DeltaSync
+    from archivo import Archivo, NoArchivado, IdOcupado
+    import rollups
 except ImportError as e:
     print(f"Error: No se pueden importar los módulos necesarios: {e}")
     print("Asegúrate de que este script esté en la misma carpeta que app.py y models.py")
     sys.exit(1)
 
+# Contexto mínimo: solo base de datos, sin rutas, CSRF ni hilos de la app web
+app = create_app(config_file, minimal=True)
+
 # Colores para la terminal
 class Color:
     HEADER = '\033[95m'
@@ -156,31 +176,88 @@ def log_activity(activity, success=True, details=None, user_id=None):
         # Si hay error al registrar en BD, al menos lo tenemos en el archivo de log
         logging.warning(f"No se pudo registrar en AuditLog: {str(e)}")
 
-def create_backup():
-    """Crea una copia de seguridad de la base de datos"""
+def create_backup(silencioso=False):
+    """Crea una copia de seguridad en caliente de la base de datos (API de backup de SQLite)"""
     backup_dir = config.get('ADMIN', 'BACKUP_DIR', fallback='backups')
+    compresion = config.get('ADMIN', 'BACKUP_COMPRESSION', fallback='gzip').lower()
+    
+    with app.app_context():
+        db_file = db.engine.url.database  # instance/database.db: la ruta la resuelve Flask-SQLAlchemy
+    
+    try:
+        resultado = crear_backup(
+            db_file, backup_dir,
+            compresion=None if compresion in ('', 'none') else compresion,
+            nivel=config.getint('ADMIN', 'BACKUP_COMPRESSION_LEVEL', fallback=0) or None,
+            paginas=config.getint('ADMIN', 'BACKUP_PAGES_PER_STEP', fallback=1024),
+            verificar=config.getboolean('ADMIN', 'BACKUP_INTEGRITY_CHECK', fallback=True)
+        )
+        borradas = aplicar_retencion(
+            backup_dir,
+            conservar=config.getint('ADMIN', 'BACKUP_KEEP', fallback=10),
+            max_dias=config.getint('ADMIN', 'BACKUP_MAX_AGE_DAYS', fallback=0)
+        )
+    except BackupError as e:
+        logging.error(f"Error al crear copia de seguridad: {str(e)}")
+        print_error(f"Error al crear copia de seguridad: {str(e)}")
+        return False
+    
+    mensaje = (f"Copia de seguridad creada: {resultado['ruta']} "
+               f"({resultado['bytes_origen'] / 1048576:.1f}MB -> {resultado['bytes'] / 1048576:.1f}MB, "
+               f"{resultado['segundos']:.1f}s)")
+    logging.info(mensaje + (f", {len(borradas)} copias antiguas eliminadas" if borradas else ""))
+    if silencioso:
+        print(resultado['ruta'])
+    else:
+        print_success(mensaje)
+        for ruta in borradas:
+            print_info(f"Eliminada por retención: {ruta}")
+    return True
+
+def sembrar_datos(reclutas, semilla=42, entrevistas=None, usuarios=0, sesiones=None):
+    """Genera datos sintéticos en la base de datos con inserciones masivas"""
+    print_header("Generar Datos Sintéticos")
+    print_info(f"Reclutas: {reclutas}, semilla: {semilla}")
     
-    # Asegurar que existe el directorio de backups
-    if not os.path.exists(backup_dir):
-        os.makedirs(backup_dir)
+    tabla_actual = [None]
+    
+    def progreso(tabla, filas):
+        # Una línea por tabla, actualizada en cada lote
+        if tabla != tabla_actual[0]:
+            if tabla_actual[0] is not None:
+                print()
+            tabla_actual[0] = tabla
+        print(f"\r  {tabla:<14}{filas:>12,} filas", end='', flush=True)
     
     try:
-        # Formato de fecha para el nombre del archivo
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_file = os.path.join(backup_dir, f"backup_{timestamp}.db")
+        with app.app_context():
+            db.create_all()
+            raw = db.engine.raw_connection()
+            try:
+                resultado = sembrar(
+                    raw.driver_connection, reclutas, semilla=semilla, entrevistas=entrevistas,
+                    usuarios=usuarios, sesiones=sesiones, progreso=progreso
+                )
+            finally:
+                raw.close()
+        print()
         
-        # Comando para copiar la base de datos
-        db_file = 'database.db'  # Ubicación de la BD SQLite
-        if os.path.exists(db_file):
-            import shutil
-            shutil.copy2(db_file, backup_file)
-            print_success(f"Copia de seguridad creada: {backup_file}")
-            return True
-        else:
-            print_error(f"No se encontró el archivo de base de datos: {db_file}")
-            return False
+        # Los datos sembrados no pasan por los handlers: los resúmenes diarios se rehacen
+        with app.app_context():
+            rollups.reconstruir(db.session)
+            db.session.commit()
+        
+        segundos = resultado.pop('segundos')
+        total = sum(resultado.values())
+        print_success(f"{total:,} filas en {segundos:.1f} s ({total / segundos * 60 if segundos else 0:,.0f} filas/min)")
+        if usuarios:
+            print_info("Contraseña de los usuarios generados: Seed-1234")
+        log_activity("Datos sintéticos generados", details=f"semilla={semilla}, filas={resultado}")
+        return True
     except Exception as e:
-        print_error(f"Error al crear copia de seguridad: {str(e)}")
+        print()
+        print_error(f"Error al generar datos: {str(e)}")
+        log_activity("Error al generar datos sintéticos", success=False, details=str(e))
         return False
 
 def crear_usuario():
@@ -268,7 +345,7 @@ def listar_usuarios():
     print_header("Listado de Usuarios")
     
     try:
-        with app.app_context():
+        with app.app_context(), use_read_replica():
             usuarios = Usuario.query.all()
             
             if not usuarios:
@@ -478,8 +555,8 @@ def ver_logs():
     print_header("Registros de Actividad")
     
     try:
-        # Primero intentamos obtener logs de la base de datos
-        with app.app_context():
+        # Primero intentamos obtener logs de la base de datos (engine de lectura)
+        with app.app_context(), use_read_replica():
             audit_logs = AuditLog.query.order_by(AuditLog.timestamp.desc()).limit(20).all()
             
             if audit_logs:
@@ -538,6 +615,206 @@ def ver_logs():
     
     input("\nPresiona Enter para continuar...")
 
+def ver_consultas_lentas(top=10):
+    """Muestra las consultas lentas que más tiempo acumulan"""
+    print_header("Consultas Lentas")
+    log_file = config.get('SLOW_QUERY', 'LOG_FILE', fallback='slow_queries.log')
+    
+    resumen = resumir(log_file, top)
+    if not resumen:
+        print_info(f"No hay consultas lentas registradas en {log_file}")
+        return
+    
+    print(f"{'Huella':<14}{'Veces':>7}{'Total ms':>11}{'p95 ms':>9}{'Máx ms':>9}  Endpoints")
+    print("-" * 80)
+    for grupo in resumen:
+        endpoints = ', '.join(f"{e} ({n})" for e, n in sorted(grupo['endpoints'].items(), key=lambda x: -x[1])[:3])
+        print(f"{Color.BOLD}{grupo['fingerprint']:<14}{Color.ENDC}{grupo['count']:>7}{grupo['total_ms']:>11.1f}"
+              f"{grupo['p95_ms']:>9.1f}{grupo['max_ms']:>9.1f}  {endpoints}")
+        print(f"  {grupo['statement'][:300]}")
+        for paso in grupo['plan'] or []:
+            color = Color.YELLOW if paso.startswith('SCAN') else ''
+            print(f"    {color}{paso}{Color.ENDC if color else ''}")
+        print(f"  Última: {grupo['ultima']}")
+        print()
+
+def ver_perfiles(nombre=None, top=25):
+    """Lista los perfiles guardados o muestra las funciones más costosas de uno"""
+    directorio = app.config['PROFILING_DIR']
+    
+    if nombre:
+        ruta = os.path.join(directorio, os.path.basename(nombre))
+        if not os.path.exists(ruta):
+            print_error(f"No existe el perfil {ruta}")
+            return
+        print_header(f"Perfil {os.path.basename(ruta)}")
+        if not ruta.endswith('.pstats'):
+            print_info("Perfil de muestreo: ábrelo en https://www.speedscope.app")
+            return
+        import pstats
+        pstats.Stats(ruta).sort_stats('cumulative').print_stats(top)
+        return
+    
+    print_header("Perfiles de Peticiones")
+    from profiling import listar_perfiles
+    perfiles = listar_perfiles(directorio)
+    if not perfiles:
+        print_info(f"No hay perfiles en {directorio}/")
+        print_info("Añade ?_profile=cprofile o ?_profile=sample a una petición con sesión de administrador,")
+        print_info("o envía la cabecera X-Profile con un token de --profile-token")
+        return
+    
+    print(f"{'Fecha':<21}{'Tamaño':>10}  Archivo")
+    print("-" * 80)
+    for perfil in perfiles:
+        print(f"{perfil['fecha'].strftime('%Y-%m-%d %H:%M:%S'):<21}{perfil['bytes'] / 1024:>8.1f}KB  {perfil['nombre']}")
+    print()
+    print_info(f"{len(perfiles)} perfiles en {directorio}/ (máximo {app.config['PROFILING_MAX_FILES']})")
+
+def generar_token_perfilado(modo='cprofile'):
+    """Imprime un token firmado para la cabecera X-Profile"""
+    from profiling import generar_token
+    token = generar_token(app.config['SECRET_KEY'], modo)
+    print_success(f"Token de perfilado ({modo}), válido {app.config['PROFILING_TOKEN_MAX_AGE']} segundos:")
+    print(token)
+    print_info(f"Uso: curl -H 'X-Profile: {token}' ...")
+
+_janitor = None
+
+def crear_janitor():
+    """Janitor con las mismas tareas que la aplicación web, incluidas las de las extensiones"""
+    global _janitor
+    if _janitor is None:
+        # Importa Flask-Login (registra /api/cambios): solo los comandos que lo necesitan
+        from change_feed import ChangeFeed
+        _janitor = Janitor()
+        init_tareas(app, _janitor, FileCleanup(), ReminderScheduler(), MailQueue(), ChangeFeed(), DeltaSync(), Archivo())
+    return _janitor
+
+def ejecutar_janitor(nombre=None):
+    """Ejecuta ahora las tareas del janitor (todas o una)"""
+    print_header("Tareas de Mantenimiento")
+    janitor = crear_janitor()
+    
+    if nombre and nombre not in janitor.tareas:
+        print_error(f"Tarea desconocida o desactivada: {nombre}. Disponibles: {', '.join(janitor.tareas)}")
+        return False
+    
+    # El mismo bloqueo que el hilo del janitor: no ejecutar a la vez que el proceso líder
+    if not janitor.tomar_bloqueo():
+        print_warning(f"Otro proceso está ejecutando las tareas ({janitor.lock_file}). No se ha hecho nada")
+        return True
+    
+    ok = True
+    try:
+        for tarea in [nombre] if nombre else list(janitor.tareas):
+            filas, segundos = janitor.ejecutar(tarea)
+            if filas is None:
+                ok = False
+                print_error(f"{tarea}: falló tras {segundos:.2f}s (ver admin_activity.log)")
+            else:
+                print_success(f"{tarea}: {filas} filas en {segundos:.2f}s")
+    finally:
+        janitor.soltar_bloqueo()
+    log_activity("Tareas de mantenimiento", ok, nombre or 'todas')
+    return ok
+
+def recoger_archivos_huerfanos(simular=False):
+    """Borra (o pone en cuarentena) las fotos subidas que ya no referencia ningún registro"""
+    print_header("Archivos Subidos Huérfanos")
+    file_cleanup = FileCleanup(app)
+    print_info(f"Directorio: {file_cleanup.base}, antigüedad mínima: {file_cleanup.gracia / 3600:g} horas")
+    
+    try:
+        with app.app_context():
+            resultado = file_cleanup.recoger_huerfanos(db.engine, simular=simular)
+    except Exception as e:
+        print_error(f"Error al recoger archivos huérfanos: {str(e)}")
+        log_activity("Recogida de archivos huérfanos", False, str(e))
+        return False
+    
+    accion = "se retirarían" if simular else ("movidos a " + file_cleanup.cuarentena if file_cleanup.cuarentena else "borrados")
+    print_success(f"{resultado['archivos']} de {resultado['revisados']} archivos {accion}, "
+                  f"{resultado['bytes'] / 1048576:.1f}MB recuperados")
+    if resultado['errores']:
+        print_warning(f"{resultado['errores']} archivos no se pudieron retirar (ver admin_activity.log)")
+    if not simular:
+        log_activity("Recogida de archivos huérfanos", not resultado['errores'],
+                     f"{resultado['archivos']} archivos, {resultado['bytes']} bytes")
+    return not resultado['errores']
+
+def archivar_reclutas(simular=False):
+    """Mueve al archivo los reclutas cerrados hace tiempo, con sus entrevistas"""
+    print_header("Archivo de Reclutas Cerrados")
+    archivo = Archivo(app)
+    print_info(f"Estados: {', '.join(archivo.estados)}; sin cambios desde hace {archivo.meses} meses")
+    
+    try:
+        with app.app_context():
+            resultado = archivo.archivar(db.engine, simular=simular)
+    except Exception as e:
+        print_error(f"Error al archivar: {str(e)}")
+        log_activity("Archivo de reclutas", False, str(e))
+        return False
+    
+    accion = "se archivarían" if simular else "archivados"
+    print_success(f"{resultado['reclutas']} reclutas y {resultado['entrevistas']} entrevistas {accion}")
+    if not simular:
+        log_activity("Archivo de reclutas", True, f"{resultado['reclutas']} reclutas, {resultado['entrevistas']} entrevistas")
+    return True
+
+def restaurar_recluta(recluta_id):
+    """Devuelve un recluta archivado (y sus entrevistas) a las tablas activas"""
+    print_header("Restaurar Recluta Archivado")
+    archivo = Archivo(app)
+    
+    try:
+        with app.app_context():
+            with db.engine.begin() as conn:
+                entrevistas = archivo.restaurar(conn, recluta_id)
+                last_updated = conn.execute(
+                    db.select(Recluta.last_updated).where(Recluta.id == recluta_id)
+                ).scalar()
+    except (NoArchivado, IdOcupado) as e:
+        print_error(str(e))
+        return False
+    except Exception as e:
+        print_error(f"Error al restaurar el recluta: {str(e)}")
+        log_activity("Restaurar recluta", False, str(e))
+        return False
+    
+    # Ya confirmado: avisar a los navegadores abiertos, como POST /api/reclutas/<id>/restaurar
+    crear_janitor()
+    change_feed = app.extensions['change_feed']
+    with app.app_context():
+        change_feed.publicar_lote([('recluta', recluta_id, 'create', last_updated)]
+                                  + [('entrevista', entrevista_id, 'create', last_updated) for entrevista_id in entrevistas])
+    if change_feed.enabled and change_feed.relay == 'none':
+        print_warning("[CHANGE_FEED] relay = none: los navegadores abiertos no verán el recluta hasta recargar")
+    
+    print_success(f"Recluta {recluta_id} restaurado con {len(entrevistas)} entrevistas")
+    log_activity("Restaurar recluta", True, f"recluta={recluta_id}, entrevistas={len(entrevistas)}")
+    return True
+
+def reconstruir_resumenes():
+    """Rehace los resúmenes diarios de las tendencias desde las tablas de reclutas y entrevistas"""
+    print_header("Resúmenes Diarios")
+    inicio = time.perf_counter()
+    try:
+        with app.app_context():
+            filas = rollups.reconstruir(db.session)
+            db.session.commit()
+    except Exception as e:
+        print_error(f"Error al reconstruir los resúmenes: {str(e)}")
+        log_activity("Reconstruir resúmenes diarios", False, str(e))
+        return False
+    
+    print_success(f"{filas} filas de resumen en {time.perf_counter() - inicio:.2f}s")
+    print_warning("Los reclutas cuentan con su estado actual desde su fecha de registro: "
+                  "el historial de cambios de estado anterior se pierde")
+    log_activity("Reconstruir resúmenes diarios", True, f"{filas} filas")
+    return True
+
 def setup_admin_password():
     """Configura o cambia la contraseña del script administrativo"""
     if os.path.exists(ADMIN_PASSWORD_HASH_FILE):
@@ -666,12 +943,28 @@ def menu_principal():
 
 def parse_arguments():
     """Parsear argumentos de la línea de comandos"""
+    from profiling import MODOS
     parser = argparse.ArgumentParser(description='Herramienta de administración del Sistema de Gestión de Reclutas')
     parser.add_argument('--backup', action='store_true', help='Crear una copia de seguridad de la base de datos')
+    parser.add_argument('--cron', action='store_true', help='Con --backup: sin contraseña ni colores, solo la ruta en stdout y código de salida 1 si falla')
     parser.add_argument('--list-users', action='store_true', help='Listar usuarios')
     parser.add_argument('--new-user', action='store_true', help='Crear un nuevo usuario')
     parser.add_argument('--reset-password', metavar='USER_ID', type=int, help='Resetear contraseña de un usuario')
     parser.add_argument('--logs', action='store_true', help='Ver logs de actividad')
+    parser.add_argument('--slow-queries', metavar='N', type=int, nargs='?', const=10, help='Resumen de las N consultas más lentas (por defecto 10)')
+    parser.add_argument('--janitor', metavar='TAREA', nargs='?', const='', help='Ejecutar ahora las tareas del janitor (sesiones, auditoria, sqlite, recordatorios, tombstones, uploads, archivo...) o solo una')
+    parser.add_argument('--uploads-gc', action='store_true', help='Retirar las fotos subidas que no referencia ningún recluta ni usuario')
+    parser.add_argument('--archive', action='store_true', help='Archivar ahora los reclutas cerrados hace tiempo y sus entrevistas')
+    parser.add_argument('--restore-recluta', metavar='RECLUTA_ID', type=int, help='Devolver un recluta archivado a las tablas activas')
+    parser.add_argument('--rebuild-rollups', action='store_true', help='Reconstruir los resúmenes diarios de las tendencias')
+    parser.add_argument('--dry-run', action='store_true', help='Con --uploads-gc o --archive: solo contar, sin cambiar nada')
+    parser.add_argument('--profiles', metavar='ARCHIVO', nargs='?', const='', help='Listar los perfiles de peticiones o mostrar uno (.pstats)')
+    parser.add_argument('--profile-token', metavar='MODO', nargs='?', const='cprofile', choices=MODOS, help='Generar un token para la cabecera X-Profile (cprofile o sample)')
+    parser.add_argument('--seed', metavar='RECLUTAS', type=int, help='Generar datos sintéticos (N reclutas)')
+    parser.add_argument('--random-seed', metavar='SEMILLA', type=int, default=42, help='Semilla de --seed (por defecto 42)')
+    parser.add_argument('--seed-interviews', metavar='N', type=int, help='Entrevistas a generar (por defecto la mitad de los reclutas)')
+    parser.add_argument('--seed-users', metavar='N', type=int, default=0, help='Usuarios a generar')
+    parser.add_argument('--seed-sessions', metavar='N', type=int, help='Sesiones a generar (por defecto una por cada 10 reclutas)')
     
     return parser.parse_args()
 
@@ -679,8 +972,15 @@ if __name__ == "__main__":
     try:
         args = parse_arguments()
         
+        # Modo cron: copia no interactiva (solo lee la BD, no pide la contraseña de administrador)
+        if args.cron:
+            if not args.backup:
+                print("--cron solo se admite junto con --backup", file=sys.stderr)
+                sys.exit(2)
+            sys.exit(0 if create_backup(silencioso=True) else 1)
+        
         # Si se especifican argumentos, ejecutar acciones específicas
-        if args.backup or args.list_users or args.new_user or args.reset_password or args.logs:
+        if args.backup or args.list_users or args.new_user or args.reset_password or args.logs or args.seed or args.slow_queries or args.profiles is not None or args.profile_token or args.janitor is not None or args.uploads_gc or args.archive or args.restore_recluta or args.rebuild_rollups:
             # Verificar contraseña de administrador primero
             if not verificar_admin_password():
                 sys.exit(1)
@@ -707,6 +1007,24 @@ if __name__ == "__main__":
                         print_error(f"Usuario con ID {args.reset_password} no encontrado")
             elif args.logs:
                 ver_logs()
+            elif args.slow_queries:
+                ver_consultas_lentas(args.slow_queries)
+            elif args.janitor is not None:
+                ejecutar_janitor(args.janitor)
+            elif args.uploads_gc:
+                recoger_archivos_huerfanos(args.dry_run)
+            elif args.archive:
+                archivar_reclutas(args.dry_run)
+            elif args.restore_recluta:
+                restaurar_recluta(args.restore_recluta)
+            elif args.rebuild_rollups:
+                reconstruir_resumenes()
+            elif args.profiles is not None:
+                ver_perfiles(args.profiles)
+            elif args.profile_token:
+                generar_token_perfilado(args.profile_token)
+            elif args.seed:
+                sembrar_datos(args.seed, args.random_seed, args.seed_interviews, args.seed_users, args.seed_sessions)
         else:
             # Flujo normal, mostrar menú interactivo
             clear_screen()
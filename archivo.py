@@ -0,0 +1,244 @@
+"""
+Archivo de reclutas cerrados (particionado caliente/frío).
+
+Los reclutas en un estado de ``[ARCHIVE] estados`` (Rechazado) sin cambios
+desde hace ``months`` meses se mueven, con sus entrevistas, de ``recluta`` y
+``entrevista`` a ``recluta_archivo`` y ``entrevista_archivo`` en la misma base
+de datos. Así los listados, búsquedas y estadísticas recorren solo los datos
+vivos; con ``?incluir_archivo=1`` unen las dos tablas y cada fila lleva
+``archivado``.
+
+La tarea ``archivo`` del janitor mueve lotes de ``batch_size`` reclutas, cada
+lote en su propia transacción: INSERT ... SELECT al archivo y DELETE de las
+tablas activas con la misma lista de ids. Se registran bajas (tombstones) para
+que los clientes con ``?updated_since=`` los quiten de su lista.
+
+No se archiva un recluta con entrevistas pendientes o modificadas dentro del
+plazo. ``recluta`` y ``entrevista`` son AUTOINCREMENT: SQLite no vuelve a
+asignar un id que ya se usó, aunque la fila esté en el archivo. Las bases de
+datos creadas antes se rehacen con ``migrar_autoincrement`` en ``python app.py
+bootstrap``; hasta entonces la tarea no archiva nada.
+
+``restaurar`` devuelve un recluta y sus entrevistas a las tablas activas con
+``last_updated`` = ahora (``POST /api/reclutas/<id>/restaurar`` y
+``admin_tools.py --restore-recluta``).
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from delta_sync import insertar_bajas
+from models import Entrevista, EntrevistaArchivo, Recluta, ReclutaArchivo, Tombstone
+
+logger = logging.getLogger(__name__)
+
+
+class NoArchivado(LookupError):
+    """El recluta no está en el archivo"""
+
+
+class IdOcupado(Exception):
+    """El id del recluta o de alguna entrevista ya existe en las tablas activas"""
+
+
+# Tablas activas y su archivo
+TABLAS = ((Recluta.__table__, ReclutaArchivo.__table__), (Entrevista.__table__, EntrevistaArchivo.__table__))
+
+
+def _autoincrement(sql):
+    return sql is not None and 'AUTOINCREMENT' in sql.upper()
+
+
+def sin_autoincrement(conn):
+    """Tablas activas que aún reutilizarían ids (creadas antes de AUTOINCREMENT)"""
+    if conn.dialect.name != 'sqlite':
+        return []
+    consulta = sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :nombre")
+    return [t.name for t, _ in TABLAS if not _autoincrement(conn.execute(consulta, {'nombre': t.name}).scalar())]
+
+
+def _rehacer(sqlite, dialecto, tabla, tabla_archivo):
+    """Tabla nueva con AUTOINCREMENT, copia de las filas, DROP de la antigua y RENAME"""
+    md = sa.MetaData()
+    for otra in tabla.metadata.sorted_tables:
+        if otra is not tabla:
+            otra.to_metadata(md)
+    nueva = tabla.to_metadata(md, name=f'{tabla.name}__nueva')
+    existentes = {fila[1] for fila in sqlite.execute(f'PRAGMA table_info("{tabla.name}")')}
+    columnas = ', '.join(f'"{c.name}"' for c in tabla.columns if c.name in existentes)
+
+    sqlite.execute(str(sa.schema.CreateTable(nueva).compile(dialect=dialecto)))
+    sqlite.execute(f'INSERT INTO "{nueva.name}" ({columnas}) SELECT {columnas} FROM "{tabla.name}"')
+    sqlite.execute(f'DROP TABLE "{tabla.name}"')
+    sqlite.execute(f'ALTER TABLE "{nueva.name}" RENAME TO "{tabla.name}"')
+
+    # La secuencia empieza por encima de todo id ya usado: activas, archivo y bajas
+    maximo = sqlite.execute(
+        f'SELECT max(coalesce((SELECT max(id) FROM "{tabla.name}"), 0), '
+        f'coalesce((SELECT max(id) FROM "{tabla_archivo.name}"), 0), '
+        f'coalesce((SELECT max(entity_id) FROM "{Tombstone.__tablename__}" WHERE entity = ?), 0))',
+        (tabla.name,)
+    ).fetchone()[0]
+    sqlite.execute('DELETE FROM sqlite_sequence WHERE name = ?', (tabla.name,))
+    if maximo:
+        sqlite.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (tabla.name, maximo))
+
+
+def migrar_autoincrement(engine):
+    """
+    Rehace ``recluta`` y ``entrevista`` con AUTOINCREMENT si se crearon sin
+    él (``python app.py bootstrap``), todo en una transacción y con las claves
+    ajenas desactivadas como pide SQLite para cambiar una tabla. Los índices
+    los vuelve a crear bootstrap. Devuelve los nombres de las tablas rehechas.
+    """
+    with engine.connect() as conn:
+        pendientes = set(sin_autoincrement(conn))
+    if not pendientes:
+        return []
+
+    conexion = engine.raw_connection()
+    sqlite = conexion.driver_connection
+    aislamiento = sqlite.isolation_level
+    try:
+        # Transacción explícita: PRAGMA foreign_keys no surte efecto dentro de una
+        sqlite.isolation_level = None
+        claves = sqlite.execute('PRAGMA foreign_keys').fetchone()[0]
+        sqlite.execute('PRAGMA foreign_keys = OFF')
+        try:
+            sqlite.execute('BEGIN IMMEDIATE')
+            try:
+                for tabla, tabla_archivo in TABLAS:
+                    if tabla.name in pendientes:
+                        _rehacer(sqlite, engine.dialect, tabla, tabla_archivo)
+                sqlite.execute('COMMIT')
+            except Exception:
+                sqlite.execute('ROLLBACK')
+                raise
+        finally:
+            sqlite.execute(f'PRAGMA foreign_keys = {int(claves)}')
+    finally:
+        sqlite.isolation_level = aislamiento
+        conexion.close()
+    return [t.name for t, _ in TABLAS if t.name in pendientes]
+
+
+def archivar_reclutas(janitor):
+    resultado = janitor.app.extensions['archivo'].archivar(janitor.db.engine, janitor.batch_pause)
+    return resultado['reclutas'] + resultado['entrevistas']
+
+
+def _mover(ejecutor, origen, destino, condicion, valores):
+    """INSERT INTO destino SELECT ... FROM origen WHERE condicion; ``valores`` sustituye columnas"""
+    nombres = [c.name for c in origen.c if c.name in destino.c] + [n for n in valores if n not in origen.c]
+    columnas = [valores[n] if n in valores else origen.c[n] for n in nombres]
+    ejecutor.execute(sa.insert(destino).from_select(nombres, sa.select(*columnas).where(condicion)))
+    return ejecutor.execute(sa.delete(origen).where(condicion)).rowcount
+
+
+class Archivo:
+    """
+    Extensión del archivo de reclutas.
+
+    Configuración (app.config):
+        ARCHIVE_INTERVAL    -- segundos entre ejecuciones de la tarea (0 = desactivada)
+        ARCHIVE_MONTHS      -- meses sin cambios para archivar un recluta cerrado
+        ARCHIVE_ESTADOS     -- estados de recluta que se consideran cerrados
+        ARCHIVE_BATCH_SIZE  -- reclutas por transacción
+    """
+
+    def __init__(self, app=None, db=None, janitor=None):
+        self.app = None
+        self.meses = 12
+        self.estados = ('Rechazado',)
+        self.lote = 200
+        if app is not None:
+            self.init_app(app, db, janitor)
+
+    def init_app(self, app, db=None, janitor=None):
+        self.app = app
+        self.meses = app.config.get('ARCHIVE_MONTHS', 12)
+        self.estados = tuple(app.config.get('ARCHIVE_ESTADOS', ('Rechazado',)))
+        self.lote = app.config.get('ARCHIVE_BATCH_SIZE', 200)
+        app.extensions['archivo'] = self
+        if janitor is not None and self.meses > 0:
+            janitor.add_job('archivo', app.config.get('ARCHIVE_INTERVAL', 86400), archivar_reclutas)
+
+    def condicion(self, ahora=None):
+        """Reclutas que se pueden archivar"""
+        r, e = Recluta.__table__, Entrevista.__table__
+        limite = (ahora or datetime.utcnow()) - timedelta(days=30 * self.meses)
+        return sa.and_(
+            r.c.estado.in_(self.estados),
+            r.c.last_updated < limite,
+            ~sa.exists().where(e.c.recluta_id == r.c.id, sa.or_(
+                e.c.estado == 'pendiente', e.c.last_updated >= limite
+            )),
+        )
+
+    def archivar(self, engine, pausa=0.01, simular=False):
+        """Archiva por lotes. Devuelve {'reclutas', 'entrevistas'} movidos (o por mover con ``simular``)"""
+        r, e = Recluta.__table__, Entrevista.__table__
+        if simular:
+            with engine.connect() as conn:
+                seleccion = sa.select(r.c.id).where(self.condicion()).scalar_subquery()
+                return {
+                    'reclutas': conn.execute(sa.select(sa.func.count()).where(r.c.id.in_(seleccion))).scalar(),
+                    'entrevistas': conn.execute(sa.select(sa.func.count()).where(e.c.recluta_id.in_(seleccion))).scalar(),
+                }
+
+        with engine.connect() as conn:
+            pendientes = sin_autoincrement(conn)
+        if pendientes:
+            raise RuntimeError(f"Las tablas {', '.join(pendientes)} reutilizarían los ids archivados: "
+                               f"ejecute 'python app.py bootstrap' antes de archivar")
+
+        feed = self.app.extensions.get('change_feed')
+        total = {'reclutas': 0, 'entrevistas': 0}
+        while True:
+            ahora = datetime.utcnow()
+            with engine.begin() as conn:
+                ids = conn.execute(
+                    sa.select(r.c.id).where(self.condicion(ahora)).order_by(r.c.id).limit(self.lote)
+                ).scalars().all()
+                if not ids:
+                    return total
+                entrevistas = conn.execute(sa.select(e.c.id).where(e.c.recluta_id.in_(ids))).scalars().all()
+                archivado = {'archivado_en': sa.literal(ahora, sa.DateTime)}
+                _mover(conn, e, EntrevistaArchivo.__table__, e.c.recluta_id.in_(ids), archivado)
+                _mover(conn, r, ReclutaArchivo.__table__, r.c.id.in_(ids), archivado)
+                insertar_bajas(conn, 'recluta', ids)
+                insertar_bajas(conn, 'entrevista', entrevistas)
+
+            total['reclutas'] += len(ids)
+            total['entrevistas'] += len(entrevistas)
+            if feed is not None:
+                feed.publicar_lote([('recluta', recluta_id, 'delete', None) for recluta_id in ids]
+                                   + [('entrevista', entrevista_id, 'delete', None) for entrevista_id in entrevistas])
+            logger.info(f"Archivados {len(ids)} reclutas y {len(entrevistas)} entrevistas")
+            if len(ids) < self.lote:
+                return total
+            time.sleep(pausa)
+
+    def restaurar(self, ejecutor, recluta_id):
+        """
+        Devuelve el recluta y sus entrevistas a las tablas activas, en la
+        transacción de ``ejecutor`` (sesión o conexión). Devuelve los ids de
+        las entrevistas restauradas.
+        """
+        ra, ea = ReclutaArchivo.__table__, EntrevistaArchivo.__table__
+        r, e = Recluta.__table__, Entrevista.__table__
+        if ejecutor.execute(sa.select(ra.c.id).where(ra.c.id == recluta_id)).first() is None:
+            raise NoArchivado(f"El recluta {recluta_id} no está archivado")
+        entrevistas = ejecutor.execute(sa.select(ea.c.id).where(ea.c.recluta_id == recluta_id)).scalars().all()
+        if (ejecutor.execute(sa.select(r.c.id).where(r.c.id == recluta_id)).first() is not None
+                or ejecutor.execute(sa.select(e.c.id).where(e.c.id.in_(entrevistas))).first() is not None):
+            raise IdOcupado(f"El id del recluta {recluta_id} o de sus entrevistas ya está en uso")
+
+        # last_updated nuevo: la sincronización incremental lo vuelve a entregar
+        ahora = sa.literal(datetime.utcnow(), sa.DateTime)
+        _mover(ejecutor, ra, r, ra.c.id == recluta_id, {'last_updated': ahora})
+        _mover(ejecutor, ea, e, ea.c.recluta_id == recluta_id, {'last_updated': ahora})
+        return entrevistas
@@ -0,0 +1,150 @@
+"""
+Copias de seguridad en caliente de la base de datos SQLite.
+
+Se usa la API de backup de SQLite (``sqlite3.Connection.backup``) en lugar de
+copiar el archivo: la copia es consistente aunque la aplicación esté
+escribiendo y no se pierden las páginas que aún están en el WAL.
+
+Flujo de ``crear_backup``:
+    1. backup a ``<nombre>.db.partial`` en el directorio de destino
+    2. ``PRAGMA integrity_check`` sobre la copia
+    3. compresión opcional (gzip o zstd) leyendo la copia por bloques
+    4. ``os.replace`` al nombre definitivo (nunca queda un archivo a medias)
+
+En modo WAL la copia se hace en un solo paso: solo abre una transacción de
+lectura y no bloquea a los escritores. En otros modos se copia por tramos de
+``paginas`` páginas, soltando el bloqueo entre tramos.
+"""
+
+import glob
+import gzip
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional
+    zstandard = None
+
+PREFIJO = 'backup_'
+EXTENSIONES = {None: '.db', 'gzip': '.db.gz', 'zstd': '.db.zst'}
+BLOQUE = 1024 * 1024
+
+
+class BackupError(Exception):
+    """La copia no se pudo crear o no pasó la verificación"""
+
+
+def _copiar(origen, destino, paginas, pausa):
+    fuente = sqlite3.connect(origen, timeout=30)
+    copia = sqlite3.connect(destino)
+    try:
+        modo = fuente.execute("PRAGMA journal_mode").fetchone()[0].lower()
+        if modo == 'wal' or paginas <= 0:
+            fuente.backup(copia)
+        else:
+            # Entre tramos se libera el bloqueo de lectura y se deja pasar a los escritores
+            fuente.backup(copia, pages=paginas, progress=lambda *_: time.sleep(pausa))
+        copia.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        copia.close()
+        fuente.close()
+
+
+def _verificar(ruta):
+    conn = sqlite3.connect(ruta)
+    try:
+        resultado = [fila[0] for fila in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    if resultado != ['ok']:
+        raise BackupError(f"integrity_check falló: {'; '.join(resultado[:5])}")
+
+
+def _comprimir(ruta, destino, compresion, nivel):
+    with open(ruta, 'rb') as entrada:
+        if compresion == 'gzip':
+            with gzip.open(destino, 'wb', compresslevel=nivel or 6) as salida:
+                shutil.copyfileobj(entrada, salida, BLOQUE)
+        else:
+            compresor = zstandard.ZstdCompressor(level=nivel or 3, threads=-1)
+            with open(destino, 'wb') as salida:
+                compresor.copy_stream(entrada, salida, read_size=BLOQUE, write_size=BLOQUE)
+
+
+def crear_backup(origen, directorio, compresion='gzip', nivel=None, paginas=1024, pausa=0.005, verificar=True):
+    """
+    Crea una copia consistente de ``origen`` en ``directorio``.
+    Devuelve un dict con ruta, bytes, bytes_origen y segundos.
+    """
+    if compresion not in EXTENSIONES:
+        raise BackupError(f"Compresión desconocida: {compresion}")
+    if compresion == 'zstd' and zstandard is None:
+        raise BackupError("zstd no disponible: instala el paquete zstandard o usa gzip")
+    if not os.path.exists(origen):
+        raise BackupError(f"No se encontró la base de datos: {origen}")
+
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.perf_counter()
+    nombre = f"{PREFIJO}{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXTENSIONES[compresion]}"
+    final = os.path.join(directorio, nombre)
+    temporal = os.path.join(directorio, f".{nombre}.db.partial")
+    comprimido = os.path.join(directorio, f".{nombre}.partial")
+
+    try:
+        _copiar(origen, temporal, paginas, pausa)
+        if verificar:
+            _verificar(temporal)
+        bytes_origen = os.path.getsize(temporal)
+        if compresion:
+            _comprimir(temporal, comprimido, compresion, nivel)
+            os.replace(comprimido, final)
+            os.remove(temporal)
+        else:
+            os.replace(temporal, final)
+    except (sqlite3.Error, OSError) as e:
+        raise BackupError(str(e)) from e
+    finally:
+        for resto in (temporal, comprimido):
+            if os.path.exists(resto):
+                os.remove(resto)
+
+    return {
+        'ruta': final,
+        'bytes': os.path.getsize(final),
+        'bytes_origen': bytes_origen,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def listar_backups(directorio):
+    """Copias del directorio, de la más reciente a la más antigua"""
+    copias = []
+    for ruta in glob.glob(os.path.join(directorio, f"{PREFIJO}*")):
+        if not ruta.endswith(tuple(EXTENSIONES.values())):
+            continue
+        copias.append({'ruta': ruta, 'bytes': os.path.getsize(ruta),
+                       'fecha': datetime.fromtimestamp(os.path.getmtime(ruta))})
+    copias.sort(key=lambda c: c['fecha'], reverse=True)
+    return copias
+
+
+def aplicar_retencion(directorio, conservar=10, max_dias=0):
+    """
+    Borra las copias por encima de las ``conservar`` más recientes y, si
+    ``max_dias`` > 0, las más antiguas que eso. La más reciente nunca se borra.
+    Devuelve las rutas borradas.
+    """
+    copias = listar_backups(directorio)
+    limite = datetime.now() - timedelta(days=max_dias) if max_dias > 0 else None
+    borradas = []
+    for i, copia in enumerate(copias):
+        if i == 0:
+            continue
+        if i >= max(conservar, 1) or (limite and copia['fecha'] < limite):
+            os.remove(copia['ruta'])
+            borradas.append(copia['ruta'])
+    return borradas
@@ -0,0 +1,119 @@
+"""
+Varias lecturas en una sola petición: ``GET /api/batch``.
+
+Al cargar, el panel pedía por separado /api/check-auth, /api/reclutas,
+/api/estadisticas y /api/entrevistas, y cada petición repetía la comprobación
+de IP, la carga de la sesión y la del usuario. Con
+
+    GET /api/batch?r=/api/check-auth&r=/api/reclutas%3Fper_page%3D50&r=/api/estadisticas
+
+esos pasos se hacen una vez y cada ruta se resuelve con el mapa de URLs y se
+llama a su vista dentro del mismo contexto de petición, cambiando
+``request.args``, ``request.url_rule`` y ``request.view_args`` (así el log de
+consultas lentas y /metrics atribuyen cada sub-petición a su endpoint). Cada
+vista aplica su propia autorización y un fallo en una no afecta a las demás;
+la redirección de ``login_required`` sin sesión se devuelve como 401:
+
+    {"respuestas": [{"path": "/api/check-auth", "status": 200, "body": {...}}, ...]}
+
+Solo se admiten sub-peticiones GET con respuesta JSON (el lote se enruta a la
+réplica de lectura como cualquier GET y no necesita token CSRF). Los cuerpos
+de las vistas se copian tal cual, sin volver a serializarlos.
+"""
+
+import logging
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from flask import Response, current_app, json, jsonify, request
+from flask_login import current_user
+from werkzeug.datastructures import ImmutableMultiDict
+from werkzeug.exceptions import HTTPException
+
+from metrics import metrics
+from models import db
+
+logger = logging.getLogger(__name__)
+
+
+class BatchDispatcher:
+    """
+    Extensión del endpoint de lotes.
+
+    Configuración (app.config):
+        BATCH_ENABLED       -- registra /api/batch
+        BATCH_MAX_REQUESTS  -- sub-peticiones como máximo por lote
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.max_requests = 10
+        # Vistas que no pueden ir dentro de un lote (streaming o el propio lote)
+        self.excluidos = {'batch', 'cambios'}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('BATCH_ENABLED', True)
+        self.max_requests = app.config.get('BATCH_MAX_REQUESTS', 10)
+        app.extensions['batch'] = self
+        if self.enabled:
+            app.add_url_rule('/api/batch', 'batch', self.vista, methods=['GET'])
+
+    def vista(self):
+        rutas = request.args.getlist('r')
+        if not rutas:
+            return jsonify({"error": "Indique las sub-peticiones con ?r=<ruta>"}), 400
+        if len(rutas) > self.max_requests:
+            return jsonify({"error": f"Como máximo {self.max_requests} sub-peticiones por lote"}), 400
+
+        adapter = current_app.url_map.bind_to_environ(request.environ)
+        originales = request.args, request.url_rule, request.view_args
+        partes = []
+        try:
+            for ruta in rutas:
+                status, cuerpo = self._despachar(adapter, ruta)
+                partes.append(b'{"path":%s,"status":%d,"body":%s}' % (json.dumps(ruta).encode(), status, cuerpo))
+        finally:
+            request.args, request.url_rule, request.view_args = originales
+
+        return Response(b'{"respuestas":[' + b','.join(partes) + b']}', mimetype='application/json')
+
+    def _despachar(self, adapter, ruta):
+        """Ejecuta una sub-petición. Devuelve (status, cuerpo JSON en bytes)"""
+        partes = urlsplit(ruta)
+        try:
+            regla, view_args = adapter.match(partes.path, method='GET', return_rule=True)
+        except HTTPException as e:
+            return e.code, json.dumps({"error": e.description}).encode()
+        endpoint = regla.endpoint
+        if endpoint in self.excluidos or endpoint == 'static':
+            return 400, json.dumps({"error": "Ruta no admitida en un lote"}).encode()
+
+        # request.endpoint sale de url_rule: las consultas lentas se atribuyen a la sub-petición
+        request.args = ImmutableMultiDict(parse_qsl(partes.query, keep_blank_values=True))
+        request.url_rule = regla
+        request.view_args = view_args
+        inicio = time.perf_counter()
+        try:
+            respuesta = current_app.make_response(current_app.view_functions[endpoint](**view_args))
+        except HTTPException as e:
+            respuesta = current_app.make_response(current_app.handle_user_exception(e))
+        except Exception as e:
+            # La sesión de la base de datos puede quedar en mal estado para las siguientes
+            db.session.rollback()
+            logger.error(f"Error en la sub-petición {ruta}: {str(e)}")
+            respuesta = jsonify({"error": "Error interno del servidor"})
+            respuesta.status_code = 500
+
+        if 300 <= respuesta.status_code < 400 and not current_user.is_authenticated:
+            # login_required sin sesión redirige a la página de login
+            respuesta = jsonify({"error": "No autorizado"})
+            respuesta.status_code = 401
+
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - inicio,
+                        (('endpoint', endpoint), ('method', 'GET')))
+        metrics.inc('batch_subrequests_total', (('endpoint', endpoint), ('status', str(respuesta.status_code))))
+        if respuesta.is_streamed or respuesta.mimetype != 'application/json':
+            return respuesta.status_code, json.dumps({"error": "La respuesta no es JSON"}).encode()
+        return respuesta.status_code, respuesta.get_data()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga reproducible de la API HTTP.
+
+Siembra una base de datos SQLite a la escala indicada con seed_data.py
+(reclutas, entrevistas y sesiones proporcionales), arranca la aplicación real y recorre los
+endpoints principales: listado de reclutas con filtros y ordenación,
+búsqueda, páginas profundas, entrevistas por rango de fechas, estadísticas,
+login, alta y modificación de reclutas.
+
+Cada escenario se ejecuta con dos clientes:
+    testclient -- cliente de pruebas de Flask dentro del proceso
+    wsgi       -- servidor WSGI local (werkzeug) y http.client con keep-alive
+
+Se informa del rendimiento (peticiones/s) y de las latencias p50/p95/p99. Con
+--baseline se compara con una ejecución guardada (--guardar-baseline) y el
+script termina con código 1 si algún escenario empeora más de --tolerancia.
+
+Las bases sembradas se guardan en benchmarks/.cache para no repetir la
+siembra entre ejecuciones con la misma escala y semilla.
+
+Uso:
+    python benchmarks/bench_api.py [--escala 10k] [--peticiones 200] [--concurrencia 4]
+                                   [--cliente testclient|wsgi|ambos] [--config config.ini]
+                                   [--baseline benchmarks/baseline_api.json] [--guardar-baseline]
+"""
+
+import argparse
+import configparser
+import http.client
+import json
+import logging
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+from urllib.parse import urlencode
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+CACHE = os.path.join(RAIZ, 'benchmarks', '.cache')
+BASELINE = os.path.join(RAIZ, 'benchmarks', 'baseline_api.json')
+
+sys.path.insert(0, RAIZ)
+
+from seed_data import APELLIDOS, sembrar  # noqa: E402
+
+PASSWORD = 'benchmark123'
+ESTADOS = ('Activo', 'En proceso', 'Rechazado')
+# Fecha fija para que la base sembrada sea idéntica entre ejecuciones
+REFERENCIA = date(2024, 1, 1)
+
+
+def parse_escala(texto):
+    """'10k' -> 10000, '1M' -> 1000000"""
+    texto = texto.strip().lower()
+    multiplicador = {'k': 1000, 'm': 1000000}.get(texto[-1:], 1)
+    if texto[-1:] in ('k', 'm'):
+        texto = texto[:-1]
+    return int(float(texto) * multiplicador)
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, math.ceil(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+# ----- PREPARACIÓN DE DATOS -----
+
+def escribir_config(tmp, base_config):
+    """config.ini del benchmark: el perfil indicado con rutas temporales"""
+    import app as appmod
+
+    config = configparser.ConfigParser()
+    if base_config:
+        config.read(base_config)
+    else:
+        config.read_dict(appmod.DEFAULT_CONFIG)
+    config['DEFAULT']['SECRET_KEY'] = 'benchmark'
+    config['DEFAULT']['DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    config['DEFAULT']['UPLOAD_FOLDER'] = os.path.join(tmp, 'uploads')
+    config['SECURITY']['ALLOWED_IPS'] = '127.0.0.1'
+    config['DATABASE']['MAINTENANCE_INTERVAL'] = '0'
+    if config.has_section('READ_REPLICA'):
+        config['READ_REPLICA']['SNAPSHOT_PATH'] = os.path.join(tmp, 'bench_snapshot.db')
+
+    ruta = os.path.join(tmp, 'config.ini')
+    with open(ruta, 'w') as f:
+        config.write(f)
+    return ruta
+
+
+def preparar_app(tmp, args):
+    """Siembra (o recupera de la caché) la base y crea la aplicación"""
+    config_file = escribir_config(tmp, args.config)
+    db_path = os.path.join(tmp, 'bench.db')
+    cache_path = os.path.join(CACHE, f'api_{args.escala}_{args.semilla}.db')
+
+    import app as appmod
+    from models import db, Usuario
+
+    if os.path.exists(cache_path):
+        shutil.copyfile(cache_path, db_path)
+    else:
+        print(f"Sembrando {args.escala} reclutas (semilla {args.semilla})...")
+        inicio = time.perf_counter()
+        appmod.bootstrap(config_file)
+        conn = sqlite3.connect(db_path)
+        sembrar(conn, args.escala, semilla=args.semilla, referencia=REFERENCIA)
+        conn.close()
+        os.makedirs(CACHE, exist_ok=True)
+        # API de backup: la copia incluye lo que aún está en el WAL
+        origen, destino = sqlite3.connect(db_path), sqlite3.connect(cache_path)
+        with destino:
+            origen.backup(destino)
+        origen.close()
+        destino.close()
+        print(f"Siembra completada en {time.perf_counter() - inicio:.1f} s")
+
+    app = appmod.create_app(config_file)
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        usuario = Usuario.query.order_by(Usuario.id).first()
+        usuario.password = PASSWORD
+        email = usuario.email
+        db.session.commit()
+    return app, email
+
+
+# ----- ESCENARIOS -----
+
+def escenarios(n, email):
+    """(nombre, fracción de peticiones, generador de (método, url, cuerpo) por iteración)"""
+    paginas = max(1, n // 50)
+    return [
+        ('reclutas_lista', 1, lambda i: (
+            'GET', '/api/reclutas?' + urlencode({'page': i % 20 + 1, 'per_page': 50}), None)),
+        ('reclutas_estado_orden', 1, lambda i: ('GET', '/api/reclutas?' + urlencode({
+            'estado': ESTADOS[i % 3], 'sort_by': 'nombre', 'sort_dir': 'asc', 'page': i % 10 + 1}), None)),
+        ('reclutas_busqueda', 1, lambda i: (
+            'GET', '/api/reclutas?' + urlencode({'busqueda': APELLIDOS[i % len(APELLIDOS)]}), None)),
+        ('reclutas_pagina_profunda', 1, lambda i: ('GET', '/api/reclutas?' + urlencode({
+            'page': max(1, paginas - i % 10), 'per_page': 50, 'sort_by': 'email'}), None)),
+        ('entrevistas_rango', 1, lambda i: ('GET', '/api/entrevistas?' + urlencode({
+            'fecha_desde': f'2023-{i % 12 + 1:02d}-01', 'fecha_hasta': f'2023-{i % 12 + 1:02d}-28'}), None)),
+        ('estadisticas', 0.25, lambda i: ('GET', '/api/estadisticas', None)),
+        ('login', 0.1, lambda i: ('POST', '/api/login', {'email': email, 'password': PASSWORD})),
+        ('crear_recluta', 1, lambda i: ('POST', '/api/reclutas', {
+            'nombre': f'Carga {i}', 'email': f'carga{i}@example.com', 'telefono': '5550000', 'estado': 'Activo'})),
+        ('actualizar_recluta', 1, lambda i: ('PUT', f'/api/reclutas/{(i * 7919) % n + 1}', {'notas': f'nota {i}'})),
+    ]
+
+
+class ClienteTest:
+    """Cliente de pruebas de Flask con sesión iniciada"""
+
+    def __init__(self, app, email):
+        self.client = app.test_client()
+        self.peticion('POST', '/api/login', {'email': email, 'password': PASSWORD})
+
+    def peticion(self, metodo, url, cuerpo):
+        r = self.client.open(url, method=metodo, json=cuerpo, headers={'Accept-Encoding': 'gzip'})
+        return r.status_code
+
+
+class ClienteHTTP:
+    """http.client contra el servidor WSGI local, con keep-alive y cookies de sesión"""
+
+    def __init__(self, puerto, email):
+        self.puerto = puerto
+        self.conn = http.client.HTTPConnection('127.0.0.1', puerto, timeout=60)
+        self.cookies = {}
+        self.peticion('POST', '/api/login', {'email': email, 'password': PASSWORD})
+
+    def peticion(self, metodo, url, cuerpo):
+        cabeceras = {'Accept-Encoding': 'gzip'}
+        datos = None
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo).encode()
+            cabeceras['Content-Type'] = 'application/json'
+        if self.cookies:
+            cabeceras['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        try:
+            self.conn.request(metodo, url, body=datos, headers=cabeceras)
+            r = self.conn.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # El servidor cerró la conexión: reabrir y repetir una vez
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.puerto, timeout=60)
+            self.conn.request(metodo, url, body=datos, headers=cabeceras)
+            r = self.conn.getresponse()
+        r.read()
+        for cookie in r.msg.get_all('Set-Cookie') or []:
+            nombre, _, valor = cookie.split(';', 1)[0].partition('=')
+            self.cookies[nombre.strip()] = valor
+        return r.status
+
+
+def iniciar_wsgi(app):
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    servidor = make_server('127.0.0.1', 0, app, threaded=True, request_handler=Handler)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    return servidor
+
+
+def ejecutar_escenario(crear_cliente, generador, peticiones, concurrencia):
+    clientes = [crear_cliente() for _ in range(concurrencia)]
+    latencias = [[] for _ in range(concurrencia)]
+    errores = [0] * concurrencia
+    barrera = threading.Barrier(concurrencia + 1)
+
+    def trabajador(k):
+        cliente = clientes[k]
+        barrera.wait()
+        for i in range(k, peticiones, concurrencia):
+            metodo, url, cuerpo = generador(i)
+            t = time.perf_counter()
+            try:
+                status = cliente.peticion(metodo, url, cuerpo)
+            except Exception:
+                status = 599
+            latencias[k].append((time.perf_counter() - t) * 1000)
+            if status >= 400:
+                errores[k] += 1
+
+    hilos = [threading.Thread(target=trabajador, args=(k,)) for k in range(concurrencia)]
+    for h in hilos:
+        h.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.join()
+    duracion = time.perf_counter() - inicio
+
+    todas = sorted(l for lista in latencias for l in lista)
+    return {
+        'peticiones': len(todas),
+        'errores': sum(errores),
+        'rps': len(todas) / duracion if duracion else 0.0,
+        'p50': percentil(todas, 50),
+        'p95': percentil(todas, 95),
+        'p99': percentil(todas, 99),
+    }
+
+
+# ----- COMPARACIÓN CON BASELINE -----
+
+def comparar(resultados, baseline, tolerancia):
+    """Devuelve la lista de regresiones (p95 más lento o rps menor que la tolerancia)"""
+    regresiones = []
+    for cliente, por_escenario in resultados.items():
+        for nombre, r in por_escenario.items():
+            base = baseline.get(cliente, {}).get(nombre)
+            if not base:
+                continue
+            # Margen absoluto de 1 ms para no fallar por ruido en endpoints muy rápidos
+            if r['p95'] > base['p95'] * (1 + tolerancia) + 1:
+                regresiones.append(f"{cliente}/{nombre}: p95 {r['p95']:.1f} ms (baseline {base['p95']:.1f} ms)")
+            if r['rps'] < base['rps'] * (1 - tolerancia):
+                regresiones.append(f"{cliente}/{nombre}: {r['rps']:.0f} req/s (baseline {base['rps']:.0f} req/s)")
+            if r['errores'] > base.get('errores', 0):
+                regresiones.append(f"{cliente}/{nombre}: {r['errores']} errores (baseline {base.get('errores', 0)})")
+    return regresiones
+
+
+def imprimir(cliente, por_escenario, baseline):
+    print(f"\n[{cliente}]")
+    print(f"{'escenario':<26}{'pet.':>6}{'err.':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Δp95':>8}")
+    print('-' * 82)
+    for nombre, r in por_escenario.items():
+        base = baseline.get(cliente, {}).get(nombre)
+        delta = f"{(r['p95'] / base['p95'] - 1) * 100:+.0f}%" if base and base['p95'] else ''
+        print(f"{nombre:<26}{r['peticiones']:>6}{r['errores']:>6}{r['rps']:>9.1f}"
+              f"{r['p50']:>9.1f}{r['p95']:>9.1f}{r['p99']:>9.1f}{delta:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de la API')
+    parser.add_argument('--escala', type=parse_escala, default=parse_escala('10k'), help='reclutas a sembrar (10k, 100k, 1M)')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--peticiones', type=int, default=200, help='peticiones por escenario')
+    parser.add_argument('--concurrencia', type=int, default=4)
+    parser.add_argument('--cliente', choices=['testclient', 'wsgi', 'ambos'], default='ambos')
+    parser.add_argument('--escenario', action='append', help='ejecutar solo estos escenarios')
+    parser.add_argument('--config', help='config.ini cuyo perfil se quiere medir (por defecto los valores de app.py)')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--guardar-baseline', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='empeoramiento admitido (0.25 = 25%%)')
+    args = parser.parse_args()
+    if args.config:
+        args.config = os.path.abspath(args.config)
+
+    clave = f'escala:{args.escala}'
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    baseline = baselines.get(clave, {})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        app, email = preparar_app(tmp, args)
+        lista = [e for e in escenarios(args.escala, email) if not args.escenario or e[0] in args.escenario]
+
+        clientes = ['testclient', 'wsgi'] if args.cliente == 'ambos' else [args.cliente]
+        resultados = {}
+        for cliente in clientes:
+            servidor = None
+            if cliente == 'wsgi':
+                servidor = iniciar_wsgi(app)
+                crear = lambda: ClienteHTTP(servidor.server_port, email)
+            else:
+                crear = lambda: ClienteTest(app, email)
+
+            resultados[cliente] = {}
+            for nombre, fraccion, generador in lista:
+                peticiones = max(args.concurrencia, int(args.peticiones * fraccion))
+                resultados[cliente][nombre] = ejecutar_escenario(crear, generador, peticiones, args.concurrencia)
+            if servidor is not None:
+                servidor.shutdown()
+            imprimir(cliente, resultados[cliente], baseline)
+
+        os.chdir(RAIZ)
+
+    if args.guardar_baseline:
+        baselines[clave] = resultados
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nBaseline guardado en {args.baseline} ({clave})")
+        return
+
+    if baseline:
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        if regresiones:
+            print("\nREGRESIÓN:")
+            for r in regresiones:
+                print(f"  {r}")
+            sys.exit(1)
+        print(f"\nSin regresiones respecto al baseline ({clave}, tolerancia {args.tolerancia:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark de compresión de respuestas JSON.
+
+Mide el coste de CPU frente a los bytes ahorrados con gzip y brotli sobre
+cargas representativas de /api/reclutas (páginas de 10 y 50 elementos) y de
+una exportación completa.
+
+Uso:
+    python benchmarks/bench_compression.py [--repeticiones N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compression import brotli, gzip_bytes, brotli_bytes, gzip_stream  # noqa: E402
+
+ESTADOS = ['Activo', 'En proceso', 'Rechazado']
+PUESTOS = ['Vendedor', 'Supervisor', 'Gerente', 'Analista', 'Operador']
+PALABRAS = ('candidato entrevista experiencia ventas disponibilidad horario '
+            'referencia salario turno zona capacitación documentos seguimiento').split()
+
+
+def generar_recluta(rng, i):
+    notas = ' '.join(rng.choice(PALABRAS) for _ in range(rng.randint(0, 120)))
+    return {
+        'id': i,
+        'nombre': f'Recluta {i}',
+        'email': f'recluta{i}@example.com',
+        'telefono': f'55{rng.randint(10000000, 99999999)}',
+        'estado': rng.choice(ESTADOS),
+        'puesto': rng.choice(PUESTOS),
+        'notas': notas,
+        'foto_url': f'static/uploads/recluta/foto_{i:06d}.jpg',
+        'fecha_registro': '2024-01-15 10:30:00',
+        'last_updated': '2024-02-01 09:00:00',
+    }
+
+
+def generar_payload(n, rng):
+    reclutas = [generar_recluta(rng, i) for i in range(1, n + 1)]
+    return json.dumps({'reclutas': reclutas, 'total': n, 'paginas': 1, 'pagina_actual': 1}).encode('utf-8')
+
+
+def medir(funcion, data, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        salida = funcion(data)
+    duracion = (time.perf_counter() - inicio) / repeticiones
+    return duracion, len(salida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de compresión de respuestas JSON')
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    tamanos = [('pagina_10', 10), ('pagina_50', 50), ('export_1000', 1000), ('export_10000', 10000)]
+
+    codecs = [
+        ('gzip-1', lambda d: gzip_bytes(d, 1)),
+        ('gzip-6', lambda d: gzip_bytes(d, 6)),
+        ('gzip-9', lambda d: gzip_bytes(d, 9)),
+        ('gzip-6-stream', lambda d: b''.join(gzip_stream((d[i:i + 8192] for i in range(0, len(d), 8192)), 6))),
+    ]
+    if brotli is not None:
+        codecs += [
+            ('br-4', lambda d: brotli_bytes(d, 4)),
+            ('br-11', lambda d: brotli_bytes(d, 11)),
+        ]
+    else:
+        print('brotli no instalado: se omiten los codecs br-*')
+
+    print(f"{'payload':<14}{'codec':<15}{'original':>10}{'comprimido':>12}{'ratio':>8}{'ms/op':>10}{'MB/s':>9}")
+    print('-' * 78)
+    for nombre, n in tamanos:
+        data = generar_payload(n, rng)
+        repeticiones = max(1, args.repeticiones // max(1, n // 100))
+        for codec, funcion in codecs:
+            duracion, comprimido = medir(funcion, data, repeticiones)
+            ratio = comprimido / len(data)
+            mbps = len(data) / duracion / 1e6 if duracion else float('inf')
+            print(f"{nombre:<14}{codec:<15}{len(data):>10}{comprimido:>12}{ratio:>8.2f}{duracion * 1000:>10.3f}{mbps:>9.1f}")
+        print('-' * 78)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark de group commit: escrituras por segundo con 1, 8 y 32 clientes
+concurrentes, con commits individuales y con el hilo escritor agrupado.
+
+Cada configuración se ejecuta en un subproceso con su propio config.ini y una
+base de datos temporal, usando el cliente de pruebas de Flask contra
+PUT /api/reclutas/<id>.
+
+Uso:
+    python benchmarks/bench_group_commit.py [--segundos 5] [--synchronous FULL]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CLIENTES = (1, 8, 32)
+
+CONFIG_TEMPLATE = """[DEFAULT]
+secret_key = bench
+database_uri = sqlite:///{db_path}
+upload_folder = {tmp}/uploads
+debug = False
+
+[SECURITY]
+allowed_ips = 127.0.0.1
+
+[DATABASE]
+synchronous = {synchronous}
+maintenance_interval = 0
+group_commit = {group_commit}
+group_commit_window_ms = {window}
+
+[READ_REPLICA]
+mode = off
+"""
+
+
+def ejecutar_modo(clientes, segundos):
+    """Se ejecuta dentro del subproceso ya configurado"""
+    sys.path.insert(0, RAIZ)
+    from app import bootstrap, create_app
+    from models import db, Recluta, Usuario
+
+    bootstrap()
+    app = create_app()
+
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        usuario = Usuario.query.first()
+        usuario.password = 'benchmark123'
+        email = usuario.email
+        db.session.add_all([
+            Recluta(nombre=f'Recluta {i}', email=f'r{i}@example.com', telefono='5550000', estado='Activo')
+            for i in range(500)
+        ])
+        db.session.commit()
+
+    contadores = []
+    lock = threading.Lock()
+    listos = threading.Barrier(clientes + 1)
+
+    def cliente(n):
+        c = app.test_client()
+        c.post('/api/login', json={'email': email, 'password': 'benchmark123'})
+        ops = errores = 0
+        listos.wait()
+        fin = time.perf_counter() + segundos
+        while time.perf_counter() < fin:
+            r = c.put(f'/api/reclutas/{(ops * 31 + n) % 500 + 1}', json={'notas': f'nota {ops}'})
+            if r.status_code == 200:
+                ops += 1
+            else:
+                errores += 1
+        with lock:
+            contadores.append((ops, errores))
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    for h in hilos:
+        h.start()
+    listos.wait()
+    for h in hilos:
+        h.join()
+
+    gc = app.extensions['group_commit']
+    return {
+        'escrituras_s': sum(o for o, _ in contadores) / segundos,
+        'errores': sum(e for _, e in contadores),
+        'lotes': gc.stats['lotes'],
+        'unidades': gc.stats['unidades'],
+    }
+
+
+def lanzar(group_commit, clientes, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, 'config.ini')
+        with open(config_path, 'w') as f:
+            f.write(CONFIG_TEMPLATE.format(
+                db_path=os.path.join(tmp, 'bench.db'), tmp=tmp, synchronous=args.synchronous,
+                group_commit=group_commit, window=args.ventana
+            ))
+        env = dict(os.environ, CONFIG_FILE=config_path)
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--hijo', str(clientes), '--segundos', str(args.segundos)],
+            cwd=tmp, env=env, capture_output=True, text=True, check=True
+        )
+        return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de group commit')
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--synchronous', default='FULL')
+    parser.add_argument('--ventana', type=float, default=2, help='ventana de agrupación en ms')
+    parser.add_argument('--hijo', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(ejecutar_modo(args.hijo, args.segundos)))
+        return
+
+    print(f"synchronous={args.synchronous}, ventana={args.ventana} ms")
+    print(f"{'modo':<14}{'clientes':>9}{'escrituras/s':>14}{'errores':>9}{'unid/lote':>11}")
+    print('-' * 57)
+    for group_commit in (False, True):
+        for clientes in CLIENTES:
+            r = lanzar(group_commit, clientes, args)
+            por_lote = r['unidades'] / r['lotes'] if r['lotes'] else 1
+            modo = 'group-commit' if group_commit else 'individual'
+            print(f"{modo:<14}{clientes:>9}{r['escrituras_s']:>14.0f}{r['errores']:>9}{por_lote:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
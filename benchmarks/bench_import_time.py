@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tiempo de arranque con ``python -X importtime``.
+
+Mide, en un intérprete limpio, lo que cuesta importar app.py, crear la
+aplicación mínima, importar admin_tools.py (que la crea) y crear la
+aplicación completa. Sirve como prueba de regresión: termina con código 1 si
+alguno de los escenarios importa un módulo pesado que debería cargarse bajo
+demanda (por ejemplo Pillow), si ``import app``, la aplicación mínima o
+admin_tools.py cargan las rutas o Flask-Login/Flask-WTF, o si supera el
+presupuesto de milisegundos indicado. tests/test_import_time.py comprueba
+los módulos en cada ejecución de pytest.
+
+Uso:
+    python benchmarks/bench_import_time.py [--repeticiones 5] [--max-ms 800] [--top 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Módulos que no deben cargarse al arrancar (se importan en la primera petición que los usa)
+PROHIBIDOS = ('PIL',)
+
+# Módulos que solo necesita la aplicación completa (create_app los importa sin minimal)
+SOLO_COMPLETA = PROHIBIDOS + (
+    'views', 'flask_wtf', 'flask_login', 'compression', 'group_commit', 'ip_allowlist',
+    'slow_queries', 'profiling', 'janitor', 'reminders', 'mail_queue', 'change_feed', 'delta_sync',
+    'batch', 'file_cleanup', 'fieldsets', 'archivo',
+)
+
+# admin_tools.py importa las extensiones de sus comandos, pero no las rutas ni el login
+SOLO_WEB = PROHIBIDOS + ('views', 'flask_wtf', 'flask_login', 'change_feed', 'profiling')
+
+# (nombre, código, módulos que no puede importar)
+ESCENARIOS = (
+    ('import app', 'import app', SOLO_COMPLETA),
+    ('create_app(minimal)', 'import app; app.create_app(minimal=True)', SOLO_COMPLETA),
+    ('import admin_tools', 'import admin_tools', SOLO_WEB),
+    ('create_app()', 'import app; app.create_app()', PROHIBIDOS),
+)
+
+PLANTILLA = """import time
+_t = time.perf_counter()
+{codigo}
+print(f"TOTAL_MS {{(time.perf_counter() - _t) * 1000:.3f}}")
+"""
+
+
+def parse_importtime(stderr):
+    """Devuelve {módulo: (propio_us, acumulado_us, nivel)} a partir de la salida de -X importtime"""
+    modulos = {}
+    for linea in stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        try:
+            propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        except ValueError:
+            continue
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        modulos[nombre.strip()] = (int(propio), int(acumulado), nivel)
+    return modulos
+
+
+def medir(codigo, tmp):
+    env = dict(os.environ, PYTHONPATH=RAIZ, CONFIG_FILE=os.path.join(tmp, 'config.ini'))
+    salida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PLANTILLA.format(codigo=codigo)],
+        cwd=tmp, env=env, capture_output=True, text=True, check=True
+    )
+    total = next(float(l.split()[1]) for l in salida.stdout.splitlines() if l.startswith('TOTAL_MS'))
+    return total, parse_importtime(salida.stderr)
+
+
+def cargados(modulos, prohibidos):
+    """Módulos de ``prohibidos`` (o submódulos suyos) que aparecen en ``modulos``"""
+    return sorted(m for m in modulos if any(m == p or m.startswith(p + '.') for p in prohibidos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de tiempo de arranque')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=0, help='presupuesto por escenario (0 = sin límite)')
+    parser.add_argument('--top', type=int, default=10, help='módulos más costosos a mostrar')
+    args = parser.parse_args()
+
+    fallos = []
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'escenario':<22}{'mediana ms':>12}{'mín ms':>10}{'módulos':>10}")
+        print('-' * 54)
+        detalles = {}
+        for nombre, codigo, prohibidos in ESCENARIOS:
+            tiempos = []
+            for _ in range(args.repeticiones):
+                total, modulos = medir(codigo, tmp)
+                tiempos.append(total)
+            mediana = statistics.median(tiempos)
+            detalles[nombre] = modulos
+            print(f"{nombre:<22}{mediana:>12.1f}{min(tiempos):>10.1f}{len(modulos):>10}")
+
+            indebidos = cargados(modulos, prohibidos)
+            if indebidos:
+                fallos.append(f"{nombre}: importa {', '.join(indebidos[:3])}")
+            if args.max_ms and mediana > args.max_ms:
+                fallos.append(f"{nombre}: {mediana:.1f} ms > {args.max_ms:.1f} ms")
+
+        # Importaciones directas de app.py ordenadas por coste acumulado
+        print("\nImportaciones más costosas de app.py:")
+        directas = [(m, a) for m, (_, a, nivel) in detalles[ESCENARIOS[0][0]].items() if nivel == 1]
+        for modulo, acumulado in sorted(directas, key=lambda x: -x[1])[:args.top]:
+            print(f"  {modulo:<40}{acumulado / 1000:>10.1f} ms")
+
+    if fallos:
+        print("\nREGRESIÓN:")
+        for fallo in fallos:
+            print(f"  {fallo}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
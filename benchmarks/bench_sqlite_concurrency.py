@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concurrencia de SQLite: configuración por defecto frente al
+perfil de la sección [DATABASE] (WAL, synchronous=NORMAL, busy_timeout...).
+
+Lanza varios hilos escritores y lectores contra una base de datos temporal y
+cuenta operaciones por segundo y errores "database is locked".
+
+Uso:
+    python benchmarks/bench_sqlite_concurrency.py [--escritores 4] [--lectores 8] [--segundos 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from sqlite_tuning import DEFAULT_PRAGMAS, install_pragmas  # noqa: E402
+
+PERFIL_POR_DEFECTO = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'cache_size': -2000,
+    'mmap_size': 0,
+    'temp_store': 'DEFAULT',
+    'busy_timeout': 0,
+    'foreign_keys': False,
+}
+
+
+def preparar_bd(ruta, filas=2000):
+    engine = create_engine(f'sqlite:///{ruta}')
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE recluta (id INTEGER PRIMARY KEY, nombre TEXT, estado TEXT, notas TEXT)"
+        ))
+        conn.execute(
+            text("INSERT INTO recluta (nombre, estado, notas) VALUES (:n, :e, :t)"),
+            [{'n': f'Recluta {i}', 'e': 'Activo', 't': 'x' * 200} for i in range(filas)]
+        )
+    engine.dispose()
+
+
+def ejecutar(ruta, pragmas, escritores, lectores, segundos):
+    engine = create_engine(f'sqlite:///{ruta}', pool_size=escritores + lectores, max_overflow=0)
+    install_pragmas(engine, pragmas)
+
+    contadores = {'escrituras': 0, 'lecturas': 0, 'bloqueos': 0}
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def escritor(n):
+        ops = bloqueos = 0
+        while time.perf_counter() < fin:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        text("UPDATE recluta SET estado = :e WHERE id = :id"),
+                        {'e': 'En proceso', 'id': (ops * 7 + n) % 2000 + 1}
+                    )
+                ops += 1
+            except OperationalError:
+                bloqueos += 1
+        with lock:
+            contadores['escrituras'] += ops
+            contadores['bloqueos'] += bloqueos
+
+    def lector():
+        ops = bloqueos = 0
+        while time.perf_counter() < fin:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT estado, COUNT(*) FROM recluta GROUP BY estado")).fetchall()
+                ops += 1
+            except OperationalError:
+                bloqueos += 1
+        with lock:
+            contadores['lecturas'] += ops
+            contadores['bloqueos'] += bloqueos
+
+    hilos = [threading.Thread(target=escritor, args=(i,)) for i in range(escritores)]
+    hilos += [threading.Thread(target=lector) for _ in range(lectores)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    engine.dispose()
+
+    return {k: v / segundos if k != 'bloqueos' else v for k, v in contadores.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concurrencia de SQLite')
+    parser.add_argument('--escritores', type=int, default=4)
+    parser.add_argument('--lectores', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'perfil':<12}{'escrituras/s':>14}{'lecturas/s':>12}{'bloqueos':>10}")
+    print('-' * 48)
+    for nombre, pragmas in (('defecto', PERFIL_POR_DEFECTO), ('tuned', DEFAULT_PRAGMAS)):
+        with tempfile.TemporaryDirectory() as tmp:
+            ruta = os.path.join(tmp, 'bench.db')
+            preparar_bd(ruta)
+            r = ejecutar(ruta, pragmas, args.escritores, args.lectores, args.segundos)
+            print(f"{nombre:<12}{r['escrituras']:>14.0f}{r['lecturas']:>12.0f}{r['bloqueos']:>10}")
+
+
+if __name__ == '__main__':
+    main()
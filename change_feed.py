@@ -0,0 +1,330 @@
+"""
+Feed de cambios por Server-Sent Events.
+
+Los handlers de reclutas y entrevistas llaman a ``publicar`` (o a
+``publicar_lote`` en las operaciones por lote) tras confirmar cada cambio; los navegadores conectados a ``GET /api/cambios`` reciben un
+evento compacto y actualizan su tabla sin volver a pedir la lista:
+
+    id: 42
+    event: cambio
+    data: {"entity": "recluta", "id": 7, "op": "update", "last_updated": "..."}
+
+Modos de difusión (``[CHANGE_FEED] relay``):
+    sqlite -- (predeterminado) cada evento se guarda en la tabla
+              ``change_event`` y un hilo por proceso la sondea (consulta por
+              clave primaria) para repartirlo a sus clientes. Los ids son
+              globales, así que un cliente que se reconecta a otro worker
+              continúa donde lo dejó.
+    none   -- pub/sub en memoria del proceso. Solo sirve con un worker: con
+              varios, cada cliente solo ve los cambios hechos en el suyo
+              (serve.py lo avisa al arrancar).
+
+Al reconectar, ``EventSource`` envía ``Last-Event-ID`` y se le reenvía lo que
+se perdió desde el búfer (``buffer`` eventos). Si ya no está disponible, o si
+el cliente es demasiado lento, recibe ``event: reset`` y recarga la lista una
+vez.
+
+Cada conexión ocupa un hilo del worker (gthread) mientras está abierta: se
+limita a ``max_clients`` por proceso y se cierra tras ``max_duration``
+segundos (el navegador reconecta solo). Si su worker lo rechaza (503) varias
+veces seguidas, el navegador sondea ``?updated_since=`` hasta que vuelve a
+conectar.
+"""
+
+import collections
+import itertools
+import json
+import logging
+import queue
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import Response, jsonify, request
+from flask_login import login_required
+
+from models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+_RESET = object()
+
+
+def _formato(evento_id, datos):
+    return f"id: {evento_id}\nevent: cambio\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+class _Poller(threading.Thread):
+    """Reparte a los clientes locales los eventos nuevos de la tabla change_event"""
+
+    def __init__(self, feed):
+        super().__init__(name='change-feed-poller', daemon=True)
+        self.feed = feed
+        self.despertar = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        cursor = None
+        while not self._stop_event.is_set():
+            self.despertar.wait(self.feed.poll_interval)
+            self.despertar.clear()
+            try:
+                with self.feed.app.app_context():
+                    if cursor is None:
+                        cursor = self.feed._ultimo_id()
+                    for fila in self.feed._leer_desde(cursor):
+                        cursor = fila['id']
+                        self.feed._difundir(fila['id'], self.feed._datos(fila))
+            except Exception as e:
+                logger.error(f"Error al leer el feed de cambios: {str(e)}")
+                self._stop_event.wait(self.feed.poll_interval)
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.despertar.set()
+        self.join(timeout)
+
+
+class ChangeFeed:
+    """
+    Extensión del feed de cambios.
+
+    Configuración (app.config):
+        CHANGE_FEED_ENABLED        -- registra /api/cambios
+        CHANGE_FEED_RELAY          -- none o sqlite (ver arriba)
+        CHANGE_FEED_BUFFER         -- eventos que se pueden reenviar al reconectar
+        CHANGE_FEED_MAX_CLIENTS    -- conexiones abiertas por proceso
+        CHANGE_FEED_HEARTBEAT      -- segundos entre comentarios de keep-alive
+        CHANGE_FEED_MAX_DURATION   -- segundos que dura cada conexión
+        CHANGE_FEED_POLL_INTERVAL  -- segundos entre lecturas de change_event (relay sqlite)
+        CHANGE_FEED_RETENTION      -- segundos que se conservan en change_event (tarea del janitor)
+    """
+
+    def __init__(self, app=None, db=None, janitor=None):
+        self.app = None
+        self.db = None
+        self.enabled = False
+        self.relay = 'none'
+        self.buffer = 1000
+        self.max_clients = 2
+        self.heartbeat = 15
+        self.max_duration = 300
+        self.poll_interval = 1.0
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        self._poller = None
+        # Modo none: ids "<instancia>-<n>" para detectar reconexiones a otro proceso
+        self._instancia = secrets.token_hex(4)
+        self._contador = itertools.count(1)
+        self._recientes = collections.deque(maxlen=self.buffer)
+        if app is not None:
+            self.init_app(app, db, janitor)
+
+    def init_app(self, app, db, janitor=None):
+        self.app = app
+        self.db = db
+        self.enabled = app.config.get('CHANGE_FEED_ENABLED', True)
+        self.relay = app.config.get('CHANGE_FEED_RELAY', 'sqlite')
+        if self.relay not in ('none', 'sqlite'):
+            raise ValueError(f"[CHANGE_FEED] relay no válido: {self.relay}")
+        self.buffer = app.config.get('CHANGE_FEED_BUFFER', 1000)
+        self.max_clients = app.config.get('CHANGE_FEED_MAX_CLIENTS', 2)
+        self.heartbeat = app.config.get('CHANGE_FEED_HEARTBEAT', 15)
+        self.max_duration = app.config.get('CHANGE_FEED_MAX_DURATION', 300)
+        self.poll_interval = app.config.get('CHANGE_FEED_POLL_INTERVAL', 1.0)
+        self.retention = app.config.get('CHANGE_FEED_RETENTION', 3600)
+        self._recientes = collections.deque(maxlen=self.buffer)
+        app.extensions['change_feed'] = self
+        if not self.enabled:
+            return
+
+        app.add_url_rule('/api/cambios', 'cambios', login_required(self.vista))
+        if self.relay == 'sqlite' and janitor is not None:
+            janitor.add_job('change_feed', max(60, self.retention // 4), self._purgar)
+
+    # ----- Publicación -----
+
+    def publicar(self, entity, entity_id, op, last_updated=None):
+        """Anuncia un cambio ya confirmado (op: create, update o delete)"""
+        self.publicar_lote([(entity, entity_id, op, last_updated)])
+
+    def publicar_lote(self, eventos):
+        """
+        Anuncia varios cambios ya confirmados, ``(entity, entity_id, op,
+        last_updated)``. Con relay sqlite se guardan con un único INSERT
+        (executemany) y una sola transacción, no una por evento.
+        """
+        if not self.enabled or not eventos:
+            return
+        eventos = [(entity, entity_id, op, last_updated.isoformat() if isinstance(last_updated, datetime) else last_updated)
+                   for entity, entity_id, op, last_updated in eventos]
+        if self.relay == 'sqlite':
+            ahora = datetime.utcnow()
+            try:
+                with self.db.engine.begin() as conn:
+                    conn.execute(sa.insert(ChangeEvent.__table__), [
+                        {'entity': entity, 'entity_id': entity_id, 'op': op, 'last_updated': last_updated, 'ts': ahora}
+                        for entity, entity_id, op, last_updated in eventos
+                    ])
+            except Exception as e:
+                # Los cambios ya están confirmados: los clientes los verán en su próxima recarga
+                logger.error(f"Error al publicar {len(eventos)} cambios ({eventos[0][0]} {eventos[0][1]}...): {str(e)}")
+                return
+            if self._poller is not None:
+                self._poller.despertar.set()
+            return
+
+        for entity, entity_id, op, last_updated in eventos:
+            datos = {'entity': entity, 'id': entity_id, 'op': op, 'last_updated': last_updated}
+            evento_id = f"{self._instancia}-{next(self._contador)}"
+            with self._lock:
+                self._recientes.append((evento_id, datos))
+            self._difundir(evento_id, datos)
+
+    def _difundir(self, evento_id, datos):
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for cola in suscriptores:
+            try:
+                cola.put_nowait((evento_id, datos))
+            except queue.Full:
+                # Cliente demasiado lento: se le pide recargar y se le desconecta
+                self._desuscribir(cola)
+                while True:
+                    try:
+                        cola.get_nowait()
+                    except queue.Empty:
+                        break
+                cola.put_nowait(_RESET)
+
+    # ----- Relay por SQLite -----
+
+    @staticmethod
+    def _datos(fila):
+        return {'entity': fila['entity'], 'id': fila['entity_id'], 'op': fila['op'],
+                'last_updated': fila['last_updated']}
+
+    def _ultimo_id(self):
+        with self.db.engine.connect() as conn:
+            return conn.execute(sa.select(sa.func.max(ChangeEvent.__table__.c.id))).scalar() or 0
+
+    def _leer_desde(self, desde, limite=500):
+        t = ChangeEvent.__table__
+        with self.db.engine.connect() as conn:
+            return conn.execute(sa.select(t).where(t.c.id > desde).order_by(t.c.id).limit(limite)).mappings().all()
+
+    def _purgar(self, janitor):
+        from janitor import borrar_por_lotes
+        t = ChangeEvent.__table__
+        limite = datetime.utcnow() - timedelta(seconds=self.retention)
+        return borrar_por_lotes(self.db.engine, t, t.c.ts < limite, janitor.batch_size, janitor.batch_pause)
+
+    # ----- Reenvío al reconectar -----
+
+    def _pendientes(self, ultimo):
+        """Eventos posteriores a ``ultimo`` o None si ya no se pueden reconstruir"""
+        if not ultimo:
+            return []
+        if self.relay == 'sqlite':
+            try:
+                desde = int(ultimo)
+            except ValueError:
+                return None
+            filas = self._leer_desde(desde, self.buffer + 1)
+            if len(filas) > self.buffer or self._purgado(desde):
+                return None
+            return [(fila['id'], self._datos(fila)) for fila in filas]
+
+        with self._lock:
+            recientes = list(self._recientes)
+        ids = [evento_id for evento_id, _ in recientes]
+        if ultimo not in ids:
+            # Otro proceso, o demasiado antiguo
+            return None
+        return recientes[ids.index(ultimo) + 1:]
+
+    def _purgado(self, desde):
+        """True si el janitor ya borró eventos posteriores a ``desde``"""
+        with self.db.engine.connect() as conn:
+            minimo = conn.execute(sa.select(sa.func.min(ChangeEvent.__table__.c.id))).scalar()
+        return minimo is not None and minimo > desde + 1
+
+    # ----- Vista SSE -----
+
+    def vista(self):
+        """GET /api/cambios: flujo text/event-stream"""
+        cola = queue.Queue(maxsize=self.buffer)
+        with self._lock:
+            if len(self._suscriptores) >= self.max_clients:
+                return jsonify({"error": "Demasiadas conexiones al feed de cambios"}), 503
+            self._suscriptores.add(cola)
+
+        ultimo = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            pendientes = self._pendientes(ultimo)
+        except Exception:
+            self._desuscribir(cola)
+            raise
+        heartbeat = self.heartbeat
+        fin = time.monotonic() + self.max_duration
+        # Lo que llegue por la cola y ya se haya enviado desde el búfer se descarta
+        enviados = {evento_id for evento_id, _ in pendientes or ()}
+        if self.relay == 'sqlite':
+            tope = max(enviados, default=int(ultimo) if ultimo and ultimo.isdigit() else 0)
+        else:
+            tope = None
+
+        def stream():
+            try:
+                yield "retry: 3000\n\n"
+                if pendientes is None:
+                    yield "event: reset\ndata: {}\n\n"
+                else:
+                    for evento_id, datos in pendientes:
+                        yield _formato(evento_id, datos)
+                while True:
+                    restante = fin - time.monotonic()
+                    if restante <= 0:
+                        return
+                    try:
+                        evento = cola.get(timeout=min(heartbeat, restante))
+                    except queue.Empty:
+                        yield ": ping\n\n"
+                        continue
+                    if evento is _RESET:
+                        yield "event: reset\ndata: {}\n\n"
+                        return
+                    evento_id, datos = evento
+                    if evento_id in enviados or (tope is not None and evento_id <= tope):
+                        continue
+                    yield _formato(evento_id, datos)
+            finally:
+                self._desuscribir(cola)
+
+        return Response(stream(), content_type='text/event-stream; charset=utf-8',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def _desuscribir(self, cola):
+        with self._lock:
+            self._suscriptores.discard(cola)
+
+    # ----- Hilo -----
+
+    def start(self):
+        if not self.enabled or self.relay != 'sqlite' or self._poller is not None:
+            return
+        self._poller = _Poller(self)
+        self._poller.start()
+
+    def stop(self):
+        if self._poller is not None:
+            self._poller.stop(timeout=5)
+            self._poller = None
+
+    def after_fork(self):
+        self._poller = None
+        with self._lock:
+            self._suscriptores.clear()
+        self.start()
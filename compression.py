@@ -0,0 +1,182 @@
+"""
+Compresión negociada de respuestas (gzip / brotli).
+
+Se registra como un hook ``after_request`` sobre la aplicación Flask y
+comprime las respuestas de tipos textuales (JSON principalmente) que superen
+un umbral de tamaño configurable. Las respuestas en streaming (exportaciones)
+se comprimen bloque a bloque sin cargarlas completas en memoria.
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli  # Opcional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Tipos MIME que vale la pena comprimir
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'text/css',
+    'application/javascript',
+    'text/event-stream',
+)
+
+# Contenido que ya viene comprimido: nunca se vuelve a comprimir
+ALREADY_COMPRESSED_PREFIXES = ('image/', 'video/', 'audio/')
+ALREADY_COMPRESSED_TYPES = {
+    'application/zip',
+    'application/gzip',
+    'application/x-gzip',
+    'application/zstd',
+    'application/x-7z-compressed',
+    'application/pdf',
+}
+
+
+def gzip_bytes(data, level=6):
+    """Comprime un bloque de bytes completo con gzip"""
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data, quality=4):
+    """Comprime un bloque de bytes completo con brotli"""
+    return brotli.compress(data, quality=quality)
+
+
+def gzip_stream(chunks, level=6):
+    """Comprime un iterable de bloques con gzip, emitiendo a medida que avanza"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        # Vaciar en cada bloque para que el cliente reciba datos progresivamente
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush(zlib.Z_FINISH)
+
+
+def brotli_stream(chunks, quality=4):
+    """Comprime un iterable de bloques con brotli, emitiendo a medida que avanza"""
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class Compression:
+    """
+    Extensión de compresión de respuestas.
+
+    Configuración (app.config):
+        COMPRESS_ENABLED      -- activa o desactiva la compresión
+        COMPRESS_MIN_SIZE     -- tamaño mínimo en bytes para comprimir
+        COMPRESS_LEVEL        -- nivel de gzip (1-9)
+        COMPRESS_BR_QUALITY   -- calidad de brotli (0-11)
+        COMPRESS_MIMETYPES    -- tipos MIME comprimibles
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BR_QUALITY', 4)
+        app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+        app.after_request(self.after_request)
+        app.extensions['compression'] = self
+
+    @staticmethod
+    def choose_encoding(accept_encodings):
+        """Elige la mejor codificación soportada según Accept-Encoding"""
+        candidatos = []
+        if brotli is not None:
+            candidatos.append('br')
+        candidatos.append('gzip')
+
+        mejor, mejor_q = None, 0
+        for encoding in candidatos:
+            q = accept_encodings.quality(encoding)
+            # En caso de empate gana el primero (brotli)
+            if q > mejor_q:
+                mejor, mejor_q = encoding, q
+        return mejor
+
+    @staticmethod
+    def is_compressible(mimetype, allowed):
+        if not mimetype:
+            return False
+        if mimetype.startswith(ALREADY_COMPRESSED_PREFIXES) or mimetype in ALREADY_COMPRESSED_TYPES:
+            return False
+        return mimetype in allowed
+
+    def after_request(self, response):
+        from flask import current_app
+        cfg = current_app.config
+
+        if not cfg['COMPRESS_ENABLED']:
+            return response
+
+        # Solo respuestas exitosas, sin codificación previa ni rangos parciales
+        if (response.status_code < 200 or response.status_code >= 300
+                or response.status_code in (204, 206)
+                or 'Content-Encoding' in response.headers
+                or request.method == 'HEAD'):
+            return response
+
+        if not self.is_compressible(response.mimetype, cfg['COMPRESS_MIMETYPES']):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            # Exportaciones y flujos: comprimir bloque a bloque
+            if encoding == 'br':
+                stream = brotli_stream(response.response, cfg['COMPRESS_BR_QUALITY'])
+            else:
+                stream = gzip_stream(response.response, cfg['COMPRESS_LEVEL'])
+            response.response = stream
+            response.headers.pop('Content-Length', None)
+        else:
+            # send_file y similares usan direct_passthrough; no se tocan
+            if response.direct_passthrough:
+                return response
+
+            data = response.get_data()
+            if len(data) < cfg['COMPRESS_MIN_SIZE']:
+                return response
+
+            if encoding == 'br':
+                comprimido = brotli_bytes(data, cfg['COMPRESS_BR_QUALITY'])
+            else:
+                comprimido = gzip_bytes(data, cfg['COMPRESS_LEVEL'])
+            response.set_data(comprimido)
+
+        response.headers['Content-Encoding'] = encoding
+
+        # La representación cambió: el ETag fuerte ya no es válido tal cual
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f"{etag}-{encoding}")
+
+        return response
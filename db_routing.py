@@ -0,0 +1,275 @@
+"""
+Enrutado de lecturas y escrituras entre engines.
+
+Las peticiones GET/HEAD y los comandos de informes leen de un engine de solo
+lectura (bind ``__read__``) con su propio pool; todo lo que escribe (flush,
+INSERT/UPDATE/DELETE) va siempre al engine principal.
+
+Modos del engine de lectura (sección [READ_REPLICA]):
+    readonly  -- segunda conexión al mismo archivo SQLite abierta con mode=ro
+    snapshot  -- copia del archivo refrescada periódicamente (API de backup)
+    off       -- sin enrutado, todo va al principal
+
+Garantías de consistencia:
+    * Dentro de una petición, después del primer flush todas las lecturas van
+      al principal (se leen las propias escrituras).
+    * Tras una petición que modifica datos, el mismo cliente lee del principal
+      durante ``read_after_write`` segundos (marca en la sesión de Flask).
+    * La cabecera ``X-Read-Primary: 1`` fuerza lecturas del principal.
+    * En modo snapshot, si la copia tiene más de ``max_staleness`` segundos se
+      lee del principal hasta el siguiente refresco.
+"""
+
+import contextlib
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+
+logger = logging.getLogger(__name__)
+
+READ_BIND_KEY = '__read__'
+READ_METHODS = {'GET', 'HEAD'}
+
+# 'read', 'primary' o None (sin preferencia = principal)
+_route = contextvars.ContextVar('db_route', default=None)
+
+
+def read_bind_options(app_config, primary_uri, instance_path):
+    """
+    Construye las opciones del bind de lectura a partir de la configuración.
+    Devuelve None si el enrutado está desactivado.
+    """
+    mode = app_config.get('READ_REPLICA_MODE', 'off')
+    if mode == 'off':
+        return None
+
+    url = app_config.get('READ_REPLICA_URL')
+    if not url:
+        primary = sa.engine.make_url(primary_uri)
+        if not primary.drivername.startswith('sqlite') or primary.database in (None, '', ':memory:'):
+            logger.warning("Réplica de lectura desactivada: solo se deriva automáticamente para SQLite en archivo")
+            return None
+
+        if mode == 'snapshot':
+            database = app_config.get('READ_REPLICA_SNAPSHOT_PATH', 'database_snapshot.db')
+        else:
+            database = primary.database
+
+        if not os.path.isabs(database):
+            database = os.path.join(instance_path, database)
+        url = f"sqlite:///file:{database}?mode=ro&uri=true"
+
+    return {
+        'url': url,
+        'pool_size': app_config.get('READ_REPLICA_POOL_SIZE', 10),
+        'max_overflow': app_config.get('READ_REPLICA_MAX_OVERFLOW', 10),
+        'pool_pre_ping': False,
+    }
+
+
+class RoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que envía las lecturas al bind ``__read__``"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._use_read_engine(clause):
+            engine = self._db.engines.get(READ_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_read_engine(self, clause):
+        if _route.get() != 'read':
+            return False
+        # Leer las propias escrituras
+        if self.info.get('wrote'):
+            return False
+        if clause is not None and getattr(clause, 'is_dml', False):
+            return False
+        router = current_app.extensions.get('db_routing') if has_app_context() else None
+        return router is not None and router.is_fresh()
+
+
+@sa.event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session, flush_context):
+    session.info['wrote'] = True
+
+
+@contextlib.contextmanager
+def use_read_replica():
+    """Contexto para comandos de informes: las lecturas van al engine de lectura"""
+    token = _route.set('read')
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Contexto que fuerza todas las consultas al engine principal"""
+    token = _route.set('primary')
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+class ReadRouter:
+    """
+    Extensión que decide por petición qué engine usar y, en modo snapshot,
+    mantiene la copia de lectura al día.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = db
+        self.mode = 'off'
+        self.max_staleness = 60
+        self.read_after_write = 5
+        self.last_refresh = None
+        self._refresher = None
+        self._refresher_app = None
+        self._refresh_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db, background=True):
+        """
+        Con ``background=False`` (comandos de consola) no se refresca el
+        snapshot ni se arranca el hilo: se usa la copia existente según su
+        fecha de modificación.
+        """
+        self.db = db
+        self.mode = app.config.get('READ_REPLICA_MODE', 'off')
+        self.max_staleness = app.config.get('READ_REPLICA_MAX_STALENESS', 60)
+        self.read_after_write = app.config.get('READ_REPLICA_READ_AFTER_WRITE', 5)
+
+        if READ_BIND_KEY not in app.config.get('SQLALCHEMY_BINDS', {}):
+            self.mode = 'off'
+        app.extensions['db_routing'] = self
+
+        if self.mode == 'off':
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        if self.mode == 'snapshot':
+            if not background:
+                with app.app_context():
+                    self.last_refresh = self._snapshot_mtime()
+                return
+            with app.app_context():
+                self.refresh_snapshot()
+            self._refresher_app = app
+            self._refresher_interval = app.config.get('READ_REPLICA_SNAPSHOT_INTERVAL', 30)
+            self._refresher = SnapshotRefresher(app, self, self._refresher_interval)
+            self._refresher.start()
+
+    def stop_refresher(self):
+        if self._refresher is not None:
+            self._refresher.stop()
+            self._refresher = None
+
+    def after_fork(self):
+        """En un proceso hijo el hilo de refresco no existe: arrancar uno propio"""
+        if self._refresher_app is not None:
+            self._refresher = SnapshotRefresher(self._refresher_app, self, self._refresher_interval)
+            self._refresher.start()
+
+    def is_fresh(self):
+        """Indica si el engine de lectura está dentro del límite de desfase"""
+        if self.mode == 'readonly':
+            return True
+        if self.mode == 'snapshot':
+            return self.last_refresh is not None and time.time() - self.last_refresh <= self.max_staleness
+        return False
+
+    def staleness(self):
+        """Segundos de desfase del engine de lectura (0 si lee el archivo principal)"""
+        if self.mode == 'snapshot':
+            return time.time() - self.last_refresh if self.last_refresh else None
+        return 0
+
+    def _snapshot_path(self):
+        snapshot_path = self.db.engines[READ_BIND_KEY].url.database
+        if snapshot_path.startswith('file:'):
+            snapshot_path = snapshot_path[5:]
+        return snapshot_path
+
+    def _snapshot_mtime(self):
+        try:
+            return os.path.getmtime(self._snapshot_path())
+        except OSError:
+            return None
+
+    def refresh_snapshot(self):
+        """Copia la base principal en el archivo snapshot usando la API de backup"""
+        primary_path = self.db.engines[None].url.database
+        snapshot_path = self._snapshot_path()
+        tmp_path = f"{snapshot_path}.tmp"
+
+        with self._refresh_lock:
+            inicio = time.perf_counter()
+            origen = sqlite3.connect(primary_path)
+            destino = sqlite3.connect(tmp_path)
+            try:
+                origen.backup(destino, pages=1024)
+            finally:
+                destino.close()
+                origen.close()
+            os.replace(tmp_path, snapshot_path)
+            # Las conexiones del pool apuntan al archivo anterior
+            self.db.engines[READ_BIND_KEY].dispose()
+            self.last_refresh = time.time()
+            logger.info(f"Snapshot de lectura refrescado en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    def _before_request(self):
+        if request.method not in READ_METHODS:
+            return
+        if request.headers.get('X-Read-Primary') == '1':
+            return
+        if session.get('_primary_until', 0) > time.time():
+            return
+        g._db_route_token = _route.set('read')
+
+    def _after_request(self, response):
+        # Tras escribir, este cliente lee del principal durante un tiempo
+        if (request.method not in READ_METHODS and response.status_code < 400
+                and self.read_after_write > 0):
+            session['_primary_until'] = time.time() + self.read_after_write
+        return response
+
+    def _teardown_request(self, exc):
+        token = g.pop('_db_route_token', None)
+        if token is not None:
+            _route.reset(token)
+
+
+class SnapshotRefresher(threading.Thread):
+    """Hilo que refresca el snapshot de lectura cada ``interval`` segundos"""
+
+    def __init__(self, app, router, interval):
+        super().__init__(name='read-snapshot', daemon=True)
+        self.app = app
+        self.router = router
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.router.refresh_snapshot()
+            except Exception as e:
+                logger.error(f"Error al refrescar el snapshot de lectura: {str(e)}")
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,169 @@
+"""
+Sincronización incremental: "qué ha cambiado desde T".
+
+Los listados de reclutas y entrevistas aceptan ``?updated_since=<marca>`` y
+devuelven solo las filas con ``last_updated`` posterior (por el índice de esa
+columna) y los ids borrados desde entonces:
+
+    {"reclutas": [...], "eliminados": [3, 9], "hasta": "<marca>", "hay_mas": false}
+
+``hasta`` es la marca para la siguiente llamada. Si ``hay_mas`` es true se
+cortó en ``[DELTA_SYNC] max_items`` filas y la marca lleva también el id de
+la última (``<fecha>~<id>``) para continuar sin perder ni repetir empates. Los
+listados normales también devuelven ``hasta``: un cliente nuevo pagina la
+lista completa y guarda la marca de la primera página.
+
+La marca nunca pasa de ``ahora - margin`` segundos: una transacción que puso
+``last_updated`` y aún no ha confirmado no queda por detrás de la marca. Los
+cambios más recientes llegan en la llamada siguiente.
+
+Las bajas se guardan en ``tombstone`` en la misma transacción que el borrado
+y el janitor las purga tras ``tombstone_retention_days`` días. Una marca más
+antigua que eso recibe 410: el cliente debe volver a descargar la lista.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+
+from models import Tombstone
+
+
+class MarcaInvalida(ValueError):
+    """El valor de updated_since no es una marca válida"""
+
+
+def formatear_marca(ts, ultimo_id=None):
+    marca = ts.isoformat(timespec='microseconds') + 'Z'
+    return f"{marca}~{ultimo_id}" if ultimo_id is not None else marca
+
+
+# <fecha>T<hora>[.<fracción>][Z|±HH:MM][~<id>]. Un "+" sin codificar en la URL
+# llega como espacio: solo se acepta (y se restaura) en la posición de la zona
+_MARCA = re.compile(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d{1,6}))?(Z|[+ -]\d{2}:\d{2})?(?:~(\d+))?')
+
+
+def parsear_marca(valor):
+    """``<ISO 8601>[~<id>]`` -> (datetime UTC sin zona, id o None)"""
+    coincidencia = _MARCA.fullmatch(valor.strip())
+    if coincidencia is None:
+        raise MarcaInvalida(f"updated_since no válido: {valor}")
+    fecha, fraccion, zona, ultimo_id = coincidencia.groups()
+    if zona == 'Z':
+        zona = '+00:00'
+    elif zona and zona[0] == ' ':
+        zona = '+' + zona[1:]
+    try:
+        ts = datetime.fromisoformat(f"{fecha}.{(fraccion or '').ljust(6, '0')}{zona or ''}")
+    except ValueError:
+        raise MarcaInvalida(f"updated_since no válido: {valor}")
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts, int(ultimo_id) if ultimo_id else None
+
+
+def insertar_bajas(ejecutor, entity, ids):
+    """INSERT de las bajas con ``ejecutor`` (sesión o conexión), en su transacción"""
+    if not ids:
+        return
+    ahora = datetime.utcnow()
+    ejecutor.execute(sa.insert(Tombstone.__table__),
+                     [{'entity': entity, 'entity_id': i, 'deleted_at': ahora} for i in ids])
+
+
+def purgar_tombstones(janitor):
+    from janitor import borrar_por_lotes
+    tabla = Tombstone.__table__
+    delta = janitor.app.extensions['delta_sync']
+    limite = datetime.utcnow() - timedelta(days=delta.retencion)
+    return borrar_por_lotes(janitor.db.engine, tabla, tabla.c.deleted_at < limite,
+                            janitor.batch_size, janitor.batch_pause)
+
+
+class DeltaSync:
+    """
+    Extensión de sincronización incremental.
+
+    Configuración (app.config):
+        DELTA_SYNC_MAX_ITEMS                  -- filas como máximo por respuesta
+        DELTA_SYNC_MARGIN                     -- segundos que la marca queda por detrás de ahora
+        DELTA_SYNC_TOMBSTONE_RETENTION_DAYS   -- días que se conservan las bajas (0 = siempre)
+        DELTA_SYNC_TOMBSTONE_INTERVAL         -- segundos entre purgas de bajas
+    """
+
+    def __init__(self, app=None, db=None, janitor=None):
+        self.db = None
+        self.max_items = 500
+        self.margen = timedelta(seconds=5)
+        self.retencion = 30
+        if app is not None:
+            self.init_app(app, db, janitor)
+
+    def init_app(self, app, db, janitor=None):
+        self.db = db
+        self.max_items = app.config.get('DELTA_SYNC_MAX_ITEMS', 500)
+        self.margen = timedelta(seconds=app.config.get('DELTA_SYNC_MARGIN', 5))
+        self.retencion = app.config.get('DELTA_SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+        app.extensions['delta_sync'] = self
+        if janitor is not None and self.retencion > 0:
+            janitor.add_job('tombstones', app.config.get('DELTA_SYNC_TOMBSTONE_INTERVAL', 86400),
+                            purgar_tombstones)
+
+    def registrar_bajas(self, entity, ids):
+        """Inserta las bajas en la transacción en curso: se confirman junto con el borrado"""
+        insertar_bajas(self.db.session, entity, ids)
+
+    def marca_actual(self):
+        return formatear_marca(datetime.utcnow() - self.margen)
+
+    def cambios(self, query, modelo, entity, clave, valor, serializar=None):
+        """
+        Aplica ``updated_since=valor`` a ``query`` (ya filtrada) y devuelve
+        (respuesta, status). ``clave`` es el nombre de la lista en la respuesta.
+        ``serializar(fila)`` sustituye a ``fila.serialize()`` (campos parciales).
+        """
+        try:
+            desde, ultimo_id = parsear_marca(valor)
+        except MarcaInvalida as e:
+            return {"error": str(e)}, 400
+
+        ahora = datetime.utcnow()
+        if self.retencion > 0 and desde < ahora - timedelta(days=self.retencion):
+            return {"error": "updated_since es anterior a la retención de bajas: descargue la lista completa",
+                    "resync": True}, 410
+
+        columna = modelo.last_updated
+        tope = ahora - self.margen
+        if ultimo_id is None:
+            query = query.filter(columna > desde)
+        else:
+            # columna >= desde como rango del índice; el resto del empate por id
+            query = query.filter(columna >= desde, sa.or_(columna > desde, modelo.id > ultimo_id))
+        filas = query.filter(columna <= tope).order_by(columna.asc(), modelo.id.asc()).limit(self.max_items + 1).all()
+
+        hay_mas = len(filas) > self.max_items
+        if hay_mas:
+            filas = filas[:self.max_items]
+            hasta_ts = filas[-1].last_updated
+            hasta = formatear_marca(hasta_ts, filas[-1].id)
+        else:
+            hasta_ts = tope
+            hasta = formatear_marca(tope)
+
+        t = Tombstone.__table__
+        eliminados = self.db.session.execute(
+            sa.select(t.c.entity_id).where(
+                t.c.entity == entity, t.c.deleted_at > desde, t.c.deleted_at <= hasta_ts
+            ).order_by(t.c.deleted_at)
+        ).scalars().all()
+        # SQLite puede reutilizar el id de la última fila borrada: si existe ahora, manda la fila
+        vivos = {fila.id for fila in filas}
+        eliminados = [i for i in dict.fromkeys(eliminados) if i not in vivos]
+
+        return {
+            clave: [serializar(fila) if serializar else fila.serialize() for fila in filas],
+            'eliminados': eliminados,
+            'hasta': hasta,
+            'hay_mas': hay_mas,
+        }, 200
@@ -0,0 +1,96 @@
+"""
+Campos parciales (sparse fieldsets) en los listados y detalles: ``?fields=``.
+
+    /api/reclutas?fields=tabla              preset definido en el servidor
+    /api/reclutas?fields=nombre,estado      columnas sueltas
+    /api/reclutas?fields=tabla,notas        preset más columnas
+
+Con ``fields`` la consulta selecciona solo esas columnas (``with_entities``),
+así que las columnas grandes como ``notas`` no se leen de la base de datos ni
+se serializan. ``id`` se incluye siempre. Un nombre que no sea columna del
+modelo, campo calculado o preset devuelve 400 con la lista de válidos.
+
+Los campos calculados declaran la expresión SQL que los produce y, si hace
+falta, la tabla con la que hay que unir (``recluta_nombre`` en entrevistas).
+"""
+
+import sqlalchemy as sa
+
+
+class FieldsetError(ValueError):
+    """El parámetro fields contiene nombres no válidos"""
+
+
+class Fieldset:
+    """
+    Campos seleccionables de un modelo.
+
+    ``presets``   -- {nombre: (campos...)}
+    ``calculados`` -- {nombre: (expresión SQL, join o None)}; join es
+                     (modelo, condición) para un LEFT OUTER JOIN
+    ``depende``   -- {campo: (campos...)} que hay que leer para calcularlo;
+                     no se devuelven si no se pidieron
+    ``post``      -- función(dict) que ajusta la fila ya serializada
+    """
+
+    def __init__(self, modelo, presets=None, calculados=None, depende=None, post=None):
+        self.modelo = modelo
+        self.columnas = {attr.key: getattr(modelo, attr.key) for attr in sa.inspect(modelo).column_attrs}
+        self.presets = presets or {}
+        self.calculados = calculados or {}
+        self.depende = depende or {}
+        self.post = post
+
+    @property
+    def validos(self):
+        return sorted(set(self.columnas) | set(self.calculados) | set(self.presets))
+
+    def parse(self, valor, extra=()):
+        """Nombres pedidos en orden (con ``id`` primero) o None si no hay ``fields``"""
+        if not valor:
+            return None
+        campos = ['id']
+        desconocidos = []
+        for nombre in (n.strip() for n in valor.split(',')):
+            if not nombre:
+                continue
+            if nombre in self.presets:
+                campos.extend(self.presets[nombre])
+            elif nombre in self.columnas or nombre in self.calculados:
+                campos.append(nombre)
+            else:
+                desconocidos.append(nombre)
+        if desconocidos:
+            raise FieldsetError(f"Campos no válidos: {', '.join(desconocidos)}. "
+                                f"Válidos: {', '.join(self.validos)}")
+        campos.extend(extra)
+        return list(dict.fromkeys(campos))
+
+    def aplicar(self, query, campos):
+        """Restringe la consulta ORM a las columnas necesarias para ``campos``"""
+        leer = list(campos)
+        for campo in campos:
+            leer.extend(self.depende.get(campo, ()))
+        expresiones = []
+        joins = []
+        for nombre in dict.fromkeys(leer):
+            if nombre in self.calculados:
+                expresion, join = self.calculados[nombre]
+                expresiones.append(expresion.label(nombre))
+                if join is not None and join not in joins:
+                    joins.append(join)
+            else:
+                expresiones.append(self.columnas[nombre])
+        query = query.with_entities(*expresiones)
+        for modelo, condicion in joins:
+            query = query.outerjoin(modelo, condicion)
+        return query
+
+    def serializar(self, fila, campos):
+        """``fila.serialize()`` sin fields; si no, solo los campos pedidos"""
+        if campos is None:
+            return fila.serialize()
+        datos = dict(fila._mapping)
+        if self.post is not None:
+            self.post(datos)
+        return {campo: datos[campo] for campo in campos}
@@ -0,0 +1,219 @@
+"""
+Borrado de archivos subidos en segundo plano.
+
+Los handlers que reemplazan o eliminan fotos llaman a ``borrar(rutas)`` después
+de confirmar la transacción; un único hilo hace los ``os.remove`` fuera de la
+petición. Así un borrado por lotes de cientos de reclutas no espera al disco y
+si la transacción falla la foto sigue existiendo.
+
+Las rutas son las de ``foto_url``: ``guardar_archivo`` guarda en
+``UPLOAD_FOLDER/<tipo>/`` pero devuelve ``static/uploads/<tipo>/...``, así
+que ``ruta_local`` traduce ese prefijo a ``UPLOAD_FOLDER`` antes de tocar el
+disco. Solo se borran rutas dentro de ``UPLOAD_FOLDER``. Si el proceso termina con
+borrados pendientes, esos archivos quedan huérfanos en el disco (no hay
+referencias en la base de datos).
+
+Esos huérfanos, los de peticiones que fallaron después de ``guardar_archivo``
+y los de ``os.remove`` que fallaron los recoge ``recoger_huerfanos`` (tarea
+``uploads`` del janitor y ``admin_tools.py --uploads-gc``):
+
+    1. recorre UPLOAD_FOLDER con os.scandir y apunta los archivos más
+       antiguos que ``[UPLOADS_GC] grace_hours``;
+    2. lee en streaming ``foto_url`` de reclutas (también los archivados) y
+       usuarios y descarta los candidatos referenciados;
+    3. vuelve a comprobar cada archivo y lo borra o lo mueve a
+       ``quarantine_dir``.
+
+Si hay candidatos pero ninguno coincide con una referencia, no se borra
+nada: casi siempre es que las referencias no apuntan a este directorio
+(``UPLOAD_FOLDER`` o la base de datos equivocados), no que todo sea huérfano.
+
+Es seguro con subidas en curso: un archivo recién escrito cuya fila aún no se
+ha confirmado es más reciente que el periodo de gracia, y las referencias se
+leen después de listar el disco, así que una fila confirmada durante el
+recorrido también cuenta.
+"""
+
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import sqlalchemy as sa
+
+from metrics import metrics
+from models import Recluta, ReclutaArchivo, Usuario
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de las rutas que devuelve guardar_archivo (lo sirve Flask como estático)
+PREFIJO_URL = 'static/uploads'
+
+# Foto por defecto compartida: nunca se borra
+PROTEGIDOS = ('default_profile.jpg',)
+
+# Columnas con rutas de archivos subidos
+REFERENCIAS = (Recluta.foto_url, ReclutaArchivo.foto_url, Usuario.foto_url)
+
+
+def recoger_uploads(janitor):
+    resultado = janitor.app.extensions['file_cleanup'].recoger_huerfanos(janitor.db.engine)
+    return resultado['archivos']
+
+
+class FileCleanup:
+    """
+    Extensión de borrado diferido de archivos.
+
+    Configuración (app.config):
+        UPLOADS_GC_INTERVAL        -- segundos entre recogidas de huérfanos (0 = desactivada)
+        UPLOADS_GC_GRACE_HOURS     -- antigüedad mínima de un archivo para considerarlo huérfano
+        UPLOADS_GC_QUARANTINE_DIR  -- mover los huérfanos aquí en lugar de borrarlos (vacío = borrar)
+    """
+
+    def __init__(self, app=None, janitor=None):
+        self.base = None
+        self.gracia = 24 * 3600
+        self.cuarentena = None
+        self._executor = None
+        if app is not None:
+            self.init_app(app, janitor)
+
+    def init_app(self, app, janitor=None):
+        self.base = os.path.abspath(app.config.get('UPLOAD_FOLDER', 'static/uploads'))
+        self.gracia = app.config.get('UPLOADS_GC_GRACE_HOURS', 24) * 3600
+        cuarentena = app.config.get('UPLOADS_GC_QUARANTINE_DIR', '')
+        self.cuarentena = os.path.abspath(cuarentena) if cuarentena else None
+        app.extensions['file_cleanup'] = self
+        if janitor is not None:
+            janitor.add_job('uploads', app.config.get('UPLOADS_GC_INTERVAL', 86400), recoger_uploads)
+
+    def borrar(self, rutas):
+        """Programa el borrado de las rutas (relativas al directorio de trabajo, como foto_url)"""
+        rutas = [r for r in rutas if r and not r.endswith(PROTEGIDOS)]
+        if not rutas:
+            return
+        # El hilo se crea en el primer uso: nunca en el maestro de gunicorn
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='file-cleanup')
+        self._executor.submit(self._borrar, rutas)
+
+    def ruta_local(self, ruta):
+        """Archivo en disco de una ``foto_url``: ``static/uploads/...`` está en UPLOAD_FOLDER"""
+        relativa = ruta.replace('\\', '/')
+        if relativa.startswith(PREFIJO_URL + '/'):
+            return os.path.abspath(os.path.join(self.base, relativa[len(PREFIJO_URL) + 1:]))
+        return os.path.abspath(ruta)
+
+    def _borrar(self, rutas):
+        for ruta in rutas:
+            absoluta = self.ruta_local(ruta)
+            if os.path.commonpath([absoluta, self.base]) != self.base:
+                logger.warning(f"Ruta fuera de {self.base}, no se borra: {ruta}")
+                continue
+            try:
+                os.remove(absoluta)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Error al eliminar {ruta}: {str(e)}")
+
+    # ----- Recogida de huérfanos -----
+
+    def recoger_huerfanos(self, engine, simular=False):
+        """
+        Borra (o pone en cuarentena) los archivos de UPLOAD_FOLDER sin
+        referencias en la base de datos. Devuelve
+        {'revisados', 'archivos', 'bytes', 'errores'}; con ``simular`` solo cuenta.
+        """
+        limite = time.time() - self.gracia
+        candidatos = {}
+        revisados = 0
+        for entrada in self._recorrer(self.base):
+            revisados += 1
+            try:
+                info = entrada.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if info.st_mtime < limite and not entrada.name.endswith(PROTEGIDOS):
+                candidatos[os.path.abspath(entrada.path)] = info.st_size
+
+        # Después del recorrido: una fila confirmada mientras tanto también cuenta
+        hay_candidatos = bool(candidatos)
+        referenciados = 0
+        with engine.connect() as conn:
+            for columna in REFERENCIAS:
+                consulta = sa.select(columna).where(columna.isnot(None), columna != '')
+                for ruta in conn.execution_options(yield_per=1000).execute(consulta).scalars():
+                    if candidatos.pop(self.ruta_local(ruta), None) is not None:
+                        referenciados += 1
+                    if not candidatos:
+                        break
+        if hay_candidatos and not referenciados:
+            raise RuntimeError(
+                f"Ninguno de los {len(candidatos)} archivos antiguos de {self.base} coincide con una foto_url: "
+                f"no se borra nada (¿UPLOAD_FOLDER o la base de datos son los correctos?)"
+            )
+
+        archivos = num_bytes = errores = 0
+        for ruta in sorted(candidatos):
+            try:
+                info = os.stat(ruta, follow_symlinks=False)
+                # Reemplazado desde el recorrido: ya no es el mismo archivo
+                if info.st_mtime >= limite:
+                    continue
+                if not simular:
+                    self._retirar(ruta)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                errores += 1
+                logger.error(f"Error al retirar el archivo huérfano {ruta}: {str(e)}")
+                continue
+            archivos += 1
+            num_bytes += info.st_size
+
+        if not simular and num_bytes:
+            metrics.inc('uploads_gc_bytes_total', (), num_bytes)
+        logger.info(f"Archivos huérfanos{' (simulación)' if simular else ''}: {archivos} de {revisados}, "
+                    f"{num_bytes / 1048576:.1f}MB{f', {errores} errores' if errores else ''}")
+        return {'revisados': revisados, 'archivos': archivos, 'bytes': num_bytes, 'errores': errores}
+
+    def _recorrer(self, directorio):
+        """Archivos regulares bajo ``directorio`` (sin seguir enlaces ni entrar en la cuarentena)"""
+        pendientes = [directorio]
+        while pendientes:
+            try:
+                it = os.scandir(pendientes.pop())
+            except FileNotFoundError:
+                continue
+            with it:
+                for entrada in it:
+                    if entrada.is_dir(follow_symlinks=False):
+                        if os.path.abspath(entrada.path) != self.cuarentena:
+                            pendientes.append(entrada.path)
+                    elif entrada.is_file(follow_symlinks=False):
+                        yield entrada
+
+    def _retirar(self, ruta):
+        if self.cuarentena is None:
+            os.remove(ruta)
+            return
+        destino = os.path.join(self.cuarentena, os.path.relpath(ruta, self.base))
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        try:
+            os.replace(ruta, destino)
+        except OSError:
+            # Otro sistema de archivos: copiar y borrar
+            shutil.move(ruta, destino)
+
+    # ----- Hilo -----
+
+    def stop(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def after_fork(self):
+        self._executor = None
@@ -0,0 +1,198 @@
+"""
+Group commit: agrupación de escrituras concurrentes en un solo COMMIT.
+
+Cuando está activado ([DATABASE] group_commit = True), las mutaciones de las
+peticiones se encolan como "unidades de trabajo" (funciones sin argumentos
+que usan ``db.session`` sin hacer commit). Un único hilo escritor las ejecuta
+en lotes recogidos durante una ventana de tiempo pequeña y confirma cada lote
+con un solo COMMIT (un solo fsync en SQLite).
+
+Cada petición recibe su propio resultado: si una unidad lanza una excepción,
+el lote se deshace, esa unidad recibe el error y el resto se vuelve a ejecutar
+sin ella. Por eso las unidades deben poder repetirse: tienen que cargar los
+objetos por id dentro de la propia función y no usar ``request`` ni
+``current_user``.
+
+Con el modo desactivado, ``ejecutar`` corre la unidad en el hilo de la
+petición y hace commit en el acto, igual que antes.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class EscrituraRechazada(Exception):
+    """
+    La unidad de trabajo decide no escribir (validación fallida). Sus cambios
+    pendientes se descartan sin afectar a las demás unidades del lote.
+    """
+
+    def __init__(self, respuesta, status=400):
+        super().__init__(respuesta.get('message', 'Escritura rechazada'))
+        self.respuesta = respuesta
+        self.status = status
+
+
+class _Unidad:
+    __slots__ = ('funcion', 'future')
+
+    def __init__(self, funcion):
+        self.funcion = funcion
+        self.future = Future()
+
+
+class GroupCommit:
+    """
+    Extensión de escritura agrupada.
+
+    Configuración (app.config):
+        GROUP_COMMIT_ENABLED    -- activa el hilo escritor
+        GROUP_COMMIT_WINDOW_MS  -- tiempo máximo de espera para llenar un lote
+        GROUP_COMMIT_MAX_BATCH  -- número máximo de unidades por lote
+        GROUP_COMMIT_TIMEOUT    -- segundos que una petición espera su resultado
+    """
+
+    def __init__(self, app=None, db=None):
+        self.app = None
+        self.db = None
+        self.enabled = False
+        self.window = 0.002
+        self.max_batch = 64
+        self.timeout = 30
+        self.stats = {'lotes': 0, 'unidades': 0, 'reintentos': 0}
+        self._queue = queue.Queue()
+        self._thread = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        self.enabled = app.config.get('GROUP_COMMIT_ENABLED', False)
+        self.window = app.config.get('GROUP_COMMIT_WINDOW_MS', 2) / 1000.0
+        self.max_batch = app.config.get('GROUP_COMMIT_MAX_BATCH', 64)
+        self.timeout = app.config.get('GROUP_COMMIT_TIMEOUT', 30)
+        app.extensions['group_commit'] = self
+        if self.enabled:
+            self.start()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def after_fork(self):
+        """En un proceso hijo: la cola y el hilo heredados no sirven, se crean de nuevo"""
+        self._queue = queue.Queue()
+        self._thread = None
+        if self.enabled:
+            self.start()
+
+    def ejecutar(self, funcion):
+        """
+        Ejecuta una unidad de trabajo y devuelve su resultado una vez confirmada.
+        Las excepciones de la unidad (o del COMMIT) se relanzan en el llamador.
+        """
+        if not self.enabled:
+            try:
+                resultado = funcion()
+                self.db.session.commit()
+                return resultado
+            except Exception:
+                self.db.session.rollback()
+                raise
+
+        # Liberar la conexión de la petición mientras espera: con muchos clientes
+        # el hilo escritor se quedaría sin conexiones libres en el pool
+        self.db.session.rollback()
+
+        unidad = _Unidad(funcion)
+        self._queue.put(unidad)
+        return unidad.future.result(timeout=self.timeout)
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                primera = self._queue.get()
+                if primera is None:
+                    break
+
+                lote = [primera]
+                limite = time.monotonic() + self.window
+                detener = False
+                while len(lote) < self.max_batch:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    try:
+                        unidad = self._queue.get(timeout=restante)
+                    except queue.Empty:
+                        break
+                    if unidad is None:
+                        detener = True
+                        break
+                    lote.append(unidad)
+
+                try:
+                    self._confirmar_lote(lote)
+                except Exception as e:
+                    # Nunca dejar peticiones esperando por un fallo inesperado del hilo
+                    logger.error(f"Error en el hilo de group commit: {str(e)}")
+                    for unidad in lote:
+                        if not unidad.future.done():
+                            unidad.future.set_exception(e)
+                finally:
+                    self.db.session.close()
+
+                if detener:
+                    break
+
+    def _confirmar_lote(self, lote):
+        session = self.db.session
+        pendientes = [u for u in lote if u.future.set_running_or_notify_cancel()]
+
+        while pendientes:
+            resultados = []
+            fallo = None
+            for unidad in pendientes:
+                try:
+                    resultados.append(unidad.funcion())
+                    session.flush()
+                except Exception as e:
+                    fallo = (unidad, e)
+                    break
+
+            if fallo is not None:
+                # Deshacer el lote, notificar a la unidad culpable y repetir sin ella
+                session.rollback()
+                unidad, error = fallo
+                unidad.future.set_exception(error)
+                pendientes.remove(unidad)
+                self.stats['reintentos'] += 1
+                continue
+
+            try:
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"Error al confirmar lote de {len(pendientes)} escrituras: {str(e)}")
+                for unidad in pendientes:
+                    unidad.future.set_exception(e)
+                return
+
+            self.stats['lotes'] += 1
+            self.stats['unidades'] += len(pendientes)
+            for unidad, resultado in zip(pendientes, resultados):
+                unidad.future.set_result(resultado)
+            return
@@ -0,0 +1,168 @@
+"""
+Lista de IPs permitidas con soporte CIDR.
+
+Las entradas de ``[SECURITY] allowed_ips`` (direcciones sueltas o redes tipo
+``10.20.0.0/16``) se compilan en una tabla hash por longitud de prefijo. Cada
+comprobación enmascara la IP con cada longitud presente y busca en un ``set``,
+así que su coste depende del número de longitudes distintas (como mucho 33 en
+IPv4 y 129 en IPv6), no del número de entradas.
+
+La lista se recarga sola cuando cambia config.ini, sin reiniciar la app.
+"""
+
+import configparser
+import ipaddress
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def parse_networks(texto):
+    """Convierte una lista separada por comas en redes ipaddress, ignorando las inválidas"""
+    redes = []
+    for entrada in texto.split(','):
+        entrada = entrada.strip()
+        if not entrada:
+            continue
+        try:
+            redes.append(ipaddress.ip_network(entrada, strict=False))
+        except ValueError:
+            logger.warning(f"Entrada inválida en la lista de IPs permitidas: {entrada}")
+    return redes
+
+
+def _normalizar(ip):
+    """Devuelve un objeto ipaddress o None; las IPv4 mapeadas en IPv6 se tratan como IPv4"""
+    try:
+        direccion = ipaddress.ip_address(ip.strip())
+    except (ValueError, AttributeError):
+        return None
+    if direccion.version == 6 and direccion.ipv4_mapped is not None:
+        return direccion.ipv4_mapped
+    return direccion
+
+
+class CompiledAllowlist:
+    """Conjunto inmutable de redes compilado para búsquedas rápidas"""
+
+    def __init__(self, redes):
+        self.size = len(redes)
+        self._tablas = {}
+        for version, bits in ((4, 32), (6, 128)):
+            de_version = [r for r in redes if r.version == version]
+            # collapse_addresses fusiona redes solapadas o contiguas
+            por_prefijo = {}
+            for red in ipaddress.collapse_addresses(de_version):
+                desplazamiento = bits - red.prefixlen
+                por_prefijo.setdefault(desplazamiento, set()).add(int(red.network_address) >> desplazamiento)
+            self._tablas[version] = tuple(sorted(por_prefijo.items()))
+
+    def __contains__(self, ip):
+        direccion = ip if isinstance(ip, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else _normalizar(ip)
+        if direccion is None:
+            return False
+        valor = int(direccion)
+        for desplazamiento, prefijos in self._tablas[direccion.version]:
+            if (valor >> desplazamiento) in prefijos:
+                return True
+        return False
+
+
+class IPAllowlist:
+    """
+    Lista de IPs permitidas ligada a un archivo de configuración.
+
+    trusted_proxy_depth indica cuántos proxies de confianza hay delante de la
+    aplicación: la IP del cliente es la entrada N-ésima empezando por la
+    derecha de X-Forwarded-For. Con 0 se ignora la cabecera y se usa la
+    dirección remota de la conexión.
+    """
+
+    def __init__(self, config_file=None, config=None, section='SECURITY', reload_interval=2):
+        self.config_file = config_file
+        self.section = section
+        self.reload_interval = reload_interval
+        self.trusted_proxy_depth = 1
+        self._compiled = CompiledAllowlist([])
+        self._mtime = None
+        self._next_check = 0
+        self._lock = threading.Lock()
+        if config_file is not None:
+            self._bind(config_file, config)
+
+    def init_app(self, app, config_file, config=None):
+        """Liga la lista a la app y al archivo de configuración que la alimenta"""
+        if config is not None:
+            self.reload_interval = config.getint(
+                self.section, 'ALLOWLIST_RELOAD_INTERVAL', fallback=self.reload_interval
+            )
+        self._bind(config_file, config)
+        app.extensions['ip_allowlist'] = self
+
+    def _bind(self, config_file, config):
+        self.config_file = config_file
+        if config is not None:
+            # Configuración ya leída (o generada en memoria si no hay archivo)
+            self.load(config)
+            try:
+                self._mtime = os.stat(config_file).st_mtime_ns
+            except OSError:
+                pass
+        else:
+            self.reload()
+
+    def load(self, config):
+        """Compila la lista a partir de un ConfigParser ya leído"""
+        texto = config.get(self.section, 'ALLOWED_IPS', fallback='127.0.0.1')
+        self.trusted_proxy_depth = config.getint(self.section, 'TRUSTED_PROXY_DEPTH', fallback=1)
+        self._compiled = CompiledAllowlist(parse_networks(texto))
+
+    def reload(self):
+        """Vuelve a leer el archivo de configuración si existe"""
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
+        except OSError:
+            return False
+        config = configparser.ConfigParser()
+        config.read(self.config_file)
+        self.load(config)
+        self._mtime = mtime
+        logger.info(f"Lista de IPs permitidas cargada: {self._compiled.size} entradas")
+        return True
+
+    def _maybe_reload(self):
+        ahora = time.monotonic()
+        if ahora < self._next_check:
+            return
+        # Solo un hilo comprueba el archivo; el resto sigue con la tabla actual
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = ahora + self.reload_interval
+            try:
+                mtime = os.stat(self.config_file).st_mtime_ns
+            except OSError:
+                return
+            if mtime != self._mtime:
+                self.reload()
+        except Exception as e:
+            logger.error(f"Error al recargar la lista de IPs permitidas: {str(e)}")
+        finally:
+            self._lock.release()
+
+    def client_ip(self, request):
+        """Obtiene la IP real del cliente respetando la profundidad de proxies de confianza"""
+        depth = self.trusted_proxy_depth
+        cabecera = request.headers.get('X-Forwarded-For')
+        if depth > 0 and cabecera:
+            partes = [p.strip() for p in cabecera.split(',') if p.strip()]
+            if partes:
+                return partes[-depth] if len(partes) >= depth else partes[0]
+        return request.remote_addr
+
+    def is_allowed(self, ip):
+        self._maybe_reload()
+        return ip in self._compiled
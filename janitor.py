@@ -0,0 +1,247 @@
+"""
+Tareas periódicas de mantenimiento (janitor).
+
+Un único hilo ejecuta, cada una con su intervalo, las tareas registradas con
+``add_job``. Por defecto:
+
+    sesiones   -- borra las UserSession caducadas o invalidadas
+    auditoria  -- borra el AuditLog más antiguo que [JANITOR] audit_retention_days
+    sqlite     -- checkpoint del WAL y PRAGMA optimize (antes MaintenanceThread)
+
+Los borrados se hacen por lotes de ``batch_size`` filas, cada lote en su propia
+transacción y con una pausa entre lotes, para no bloquear a los escritores.
+Los predicados usan los índices ``ix_user_session_expires_at``,
+``ix_user_session_invalidas`` e ``ix_audit_log_timestamp``.
+
+Con gunicorn, el maestro detiene el hilo (``when_ready``) y cada worker
+arranca el suyo (``after_fork``), pero solo ejecuta tareas el que tiene el
+bloqueo del archivo ``[JANITOR] lock_file``. Si ese worker muere, otro toma el
+relevo.
+
+Cada ejecución se registra en /metrics: duración por tarea, ejecuciones por
+resultado y filas borradas.
+"""
+
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from metrics import metrics
+from models import AuditLog, UserSession
+from sqlite_tuning import run_maintenance
+
+try:
+    import fcntl
+except ImportError:  # Windows: un solo proceso, siempre es el líder
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Segundos hasta la primera ejecución de cada tarea tras tomar el liderazgo
+ARRANQUE = 60
+
+
+def borrar_por_lotes(engine, tabla, condicion, lote=500, pausa=0.01):
+    """
+    DELETE ... WHERE id IN (SELECT id ... WHERE condicion LIMIT lote) hasta
+    que no quede nada. Devuelve el número de filas borradas.
+    """
+    total = 0
+    while True:
+        seleccion = sa.select(tabla.c.id).where(condicion).limit(lote).scalar_subquery()
+        with engine.begin() as conn:
+            borradas = conn.execute(sa.delete(tabla).where(tabla.c.id.in_(seleccion))).rowcount
+        total += borradas
+        if borradas < lote:
+            return total
+        time.sleep(pausa)
+
+
+def limpiar_sesiones(janitor):
+    tabla = UserSession.__table__
+    ahora = datetime.utcnow()
+    caducadas = borrar_por_lotes(janitor.db.engine, tabla, tabla.c.expires_at < ahora,
+                                 janitor.batch_size, janitor.batch_pause)
+    # Literal (no parámetro) para que SQLite pueda usar el índice parcial
+    invalidas = borrar_por_lotes(janitor.db.engine, tabla, sa.text('is_valid = 0'),
+                                 janitor.batch_size, janitor.batch_pause)
+    return caducadas + invalidas
+
+
+def purgar_auditoria(janitor):
+    tabla = AuditLog.__table__
+    limite = datetime.utcnow() - timedelta(days=janitor.audit_retention_days)
+    return borrar_por_lotes(janitor.db.engine, tabla, tabla.c.timestamp < limite,
+                            janitor.batch_size, janitor.batch_pause)
+
+
+def mantenimiento_sqlite(janitor):
+    resultado = run_maintenance(janitor.db.engine)
+    logger.info(f"Checkpoint del WAL: {resultado}")
+    return 0
+
+
+class _Tarea:
+    __slots__ = ('nombre', 'intervalo', 'funcion')
+
+    def __init__(self, nombre, intervalo, funcion):
+        self.nombre = nombre
+        self.intervalo = intervalo
+        self.funcion = funcion
+
+
+class _JanitorThread(threading.Thread):
+    """Cola de prioridad (próxima ejecución, nombre) sobre las tareas registradas"""
+
+    def __init__(self, janitor):
+        super().__init__(name='janitor', daemon=True)
+        self.janitor = janitor
+        self._stop_event = threading.Event()
+
+    def run(self):
+        cola = []
+        while not self._stop_event.is_set():
+            if not self.janitor.tomar_bloqueo():
+                # Otro proceso es el líder: reintentar más tarde
+                cola = []
+                self._stop_event.wait(self.janitor.lock_retry)
+                continue
+            if not cola:
+                inicio = time.monotonic()
+                cola = [(inicio + min(t.intervalo, ARRANQUE), t.nombre) for t in self.janitor.tareas.values()]
+                heapq.heapify(cola)
+                if not cola:
+                    return
+
+            proxima, nombre = cola[0]
+            if self._stop_event.wait(max(0.0, proxima - time.monotonic())):
+                break
+            heapq.heapreplace(cola, (time.monotonic() + self.janitor.tareas[nombre].intervalo, nombre))
+            self.janitor.ejecutar(nombre)
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.join(timeout)
+
+
+class Janitor:
+    """
+    Extensión de tareas periódicas.
+
+    Configuración (app.config):
+        JANITOR_ENABLED              -- arranca el hilo
+        JANITOR_LOCK_FILE            -- archivo de bloqueo entre procesos
+        JANITOR_BATCH_SIZE           -- filas por lote de borrado
+        JANITOR_BATCH_PAUSE_MS       -- pausa entre lotes
+        JANITOR_SESSION_INTERVAL     -- segundos entre limpiezas de sesiones (0 = desactivada)
+        JANITOR_AUDIT_RETENTION_DAYS -- días de AuditLog que se conservan (0 = todos)
+        JANITOR_AUDIT_INTERVAL       -- segundos entre purgas de auditoría
+        SQLITE_MAINTENANCE_INTERVAL  -- segundos entre checkpoint/optimize (0 = desactivado)
+    """
+
+    def __init__(self, app=None, db=None):
+        self.app = None
+        self.db = None
+        self.enabled = False
+        self.tareas = {}
+        self.lock_file = None
+        self.lock_retry = 30
+        self.batch_size = 500
+        self.batch_pause = 0.01
+        self.audit_retention_days = 0
+        self.lider = False
+        self._hilo = None
+        self._lock_fd = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        self.enabled = app.config.get('JANITOR_ENABLED', True)
+        self.lock_file = os.path.join(app.instance_path, app.config.get('JANITOR_LOCK_FILE', 'janitor.lock'))
+        self.batch_size = app.config.get('JANITOR_BATCH_SIZE', 500)
+        self.batch_pause = app.config.get('JANITOR_BATCH_PAUSE_MS', 10) / 1000.0
+        self.audit_retention_days = app.config.get('JANITOR_AUDIT_RETENTION_DAYS', 0)
+        app.extensions['janitor'] = self
+
+        self.add_job('sesiones', app.config.get('JANITOR_SESSION_INTERVAL', 900), limpiar_sesiones)
+        if self.audit_retention_days > 0:
+            self.add_job('auditoria', app.config.get('JANITOR_AUDIT_INTERVAL', 86400), purgar_auditoria)
+        with app.app_context():
+            if db.engine.dialect.name == 'sqlite':
+                self.add_job('sqlite', app.config.get('SQLITE_MAINTENANCE_INTERVAL', 3600), mantenimiento_sqlite)
+
+    def add_job(self, nombre, intervalo, funcion):
+        """Registra ``funcion(janitor) -> filas`` cada ``intervalo`` segundos (<= 0 la desactiva)"""
+        if intervalo > 0:
+            self.tareas[nombre] = _Tarea(nombre, intervalo, funcion)
+
+    def ejecutar(self, nombre):
+        """Ejecuta una tarea ahora. Devuelve (filas, segundos); filas es None si falló"""
+        tarea = self.tareas[nombre]
+        etiquetas = (('job', nombre),)
+        inicio = time.perf_counter()
+        try:
+            with self.app.app_context():
+                filas = tarea.funcion(self)
+            resultado = 'ok'
+        except Exception as e:
+            filas = None
+            resultado = 'error'
+            logger.error(f"Error en la tarea '{nombre}' del janitor: {str(e)}")
+        duracion = time.perf_counter() - inicio
+
+        metrics.observe('janitor_job_duration_seconds', duracion, etiquetas)
+        metrics.inc('janitor_job_runs_total', etiquetas + (('result', resultado),))
+        if filas:
+            metrics.inc('janitor_rows_deleted_total', etiquetas, filas)
+            logger.info(f"Janitor '{nombre}': {filas} filas en {duracion * 1000:.1f} ms")
+        return filas, duracion
+
+    # ----- Hilo y liderazgo entre procesos -----
+
+    def tomar_bloqueo(self):
+        """Intenta ser el líder sin esperar (también admin_tools.py --janitor)"""
+        if fcntl is None:
+            self.lider = True
+            return True
+        if self._lock_fd is None:
+            os.makedirs(os.path.dirname(self.lock_file), exist_ok=True)
+            self._lock_fd = open(self.lock_file, 'a')
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.lider = True
+        except OSError:
+            self.lider = False
+        return self.lider
+
+    def soltar_bloqueo(self):
+        self.lider = False
+        if self._lock_fd is not None:
+            self._lock_fd.close()
+            self._lock_fd = None
+
+    def start(self):
+        if not self.enabled or not self.tareas or self._hilo is not None:
+            return
+        self._hilo = _JanitorThread(self)
+        self._hilo.start()
+
+    def stop(self):
+        """Detiene el hilo y suelta el bloqueo (gunicorn: el maestro, antes de crear workers)"""
+        if self._hilo is not None:
+            self._hilo.stop(timeout=5)
+            self._hilo = None
+        self.soltar_bloqueo()
+
+    def after_fork(self):
+        """El hilo no sobrevive al fork: cada worker arranca el suyo"""
+        self._hilo = None
+        self.soltar_bloqueo()
+        self.start()
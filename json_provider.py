@@ -0,0 +1,93 @@
+"""
+Proveedor JSON rápido para ``jsonify``.
+
+Usa orjson cuando está instalado y recurre a la biblioteca estándar en caso
+contrario. Las fechas se codifican de forma nativa con los mismos formatos que
+antes generaban a mano los métodos ``serialize()`` de los modelos:
+
+    datetime -> 'YYYY-MM-DD HH:MM:SS'
+    date     -> 'YYYY-MM-DD'
+"""
+
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # Opcional: pip install orjson
+except ImportError:
+    orjson = None
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def encode_value(o):
+    """Codifica los tipos que el serializador no conoce de forma nativa"""
+    if isinstance(o, datetime):
+        if o.tzinfo is None:
+            # isoformat es bastante más rápido que strftime y da el mismo resultado
+            return o.isoformat(' ', 'seconds')
+        return o.strftime(DATETIME_FORMAT)
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON enchufable para la aplicación.
+
+    ``backend`` puede ser 'auto' (orjson si está disponible), 'orjson' o
+    'stdlib'. La salida mantiene el orden de claves y el salto de línea final
+    del proveedor por defecto de Flask.
+    """
+
+    default = staticmethod(encode_value)
+    backend = 'auto'
+
+    @property
+    def use_orjson(self):
+        if self.backend == 'stdlib':
+            return False
+        if self.backend == 'orjson' and orjson is None:
+            raise RuntimeError("JSON_BACKEND=orjson pero orjson no está instalado")
+        return orjson is not None
+
+    def _orjson_option(self, compact=True):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # Con argumentos específicos de json.dumps se usa siempre la biblioteca estándar
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=encode_value, option=self._orjson_option()).decode('utf-8')
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        compact = not ((self.compact is None and self._app.debug) or self.compact is False)
+        # Se generan bytes directamente, sin pasar por str
+        data = orjson.dumps(obj, default=encode_value, option=self._orjson_option(compact)) + b'\n'
+        return self._app.response_class(data, mimetype=self.mimetype)
@@ -0,0 +1,346 @@
+"""
+Cola de correo saliente.
+
+Los correos se guardan en la tabla ``outbox`` en la misma transacción que el
+cambio que los origina (una entrevista nueva, un lote de recordatorios) y un
+hilo en segundo plano los envía; la petición nunca espera al servidor SMTP.
+
+El hilo de envío:
+    - reclama lotes de ``batch_size`` filas con un UPDATE (estado ``enviando``
+      y un plazo ``lease``), así varios procesos pueden enviar sin repetir
+      mensajes y, si uno muere, sus filas se vuelven a reclamar al vencer el
+      plazo;
+    - reutiliza una única conexión SMTP entre mensajes y lotes, que se cierra
+      tras ``idle_timeout`` segundos sin uso;
+    - carga cada plantilla una vez por lote y renderiza una sola vez los
+      mensajes con el mismo contexto;
+    - reintenta los errores temporales con espera exponencial
+      (``backoff_base`` * 2^intentos, hasta ``backoff_max``) y marca como
+      ``fallido`` tras ``max_attempts`` o ante un rechazo permanente (5xx).
+
+Plantillas: ``templates/email/<tipo>.txt``. La primera línea es el asunto y el
+resto, tras una línea en blanco, el cuerpo.
+
+Para probar en local basta un servidor SMTP de depuración, por ejemplo:
+    python -m aiosmtpd -n -l localhost:1025
+"""
+
+import json
+import logging
+import random
+import smtplib
+import ssl
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+import sqlalchemy as sa
+
+from janitor import borrar_por_lotes
+from metrics import metrics
+from models import Outbox
+
+logger = logging.getLogger(__name__)
+
+
+class _ErrorPermanente(Exception):
+    pass
+
+
+class _SenderThread(threading.Thread):
+    def __init__(self, cola):
+        super().__init__(name='mail-sender', daemon=True)
+        self.cola = cola
+        self.despertar = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.despertar.wait(self.cola.poll_interval)
+            self.despertar.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                # Vaciar lo pendiente antes de volver a esperar
+                while self.cola.procesar_lote() == self.cola.batch_size:
+                    pass
+            except Exception as e:
+                logger.error(f"Error en el envío de correo: {str(e)}")
+            self.cola._cerrar_si_inactiva()
+        self.cola._cerrar()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.despertar.set()
+        self.join(timeout)
+
+
+class MailQueue:
+    """
+    Extensión de correo saliente.
+
+    Configuración (app.config):
+        MAIL_ENABLED                         -- encola y envía (si no, solo se registra en el log)
+        MAIL_HOST, MAIL_PORT                 -- servidor SMTP
+        MAIL_USE_TLS, MAIL_USE_SSL           -- STARTTLS o SMTP sobre SSL
+        MAIL_USERNAME, MAIL_PASSWORD         -- credenciales (opcionales)
+        MAIL_SENDER                          -- remitente
+        MAIL_TIMEOUT                         -- timeout de la conexión SMTP
+        MAIL_BATCH_SIZE                      -- mensajes reclamados por lote
+        MAIL_POLL_INTERVAL                   -- segundos entre revisiones de la tabla
+        MAIL_IDLE_TIMEOUT                    -- segundos que se mantiene abierta la conexión sin uso
+        MAIL_LEASE                           -- segundos que un proceso retiene un lote reclamado
+        MAIL_MAX_ATTEMPTS                    -- intentos antes de marcar como fallido
+        MAIL_BACKOFF_BASE, MAIL_BACKOFF_MAX  -- espera exponencial entre intentos (segundos)
+        MAIL_RETENTION_DAYS                  -- días que se conservan los enviados (tarea del janitor)
+    """
+
+    def __init__(self, app=None, db=None, janitor=None):
+        self.app = None
+        self.db = None
+        self.enabled = False
+        self.batch_size = 50
+        self.poll_interval = 5
+        self._hilo = None
+        self._smtp = None
+        self._ultimo_uso = 0.0
+        if app is not None:
+            self.init_app(app, db, janitor)
+
+    def init_app(self, app, db, janitor=None):
+        self.app = app
+        self.db = db
+        self.enabled = app.config.get('MAIL_ENABLED', False)
+        self.host = app.config.get('MAIL_HOST', 'localhost')
+        self.port = app.config.get('MAIL_PORT', 1025)
+        self.use_tls = app.config.get('MAIL_USE_TLS', False)
+        self.use_ssl = app.config.get('MAIL_USE_SSL', False)
+        self.username = app.config.get('MAIL_USERNAME', '')
+        self.password = app.config.get('MAIL_PASSWORD', '')
+        self.sender = app.config.get('MAIL_SENDER', 'reclutas@localhost')
+        self.timeout = app.config.get('MAIL_TIMEOUT', 10)
+        self.batch_size = app.config.get('MAIL_BATCH_SIZE', 50)
+        self.poll_interval = app.config.get('MAIL_POLL_INTERVAL', 5)
+        self.idle_timeout = app.config.get('MAIL_IDLE_TIMEOUT', 60)
+        self.lease = app.config.get('MAIL_LEASE', 300)
+        self.max_attempts = app.config.get('MAIL_MAX_ATTEMPTS', 8)
+        self.backoff_base = app.config.get('MAIL_BACKOFF_BASE', 30)
+        self.backoff_max = app.config.get('MAIL_BACKOFF_MAX', 3600)
+        self.retention_days = app.config.get('MAIL_RETENTION_DAYS', 7)
+        app.extensions['mail_queue'] = self
+        if janitor is not None and self.enabled and self.retention_days > 0:
+            janitor.add_job('outbox', 86400, self._purgar)
+
+    # ----- Encolado -----
+
+    def encolar(self, tipo, destinatario, contexto, conn=None):
+        """
+        Añade un correo a la cola. Sin ``conn`` se añade a ``db.session`` (se
+        confirma con el resto de la unidad de trabajo); con ``conn`` se inserta
+        en esa conexión de SQLAlchemy Core. Devuelve False si el correo está
+        desactivado.
+        """
+        if not self.enabled:
+            logger.info(f"Correo desactivado, no se envía '{tipo}' a {destinatario}")
+            return False
+        valores = {
+            'tipo': tipo,
+            'destinatario': destinatario,
+            'contexto': json.dumps(contexto, ensure_ascii=False, default=str),
+            'estado': 'pendiente',
+            'intentos': 0,
+            'proximo_intento': datetime.utcnow(),
+            'creado': datetime.utcnow(),
+        }
+        if conn is None:
+            self.db.session.add(Outbox(**valores))
+        else:
+            conn.execute(sa.insert(Outbox.__table__).values(**valores))
+        return True
+
+    def despertar(self):
+        """Avisa al hilo de envío de que hay correo nuevo (tras el COMMIT)"""
+        if self._hilo is not None:
+            self._hilo.despertar.set()
+
+    def destino_recordatorios(self, conn, filas):
+        """Destino para ``@reminders.destino``: encola un recordatorio por entrevista"""
+        for fila in filas:
+            self.encolar('recordatorio', fila['recluta_email'], dict(fila), conn=conn)
+        # El hilo de envío lo despierta reminders tras el COMMIT (``despues=despertar``)
+
+    # ----- Envío -----
+
+    def _reclamar(self):
+        o = Outbox.__table__
+        ahora = datetime.utcnow()
+        token = uuid.uuid4().hex
+        disponibles = sa.select(o.c.id).where(sa.or_(
+            sa.and_(o.c.estado == 'pendiente', o.c.proximo_intento <= ahora),
+            sa.and_(o.c.estado == 'enviando', o.c.reclamado_hasta < ahora)
+        )).order_by(o.c.proximo_intento).limit(self.batch_size).scalar_subquery()
+        with self.db.engine.begin() as conn:
+            conn.execute(sa.update(o).where(o.c.id.in_(disponibles)).values(
+                estado='enviando', reclamado_por=token, reclamado_hasta=ahora + timedelta(seconds=self.lease)))
+            return conn.execute(sa.select(o).where(o.c.reclamado_por == token, o.c.estado == 'enviando')).mappings().all()
+
+    def _renderizar(self, filas, fallos):
+        """
+        Un EmailMessage por fila; cada plantilla se carga una vez y cada
+        contexto se renderiza una vez. Los errores de plantilla son permanentes.
+        """
+        plantillas = {}
+        renderizados = {}
+        mensajes = {}
+        for fila in filas:
+            clave = (fila['tipo'], fila['contexto'])
+            try:
+                if clave not in renderizados:
+                    if fila['tipo'] not in plantillas:
+                        plantillas[fila['tipo']] = self.app.jinja_env.get_template(f"email/{fila['tipo']}.txt")
+                    texto = plantillas[fila['tipo']].render(**json.loads(fila['contexto']))
+                    asunto, _, cuerpo = texto.partition('\n')
+                    renderizados[clave] = (asunto.strip(), cuerpo.lstrip('\n'))
+            except Exception as e:
+                fallos[fila['id']] = (f"Plantilla: {str(e)}", True)
+                continue
+            asunto, cuerpo = renderizados[clave]
+            mensaje = EmailMessage()
+            mensaje['From'] = self.sender
+            mensaje['To'] = fila['destinatario']
+            mensaje['Subject'] = asunto
+            mensaje.set_content(cuerpo)
+            mensajes[fila['id']] = mensaje
+        return mensajes
+
+    def _conexion(self):
+        if self._smtp is not None:
+            return self._smtp
+        if self.use_ssl:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+        if self.username:
+            smtp.login(self.username, self.password)
+        metrics.inc('mail_smtp_connections_total')
+        self._smtp = smtp
+        return smtp
+
+    def _cerrar(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _cerrar_si_inactiva(self):
+        if self._smtp is not None and time.monotonic() - self._ultimo_uso > self.idle_timeout:
+            self._cerrar()
+
+    def _enviar(self, mensaje):
+        """Envía reutilizando la conexión; si el servidor la cerró, reconecta una vez"""
+        for intento in (1, 2):
+            try:
+                self._conexion().send_message(mensaje)
+                self._ultimo_uso = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._smtp = None
+                if intento == 2:
+                    raise
+            except smtplib.SMTPRecipientsRefused as e:
+                raise _ErrorPermanente(str(e.recipients)) from e
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code >= 500:
+                    raise _ErrorPermanente(f"{e.smtp_code} {e.smtp_error!r}") from e
+                raise
+
+    def procesar_lote(self):
+        """Reclama y envía un lote. Devuelve cuántas filas se reclamaron"""
+        with self.app.app_context():
+            filas = self._reclamar()
+            if not filas:
+                return 0
+            fallos = {}  # id -> (error, permanente)
+            mensajes = self._renderizar(filas, fallos)
+
+            enviados = []
+            pendientes = [fila for fila in filas if fila['id'] in mensajes]
+            for i, fila in enumerate(pendientes):
+                try:
+                    self._enviar(mensajes[fila['id']])
+                    enviados.append(fila['id'])
+                except _ErrorPermanente as e:
+                    fallos[fila['id']] = (str(e), True)
+                except (smtplib.SMTPException, OSError) as e:
+                    # Conexión rota o error temporal: el resto del lote se reintenta más tarde
+                    self._cerrar()
+                    for resto in pendientes[i:]:
+                        fallos[resto['id']] = (str(e) or type(e).__name__, False)
+                    break
+
+            self._registrar(filas, enviados, fallos)
+            return len(filas)
+
+    def _registrar(self, filas, enviados, fallos):
+        o = Outbox.__table__
+        ahora = datetime.utcnow()
+        por_id = {fila['id']: fila for fila in filas}
+        definitivos = set()
+        with self.db.engine.begin() as conn:
+            if enviados:
+                conn.execute(sa.update(o).where(o.c.id.in_(enviados)).values(
+                    estado='enviado', enviado_en=ahora, intentos=o.c.intentos + 1,
+                    reclamado_por=None, reclamado_hasta=None, ultimo_error=None))
+            for id_, (error, permanente) in fallos.items():
+                intentos = por_id[id_]['intentos'] + 1
+                definitivo = permanente or intentos >= self.max_attempts
+                if definitivo:
+                    definitivos.add(id_)
+                espera = min(self.backoff_base * 2 ** (intentos - 1), self.backoff_max)
+                conn.execute(sa.update(o).where(o.c.id == id_).values(
+                    estado='fallido' if definitivo else 'pendiente',
+                    intentos=intentos,
+                    proximo_intento=ahora + timedelta(seconds=espera * random.uniform(0.8, 1.2)),
+                    reclamado_por=None, reclamado_hasta=None,
+                    ultimo_error=error[:500]))
+
+        for fila in filas:
+            if fila['id'] in fallos:
+                resultado = 'fallido' if fila['id'] in definitivos else 'reintento'
+            else:
+                resultado = 'enviado'
+            metrics.inc('mail_messages_total', (('tipo', fila['tipo']), ('result', resultado)))
+        if fallos:
+            logger.warning(f"Correo: {len(enviados)} enviados, {len(fallos)} con error ({next(iter(fallos.values()))[0]})")
+
+    def _purgar(self, janitor):
+        o = Outbox.__table__
+        limite = datetime.utcnow() - timedelta(days=self.retention_days)
+        return borrar_por_lotes(self.db.engine, o, sa.and_(o.c.estado == 'enviado', o.c.enviado_en < limite),
+                                janitor.batch_size, janitor.batch_pause)
+
+    # ----- Hilo -----
+
+    def start(self):
+        if not self.enabled or self._hilo is not None:
+            return
+        self._hilo = _SenderThread(self)
+        self._hilo.start()
+
+    def stop(self):
+        if self._hilo is not None:
+            self._hilo.stop(timeout=self.timeout + 5)
+            self._hilo = None
+
+    def after_fork(self):
+        """El hilo y la conexión SMTP no sobreviven al fork: cada worker abre los suyos"""
+        self._hilo = None
+        self._smtp = None
+        self.start()
@@ -0,0 +1,274 @@
+"""
+Métricas de la aplicación en formato de texto de Prometheus.
+
+Se registran por petición la latencia por endpoint (histograma), los códigos
+de estado, las peticiones en curso y el número y tiempo de sentencias SQL
+(eventos de SQLAlchemy); además, el tiempo de bcrypt, los bytes subidos,
+las tareas del janitor, los recordatorios y el correo saliente.
+
+Para que pueda quedarse activo en producción, cada hilo escribe en su propio
+fragmento (sin locks en el camino de la petición). Solo al servir ``/metrics``
+se suman los fragmentos de todos los hilos. Cuando un hilo termina (el
+servidor de desarrollo crea uno por petición) su fragmento se suma a uno
+común de hilos retirados, así que la lista no crece con las peticiones.
+
+``/metrics`` exige una sesión de administrador o, para el scraper de
+Prometheus, la cabecera ``Authorization: Bearer <[METRICS] token>``.
+"""
+
+import bisect
+import contextvars
+import hmac
+import threading
+import time
+import weakref
+
+import sqlalchemy as sa
+from flask import Response, jsonify, request
+
+PREFIJO = 'reclutas_'
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SENTENCIAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# nombre -> (tipo, ayuda, buckets)
+DEFINICIONES = {
+    'http_requests_total': ('counter', 'Peticiones HTTP por endpoint, método y estado', None),
+    'http_request_duration_seconds': ('histogram', 'Latencia de las peticiones HTTP', BUCKETS_SEGUNDOS),
+    'http_requests_in_flight': ('gauge', 'Peticiones HTTP en curso', None),
+    'sql_statements_per_request': ('histogram', 'Sentencias SQL ejecutadas por petición', BUCKETS_SENTENCIAS),
+    'sql_duration_seconds_per_request': ('histogram', 'Tiempo de SQL por petición', BUCKETS_SEGUNDOS),
+    'sql_statements_total': ('counter', 'Sentencias SQL ejecutadas (incluye hilos de fondo)', None),
+    'sql_duration_seconds_total': ('counter', 'Tiempo total en sentencias SQL', None),
+    'bcrypt_operations_total': ('counter', 'Operaciones bcrypt', None),
+    'bcrypt_seconds_total': ('counter', 'Tiempo total en bcrypt', None),
+    'upload_bytes_total': ('counter', 'Bytes de archivos subidos', None),
+    'janitor_job_duration_seconds': ('histogram', 'Duración de las tareas periódicas del janitor', BUCKETS_SEGUNDOS),
+    'janitor_job_runs_total': ('counter', 'Ejecuciones de tareas del janitor por resultado', None),
+    'janitor_rows_deleted_total': ('counter', 'Filas borradas por las tareas del janitor', None),
+    'reminders_sent_total': ('counter', 'Recordatorios de entrevista enviados', None),
+    'mail_messages_total': ('counter', 'Correos procesados por tipo y resultado', None),
+    'mail_smtp_connections_total': ('counter', 'Conexiones SMTP abiertas', None),
+    'batch_subrequests_total': ('counter', 'Sub-peticiones de /api/batch por endpoint y estado', None),
+    'uploads_gc_bytes_total': ('counter', 'Bytes de archivos subidos huérfanos retirados', None),
+}
+
+# Acumulador de la petición en curso: [sentencias, segundos]
+_sql_peticion = contextvars.ContextVar('metrics_sql', default=None)
+
+
+class _Fragmento:
+    """Valores de un hilo. Solo ese hilo escribe en él"""
+    __slots__ = ('contadores', 'histogramas')
+
+    def __init__(self):
+        self.contadores = {}
+        self.histogramas = {}
+
+    def sumar(self, otro):
+        # copy() es atómica con el GIL: el hilo dueño de ``otro`` puede seguir escribiendo
+        for clave, valor in otro.contadores.copy().items():
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+        for clave, (conteos, suma, total) in otro.histogramas.copy().items():
+            acumulado = self.histogramas.get(clave)
+            if acumulado is None:
+                self.histogramas[clave] = [list(conteos), suma, total]
+            else:
+                acumulado[0] = [a + b for a, b in zip(acumulado[0], conteos)]
+                acumulado[1] += suma
+                acumulado[2] += total
+
+
+class _Testigo:
+    """Vive en el threading.local del hilo: se libera cuando el hilo termina"""
+    __slots__ = ('fragmento', '__weakref__')
+
+    def __init__(self, fragmento):
+        self.fragmento = fragmento
+
+
+class Metrics:
+    """Registro de métricas con un fragmento por hilo"""
+
+    def __init__(self, app=None, db=None):
+        self.enabled = False
+        self.token = ''
+        self._local = threading.local()
+        self._fragmentos = []
+        self._retirados = _Fragmento()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.token = app.config.get('METRICS_TOKEN', '')
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.vista)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                sa.event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                sa.event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    # ----- Registro -----
+
+    def _fragmento(self):
+        testigo = getattr(self._local, 'testigo', None)
+        if testigo is None:
+            fragmento = _Fragmento()
+            testigo = self._local.testigo = _Testigo(fragmento)
+            with self._lock:
+                self._fragmentos.append(fragmento)
+            weakref.finalize(testigo, self._retirar, fragmento)
+        return testigo.fragmento
+
+    def _retirar(self, fragmento):
+        """El hilo terminó: sus valores pasan al fragmento de retirados"""
+        with self._lock:
+            self._fragmentos.remove(fragmento)
+            self._retirados.sumar(fragmento)
+
+    def inc(self, nombre, etiquetas=(), valor=1):
+        if not self.enabled:
+            return
+        contadores = self._fragmento().contadores
+        clave = (nombre, etiquetas)
+        contadores[clave] = contadores.get(clave, 0) + valor
+
+    def observe(self, nombre, valor, etiquetas=()):
+        if not self.enabled:
+            return
+        histogramas = self._fragmento().histogramas
+        clave = (nombre, etiquetas)
+        datos = histogramas.get(clave)
+        if datos is None:
+            # [conteos por bucket (+Inf al final), suma, total]
+            datos = histogramas[clave] = [[0] * (len(DEFINICIONES[nombre][2]) + 1), 0.0, 0]
+        datos[0][bisect.bisect_left(DEFINICIONES[nombre][2], valor)] += 1
+        datos[1] += valor
+        datos[2] += 1
+
+    def observe_bcrypt(self, operacion, segundos):
+        etiquetas = (('operation', operacion),)
+        self.inc('bcrypt_operations_total', etiquetas)
+        self.inc('bcrypt_seconds_total', etiquetas, segundos)
+
+    def observe_upload(self, tipo, num_bytes):
+        self.inc('upload_bytes_total', (('tipo', tipo),), num_bytes)
+
+    # ----- Hooks de petición -----
+
+    def _before_request(self):
+        etiquetas = (('endpoint', request.endpoint or 'sin_ruta'),)
+        request.environ['metrics.inicio'] = time.perf_counter()
+        request.environ['metrics.sql_token'] = _sql_peticion.set([0, 0.0])
+        self.inc('http_requests_in_flight', etiquetas)
+
+    def _after_request(self, response):
+        inicio = request.environ.get('metrics.inicio')
+        if inicio is None:
+            return response
+        endpoint = request.endpoint or 'sin_ruta'
+        self.observe('http_request_duration_seconds', time.perf_counter() - inicio,
+                     (('endpoint', endpoint), ('method', request.method)))
+        self.inc('http_requests_total',
+                 (('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))))
+        sql = _sql_peticion.get()
+        if sql is not None:
+            self.observe('sql_statements_per_request', sql[0], (('endpoint', endpoint),))
+            self.observe('sql_duration_seconds_per_request', sql[1], (('endpoint', endpoint),))
+        return response
+
+    def _teardown_request(self, exc):
+        token = request.environ.pop('metrics.sql_token', None)
+        if token is None:
+            return
+        _sql_peticion.reset(token)
+        self.inc('http_requests_in_flight', (('endpoint', request.endpoint or 'sin_ruta'),), -1)
+
+    # ----- Eventos de SQLAlchemy -----
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_inicio', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        pila = conn.info.get('metrics_inicio')
+        if not pila:
+            return
+        duracion = time.perf_counter() - pila.pop()
+        self.inc('sql_statements_total')
+        self.inc('sql_duration_seconds_total', (), duracion)
+        sql = _sql_peticion.get()
+        if sql is not None:
+            sql[0] += 1
+            sql[1] += duracion
+
+    # ----- Exposición -----
+
+    def _agregar(self):
+        total = _Fragmento()
+        # Con el lock: un fragmento no se cuenta dos veces si su hilo termina a mitad
+        with self._lock:
+            total.sumar(self._retirados)
+            for fragmento in self._fragmentos:
+                total.sumar(fragmento)
+        return total.contadores, total.histogramas
+
+    def render(self):
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+        contadores, histogramas = self._agregar()
+        lineas = []
+        for nombre, (tipo, ayuda, buckets) in DEFINICIONES.items():
+            completo = PREFIJO + nombre
+            lineas.append(f"# HELP {completo} {ayuda}")
+            lineas.append(f"# TYPE {completo} {tipo}")
+            if tipo == 'histogram':
+                for (n, etiquetas), (conteos, suma, total) in sorted(histogramas.items()):
+                    if n != nombre:
+                        continue
+                    acumulado = 0
+                    for limite, conteo in zip(buckets + (float('inf'),), conteos):
+                        acumulado += conteo
+                        le = '+Inf' if limite == float('inf') else repr(float(limite))
+                        lineas.append(f"{completo}_bucket{_etiquetas(etiquetas + (('le', le),))} {acumulado}")
+                    lineas.append(f"{completo}_sum{_etiquetas(etiquetas)} {suma!r}")
+                    lineas.append(f"{completo}_count{_etiquetas(etiquetas)} {total}")
+            else:
+                for (n, etiquetas), valor in sorted(contadores.items()):
+                    if n == nombre:
+                        lineas.append(f"{completo}{_etiquetas(etiquetas)} {valor!r}")
+        return '\n'.join(lineas) + '\n'
+
+    def vista(self):
+        """GET /metrics: solo administradores o scraper con token"""
+        autorizacion = request.headers.get('Authorization', '')
+        con_token = (self.token and autorizacion.startswith('Bearer ')
+                     and hmac.compare_digest(autorizacion[7:].strip(), self.token))
+        if not con_token:
+            from flask_login import current_user
+            if not current_user.is_authenticated:
+                return jsonify({"error": "No autorizado"}), 401
+            if not getattr(current_user, 'is_admin', False):
+                return jsonify({"error": "Acceso prohibido"}), 403
+        return Response(self.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + '}'
+
+
+# Instancia única: models.py la usa para bcrypt y app.py la liga a la app
+metrics = Metrics()
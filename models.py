@@ -1,12 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
-from flask_login import UserMixin
 import bcrypt
 import secrets
 import os
 import re
+import time
 
-db = SQLAlchemy()
+from db_routing import RoutingSession
+from metrics import metrics
+
+# La sesión enruta las lecturas al engine de solo lectura cuando corresponde
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Recluta(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -18,15 +22,19 @@ class Recluta(db.Model):
     notas = db.Column(db.Text, nullable=True)
     foto_url = db.Column(db.String(255), nullable=True)
     fecha_registro = db.Column(db.DateTime, default=datetime.utcnow)
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relación con entrevistas
     entrevistas = db.relationship('Entrevista', backref='recluta', lazy=True, cascade="all, delete-orphan")
+    
+    # AUTOINCREMENT: un id archivado o borrado no se vuelve a asignar (ver archivo.py)
+    __table_args__ = {'sqlite_autoincrement': True}
 
     def __repr__(self):
         return f'<Recluta {self.nombre}>'
 
     def serialize(self):
+        # Las fechas se entregan como datetime; el proveedor JSON les da formato
         return {
             'id': self.id,
             'nombre': self.nombre,
@@ -36,8 +44,8 @@ class Recluta(db.Model):
             'puesto': self.puesto,
             'notas': self.notas,
             'foto_url': self.foto_url,
-            'fecha_registro': self.fecha_registro.strftime('%Y-%m-%d %H:%M:%S') if self.fecha_registro else None,
-            'last_updated': self.last_updated.strftime('%Y-%m-%d %H:%M:%S') if self.last_updated else None
+            'fecha_registro': self.fecha_registro,
+            'last_updated': self.last_updated
         }
 
     @staticmethod
@@ -46,7 +54,7 @@ class Recluta(db.Model):
         pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         return re.match(pattern, email) is not None
 
-class Usuario(db.Model, UserMixin):
+class Usuario(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(100), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
@@ -65,7 +73,18 @@ class Usuario(db.Model, UserMixin):
     
     MAX_FAILED_ATTEMPTS = 5
     LOCKOUT_DURATION = timedelta(minutes=15)
-    
+
+    # Interfaz de Flask-Login (la de UserMixin), sin importar flask_login:
+    # los comandos de consola cargan los modelos pero no el login
+    is_anonymous = False
+
+    @property
+    def is_authenticated(self):
+        return True
+
+    def get_id(self):
+        return str(self.id)
+
     @property
     def password(self):
         raise AttributeError('La contraseña no es un atributo legible')
@@ -77,7 +96,9 @@ class Usuario(db.Model, UserMixin):
             raise ValueError("La contraseña debe tener al menos 8 caracteres")
             
         # Genera un hash seguro de la contraseña
+        inicio = time.perf_counter()
         self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        metrics.observe_bcrypt('hash', time.perf_counter() - inicio)
     
     def check_password(self, password):
         # Si la cuenta está bloqueada, verificar si ya pasó el tiempo
@@ -85,7 +106,9 @@ class Usuario(db.Model, UserMixin):
             return False
             
         # Verificar la contraseña
+        inicio = time.perf_counter()
         is_valid = bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        metrics.observe_bcrypt('check', time.perf_counter() - inicio)
         
         # Actualizar contadores de intentos fallidos
         if is_valid:
@@ -124,8 +147,8 @@ class Usuario(db.Model, UserMixin):
             "telefono": self.telefono,
             "foto_url": self.foto_url,
             "is_admin": self.is_admin,
-            "created_at": self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
-            "last_login": self.last_login.strftime('%Y-%m-%d %H:%M:%S') if self.last_login else None
+            "created_at": self.created_at,
+            "last_login": self.last_login
         }
     
     def __repr__(self):
@@ -139,9 +162,14 @@ class UserSession(db.Model):
     session_token = db.Column(db.String(100), nullable=False, unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_activity = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     is_valid = db.Column(db.Boolean, default=True)
     
+    __table_args__ = (
+        # Índice parcial: solo las sesiones invalidadas, que son las que borra el janitor
+        db.Index('ix_user_session_invalidas', 'id', sqlite_where=db.text('is_valid = 0')),
+    )
+    
     @property
     def is_expired(self):
         return datetime.utcnow() > self.expires_at if self.expires_at else True
@@ -170,7 +198,7 @@ class UserSession(db.Model):
 
 class Entrevista(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    recluta_id = db.Column(db.Integer, db.ForeignKey('recluta.id'), nullable=False)
+    recluta_id = db.Column(db.Integer, db.ForeignKey('recluta.id'), nullable=False, index=True)
     fecha = db.Column(db.Date, nullable=False)
     hora = db.Column(db.String(10), nullable=False)  # Formato "HH:MM"
     duracion = db.Column(db.Integer, default=60)  # Duración en minutos
@@ -181,6 +209,14 @@ class Entrevista(db.Model):
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     codigo_acceso = db.Column(db.String(20), nullable=True)  # Código único para acceso a la entrevista
     recordatorio_enviado = db.Column(db.Boolean, default=False)  # Flag para controlar envío de recordatorios
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        # Ventana de recordatorios: entrevistas pendientes por fecha y hora
+        db.Index('ix_entrevista_estado_fecha_hora', 'estado', 'fecha', 'hora'),
+        # AUTOINCREMENT, como en Recluta
+        {'sqlite_autoincrement': True},
+    )
     
     def __init__(self, **kwargs):
         super(Entrevista, self).__init__(**kwargs)
@@ -193,7 +229,7 @@ class Entrevista(db.Model):
             'id': self.id,
             'recluta_id': self.recluta_id,
             'recluta_nombre': self.recluta.nombre if self.recluta else None,
-            'fecha': self.fecha.isoformat() if self.fecha else None,
+            'fecha': self.fecha,
             'hora': self.hora,
             'duracion': self.duracion,
             'tipo': self.tipo,
@@ -201,16 +237,139 @@ class Entrevista(db.Model):
             'notas': self.notas,
             'estado': self.estado,
             'fecha_creacion': self.fecha_creacion.isoformat() if self.fecha_creacion else None,
-            'codigo_acceso': self.codigo_acceso if self.tipo == 'virtual' else None
+            'codigo_acceso': self.codigo_acceso if self.tipo == 'virtual' else None,
+            'last_updated': self.last_updated
         }
     
     def __repr__(self):
         return f'<Entrevista {self.id}>'
 
+# Reclutas cerrados hace tiempo y sus entrevistas, fuera de las tablas activas (ver archivo.py).
+# Mismas columnas que Recluta y Entrevista (una columna nueva allí hay que añadirla también
+# aquí), sin claves foráneas y con los ids originales
+class ReclutaArchivo(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    nombre = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(100), nullable=False)
+    telefono = db.Column(db.String(20), nullable=False)
+    estado = db.Column(db.String(20), nullable=False)
+    puesto = db.Column(db.String(100), nullable=True)
+    notas = db.Column(db.Text, nullable=True)
+    foto_url = db.Column(db.String(255), nullable=True)
+    fecha_registro = db.Column(db.DateTime)
+    last_updated = db.Column(db.DateTime)
+    archivado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<ReclutaArchivo {self.nombre}>'
+
+class EntrevistaArchivo(db.Model):
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    recluta_id = db.Column(db.Integer, nullable=False, index=True)
+    fecha = db.Column(db.Date, nullable=False)
+    hora = db.Column(db.String(10), nullable=False)
+    duracion = db.Column(db.Integer)
+    tipo = db.Column(db.String(20))
+    ubicacion = db.Column(db.String(200))
+    notas = db.Column(db.Text)
+    estado = db.Column(db.String(20))
+    fecha_creacion = db.Column(db.DateTime)
+    codigo_acceso = db.Column(db.String(20), nullable=True)
+    recordatorio_enviado = db.Column(db.Boolean)
+    last_updated = db.Column(db.DateTime)
+    archivado_en = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<EntrevistaArchivo {self.id}>'
+
+# Resúmenes diarios para las tendencias de /api/estadisticas/tendencia (ver rollups.py).
+# Las claves vacías se guardan como '' (no NULL) para que ON CONFLICT las encuentre
+class ResumenReclutas(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, nullable=False)
+    estado = db.Column(db.String(20), nullable=False)
+    puesto = db.Column(db.String(100), nullable=False, default='')
+    cambio = db.Column(db.Integer, nullable=False, default=0)  # altas menos bajas de ese día
+    
+    __table_args__ = (
+        db.UniqueConstraint('dia', 'estado', 'puesto', name='uq_resumen_reclutas'),
+    )
+    
+    def __repr__(self):
+        return f'<ResumenReclutas {self.dia} {self.estado} {self.puesto}>'
+
+class ResumenEntrevistas(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    dia = db.Column(db.Date, nullable=False)  # fecha de la entrevista
+    estado = db.Column(db.String(20), nullable=False)
+    tipo = db.Column(db.String(20), nullable=False, default='')
+    total = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.UniqueConstraint('dia', 'estado', 'tipo', name='uq_resumen_entrevistas'),
+    )
+    
+    def __repr__(self):
+        return f'<ResumenEntrevistas {self.dia} {self.estado} {self.tipo}>'
+
+# Cola persistente de correo saliente (ver mail_queue.py)
+class Outbox(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(30), nullable=False)  # plantilla: invitacion, recordatorio
+    destinatario = db.Column(db.String(100), nullable=False)
+    contexto = db.Column(db.Text, nullable=False)  # JSON con las variables de la plantilla
+    estado = db.Column(db.String(20), nullable=False, default='pendiente')  # pendiente, enviando, enviado, fallido
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    proximo_intento = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    reclamado_por = db.Column(db.String(32), nullable=True)
+    reclamado_hasta = db.Column(db.DateTime, nullable=True)
+    ultimo_error = db.Column(db.String(500), nullable=True)
+    creado = db.Column(db.DateTime, default=datetime.utcnow)
+    enviado_en = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index('ix_outbox_estado_proximo', 'estado', 'proximo_intento'),
+        db.Index('ix_outbox_estado_enviado', 'estado', 'enviado_en'),
+    )
+    
+    def __repr__(self):
+        return f'<Outbox {self.tipo} {self.destinatario} {self.estado}>'
+
+# Eventos del feed de cambios con [CHANGE_FEED] relay = sqlite (ver change_feed.py)
+class ChangeEvent(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(30), nullable=False)  # recluta, entrevista
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # create, update, delete
+    last_updated = db.Column(db.String(32), nullable=True)
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    # AUTOINCREMENT: los ids no se reutilizan tras purgar, Last-Event-ID sigue siendo válido
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    def __repr__(self):
+        return f'<ChangeEvent {self.entity} {self.entity_id} {self.op}>'
+
+# Registros borrados, para informar de las bajas en la sincronización incremental (ver delta_sync.py)
+class Tombstone(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(30), nullable=False)  # recluta, entrevista
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_tombstone_entity_deleted_at', 'entity', 'deleted_at'),
+        # Purga por antigüedad del janitor
+        db.Index('ix_tombstone_deleted_at', 'deleted_at'),
+    )
+    
+    def __repr__(self):
+        return f'<Tombstone {self.entity} {self.entity_id}>'
+
 # Modelo para auditoría
 class AuditLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=True)
     ip_address = db.Column(db.String(45), nullable=True)
     action = db.Column(db.String(255), nullable=False)
@@ -232,5 +391,16 @@ class AuditLog(db.Model):
         db.session.add(log_entry)
         db.session.commit()
     
+    @staticmethod
+    def log_lote(entradas):
+        """
+        Inserta varias entradas (dicts con las columnas de log) en un solo
+        executemany, dentro de la transacción en curso: no hace commit.
+        """
+        if not entradas:
+            return
+        ahora = datetime.utcnow()
+        db.session.execute(db.insert(AuditLog.__table__), [{'timestamp': ahora, **entrada} for entrada in entradas])
+    
     def __repr__(self):
         return f'<AuditLog {self.action}>'
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+Perfilado bajo demanda de peticiones concretas.
+
+Un administrador activa el perfilado de una sola petición con:
+    ?_profile=cprofile | ?_profile=sample      (con sesión de administrador)
+    X-Profile: <token firmado>                 (sin sesión, p. ej. con curl)
+
+El token se genera con ``python admin_tools.py --profile-token`` y está
+firmado con la SECRET_KEY (caduca según ``[PROFILING] token_max_age``).
+
+Modos:
+    cprofile -- cProfile del hilo de la petición, guardado como .pstats
+    sample   -- muestreo de la pila cada ``sample_interval_ms``, guardado en
+                formato speedscope (.speedscope.json, https://www.speedscope.app).
+                La resolución real la limita el cambio de hilo del GIL
+                (``sys.getswitchinterval()``, 5 ms): útil en peticiones largas.
+
+Los perfiles se guardan en ``[PROFILING] dir`` y se borran los más antiguos
+por encima de ``max_files``. La respuesta incluye la cabecera
+``X-Profile-File`` con el nombre del archivo.
+
+Las peticiones sin la marca solo pagan una consulta a ``request.args`` y otra
+a ``request.headers``.
+"""
+
+import cProfile
+import glob
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+logger = logging.getLogger(__name__)
+
+PARAMETRO = '_profile'
+CABECERA = 'X-Profile'
+MODOS = ('cprofile', 'sample')
+SALT = 'request-profile'
+
+
+def generar_token(secret_key, modo='cprofile'):
+    """Token firmado para la cabecera X-Profile"""
+    return URLSafeTimedSerializer(secret_key, salt=SALT).dumps({'modo': modo})
+
+
+def listar_perfiles(directorio):
+    """Perfiles guardados, del más reciente al más antiguo"""
+    perfiles = []
+    for ruta in glob.glob(os.path.join(directorio, '*')):
+        if not (ruta.endswith('.pstats') or ruta.endswith('.speedscope.json')):
+            continue
+        estado = os.stat(ruta)
+        perfiles.append({
+            'nombre': os.path.basename(ruta),
+            'ruta': ruta,
+            'bytes': estado.st_size,
+            'fecha': datetime.fromtimestamp(estado.st_mtime),
+        })
+    perfiles.sort(key=lambda p: p['fecha'], reverse=True)
+    return perfiles
+
+
+class _Muestreador(threading.Thread):
+    """Toma la pila de un hilo cada ``intervalo`` segundos (formato speedscope)"""
+
+    def __init__(self, hilo_id, intervalo):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.frames = []
+        self.indices = {}
+        self.muestras = []
+        self.pesos = []
+        self._stop_event = threading.Event()
+
+    def _indice(self, codigo, linea):
+        clave = (codigo.co_name, codigo.co_filename, linea)
+        indice = self.indices.get(clave)
+        if indice is None:
+            indice = self.indices[clave] = len(self.frames)
+            self.frames.append({'name': codigo.co_name, 'file': codigo.co_filename, 'line': linea})
+        return indice
+
+    def run(self):
+        anterior = time.perf_counter()
+        while not self._stop_event.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            ahora = time.perf_counter()
+            if frame is None:
+                break
+            pila = []
+            while frame is not None:
+                pila.append(self._indice(frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            pila.reverse()
+            self.muestras.append(pila)
+            self.pesos.append((ahora - anterior) * 1000)
+            anterior = ahora
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def speedscope(self, nombre):
+        total = sum(self.pesos)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': nombre,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': total,
+                'samples': self.muestras,
+                'weights': self.pesos,
+            }],
+            'name': nombre,
+            'activeProfileIndex': 0,
+            'exporter': 'reclutas-profiling',
+        }
+
+
+class RequestProfiler:
+    """
+    Extensión de perfilado bajo demanda.
+
+    Configuración (app.config):
+        PROFILING_ENABLED             -- registra los hooks
+        PROFILING_DIR                 -- directorio de perfiles
+        PROFILING_MAX_FILES           -- perfiles que se conservan
+        PROFILING_SAMPLE_INTERVAL_MS  -- intervalo del modo sample
+        PROFILING_TOKEN_MAX_AGE       -- validez del token X-Profile (segundos)
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.directorio = 'profiles'
+        self.max_files = 50
+        self.intervalo = 0.001
+        self.token_max_age = 3600
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PROFILING_ENABLED', True)
+        self.directorio = app.config.get('PROFILING_DIR', 'profiles')
+        self.max_files = app.config.get('PROFILING_MAX_FILES', 50)
+        self.intervalo = app.config.get('PROFILING_SAMPLE_INTERVAL_MS', 1) / 1000.0
+        self.token_max_age = app.config.get('PROFILING_TOKEN_MAX_AGE', 3600)
+        app.extensions['profiling'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _modo_solicitado(self):
+        """Devuelve el modo si la petición pide perfilado y está autorizada, si no None"""
+        token = request.headers.get(CABECERA)
+        if token:
+            serializer = URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=SALT)
+            try:
+                datos = serializer.loads(token, max_age=self.token_max_age)
+            except BadSignature:
+                logger.warning(f"Token de perfilado inválido desde {request.remote_addr}")
+                return None
+            modo = datos.get('modo', 'cprofile')
+        else:
+            modo = request.args.get(PARAMETRO) or 'cprofile'
+            # Aquí y no arriba: admin_tools.py importa este módulo sin Flask-Login
+            from flask_login import current_user
+            if not (current_user.is_authenticated and getattr(current_user, 'is_admin', False)):
+                return None
+        return modo if modo in MODOS else 'cprofile'
+
+    def _before_request(self):
+        # Camino rápido: sin marca no se hace nada más
+        if PARAMETRO not in request.args and CABECERA not in request.headers:
+            return
+        modo = self._modo_solicitado()
+        if modo is None:
+            return
+
+        if modo == 'sample':
+            perfilador = _Muestreador(threading.get_ident(), self.intervalo)
+            perfilador.start()
+        else:
+            perfilador = cProfile.Profile()
+            perfilador.enable()
+        request.environ['profiling'] = (modo, perfilador, time.perf_counter())
+
+    def _detener(self):
+        datos = request.environ.pop('profiling', None)
+        if datos is None:
+            return None
+        modo, perfilador, inicio = datos
+        if modo == 'sample':
+            perfilador.stop()
+        else:
+            perfilador.disable()
+        return modo, perfilador, time.perf_counter() - inicio
+
+    def _after_request(self, response):
+        datos = self._detener()
+        if datos is None:
+            return response
+        try:
+            nombre = self._guardar(*datos)
+            response.headers['X-Profile-File'] = nombre
+        except Exception as e:
+            logger.error(f"Error al guardar el perfil: {str(e)}")
+        return response
+
+    def _teardown_request(self, exc):
+        # Si no se llegó a after_request (excepción no gestionada), parar sin guardar
+        self._detener()
+
+    def _guardar(self, modo, perfilador, duracion):
+        os.makedirs(self.directorio, exist_ok=True)
+        endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', request.endpoint or 'sin_ruta')
+        base = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{request.method}_{endpoint}_{duracion * 1000:.0f}ms"
+        titulo = f"{request.method} {request.full_path.rstrip('?')}"
+
+        if modo == 'sample':
+            nombre = f"{base}.speedscope.json"
+            with open(os.path.join(self.directorio, nombre), 'w') as f:
+                json.dump(perfilador.speedscope(titulo), f)
+        else:
+            nombre = f"{base}.pstats"
+            perfilador.dump_stats(os.path.join(self.directorio, nombre))
+
+        logger.info(f"Perfil guardado: {nombre} ({titulo})")
+        self._limpiar()
+        return nombre
+
+    def _limpiar(self):
+        with self._lock:
+            for perfil in listar_perfiles(self.directorio)[self.max_files:]:
+                try:
+                    os.remove(perfil['ruta'])
+                except OSError:
+                    pass
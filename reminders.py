@@ -0,0 +1,230 @@
+"""
+Recordatorios de entrevistas.
+
+Se mantiene en memoria un montículo (heap) con las entrevistas pendientes cuyo
+recordatorio vence pronto: vence ``[REMINDERS] lead_hours`` antes del inicio
+y solo se guardan las que vencen dentro de ``horizon`` segundos.
+
+    - Carga: una consulta por rango sobre el índice (estado, fecha, hora) que
+      solo lee la ventana de fechas próxima, nunca la tabla entera. Se repite
+      cada ``reload_interval`` segundos para recoger los cambios hechos por
+      otros procesos.
+    - Cambios: los handlers de crear/actualizar/eliminar entrevista llaman a
+      ``programar`` y ``cancelar``, que actualizan el montículo al momento
+      si este proceso es el líder del janitor. En los demás procesos no hacen
+      nada: nadie sacaría nunca esas entradas; la recarga las lleva al líder.
+    - Tick: es una tarea del janitor (un solo proceso la ejecuta). Solo saca
+      del montículo lo vencido; no consulta la base de datos si no hay nada.
+    - Envío: por lotes de ``batch_size``. En una transacción se comprueba que
+      siguen pendientes, sin recordatorio y que vencen ya según la fecha y
+      hora de la fila (otro proceso pudo moverla sin tocar este montículo; si
+      aún no vence vuelve al montículo), se marca ``recordatorio_enviado``
+      con un único UPDATE y se llama a los destinos registrados con
+      ``@reminders.destino``. Si un destino falla, la transacción se deshace y
+      el recordatorio vuelve en la siguiente recarga. Tras el COMMIT se llama
+      a su ``despues`` (p. ej. despertar el hilo de la cola de correo).
+
+Tras un reinicio el estado se reconstruye con la primera recarga: la bandera
+``recordatorio_enviado`` en la base de datos es la única fuente de verdad.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from metrics import metrics
+from models import Entrevista, Recluta
+
+logger = logging.getLogger(__name__)
+
+
+def _inicio(fecha, hora):
+    return datetime.combine(fecha, datetime.strptime(hora, '%H:%M').time())
+
+
+class ReminderScheduler:
+    """
+    Extensión de recordatorios.
+
+    Configuración (app.config):
+        REMINDERS_ENABLED          -- registra la tarea en el janitor
+        REMINDERS_LEAD_HOURS       -- horas de antelación del recordatorio
+        REMINDERS_TICK             -- segundos entre ticks
+        REMINDERS_HORIZON          -- segundos por delante que se mantienen en memoria
+        REMINDERS_RELOAD_INTERVAL  -- segundos entre recargas de la ventana
+        REMINDERS_BATCH_SIZE       -- recordatorios por transacción
+    """
+
+    def __init__(self, app=None, db=None, janitor=None):
+        self.db = None
+        self.janitor = None
+        self.enabled = False
+        self.antelacion = timedelta(hours=24)
+        self.horizonte = 3600
+        self.recarga = 600
+        self.lote = 100
+        self.destinos = []
+        self._despues = []
+        self._heap = []
+        self._vence = {}
+        self._ultima_recarga = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db, janitor)
+
+    def init_app(self, app, db, janitor):
+        self.db = db
+        self.janitor = janitor
+        self.enabled = app.config.get('REMINDERS_ENABLED', True)
+        self.antelacion = timedelta(hours=app.config.get('REMINDERS_LEAD_HOURS', 24))
+        self.horizonte = app.config.get('REMINDERS_HORIZON', 3600)
+        self.recarga = app.config.get('REMINDERS_RELOAD_INTERVAL', 600)
+        self.lote = app.config.get('REMINDERS_BATCH_SIZE', 100)
+        app.extensions['reminders'] = self
+        if self.enabled:
+            janitor.add_job('recordatorios', app.config.get('REMINDERS_TICK', 30), self._tarea)
+
+    def destino(self, funcion, despues=None):
+        """
+        Registra ``funcion(conn, filas)``; se llama dentro de la transacción
+        del lote. ``despues()`` se llama cuando el lote ya está confirmado.
+        """
+        self.destinos.append(funcion)
+        if despues is not None:
+            self._despues.append(despues)
+        return funcion
+
+    # ----- Montículo -----
+
+    def programar(self, entrevista_id, fecha, hora, estado):
+        """Añade, mueve o quita una entrevista según su estado y fecha"""
+        if not self.enabled or not self.janitor.lider:
+            return
+        try:
+            inicio = _inicio(fecha, hora)
+        except (TypeError, ValueError):
+            self.cancelar(entrevista_id)
+            return
+        ahora = datetime.now()
+        vence = (inicio - self.antelacion).timestamp()
+        if estado != 'pendiente' or inicio <= ahora or vence > ahora.timestamp() + self.horizonte:
+            # Si vence más allá del horizonte la traerá una recarga posterior
+            self.cancelar(entrevista_id)
+            return
+        self._encolar(entrevista_id, vence)
+
+    def _encolar(self, entrevista_id, vence):
+        with self._lock:
+            self._vence[entrevista_id] = vence
+            heapq.heappush(self._heap, (vence, entrevista_id))
+
+    def cancelar(self, entrevista_id):
+        # Borrado perezoso: la entrada del montículo se descarta al salir
+        with self._lock:
+            self._vence.pop(entrevista_id, None)
+
+    def recargar(self):
+        """Reconstruye el montículo con la ventana [ahora, ahora + antelación + horizonte]"""
+        ahora = datetime.now()
+        limite = ahora + self.antelacion + timedelta(seconds=self.horizonte)
+        e = Entrevista.__table__
+        consulta = sa.select(e.c.id, e.c.fecha, e.c.hora).where(
+            e.c.estado == 'pendiente',
+            e.c.fecha.between(ahora.date(), limite.date()),
+            e.c.recordatorio_enviado.isnot(True)
+        )
+        with self.db.engine.connect() as conn:
+            filas = conn.execute(consulta).all()
+
+        vence = {}
+        for fila in filas:
+            try:
+                inicio = _inicio(fila.fecha, fila.hora)
+            except ValueError:
+                continue
+            if ahora < inicio <= limite:
+                vence[fila.id] = (inicio - self.antelacion).timestamp()
+        heap = [(v, i) for i, v in vence.items()]
+        heapq.heapify(heap)
+        with self._lock:
+            self._vence = vence
+            self._heap = heap
+            self._ultima_recarga = time.monotonic()
+        return len(heap)
+
+    def _vencidas(self):
+        ahora = time.time()
+        vencidas = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= ahora:
+                vence, entrevista_id = heapq.heappop(self._heap)
+                if self._vence.get(entrevista_id) == vence:
+                    del self._vence[entrevista_id]
+                    vencidas.append(entrevista_id)
+        return vencidas
+
+    # ----- Envío -----
+
+    def tick(self):
+        """Envía los recordatorios vencidos. Devuelve cuántos se enviaron"""
+        if self._ultima_recarga is None or time.monotonic() - self._ultima_recarga >= self.recarga:
+            self.recargar()
+        vencidas = self._vencidas()
+        enviados = 0
+        for i in range(0, len(vencidas), self.lote):
+            enviados += self._despachar(vencidas[i:i + self.lote])
+        return enviados
+
+    def _despachar(self, ids):
+        e = Entrevista.__table__
+        r = Recluta.__table__
+        consulta = sa.select(
+            e.c.id, e.c.fecha, e.c.hora, e.c.duracion, e.c.tipo, e.c.ubicacion, e.c.codigo_acceso,
+            e.c.recluta_id, r.c.nombre.label('recluta_nombre'), r.c.email.label('recluta_email')
+        ).join(r, r.c.id == e.c.recluta_id).where(
+            e.c.id.in_(ids),
+            e.c.estado == 'pendiente',
+            e.c.recordatorio_enviado.isnot(True)
+        )
+        # Lectura y marca en la misma transacción: otro proceso no puede reclamar el mismo lote
+        with self.db.engine.begin() as conn:
+            filas = [f for f in conn.execute(consulta).mappings() if self._vence_ya(f)]
+            if not filas:
+                return 0
+            conn.execute(sa.update(e).where(e.c.id.in_([f['id'] for f in filas])).values(recordatorio_enviado=True))
+            if self.destinos:
+                for destino in self.destinos:
+                    destino(conn, filas)
+            else:
+                for fila in filas:
+                    logger.info(f"Recordatorio de entrevista ID={fila['id']} para {fila['recluta_email']} "
+                                f"({fila['fecha']} {fila['hora']})")
+        # Fuera del with: el evento 'commit' de SQLAlchemy llega antes del COMMIT real
+        for despues in self._despues:
+            despues()
+        metrics.inc('reminders_sent_total', (), len(filas))
+        return len(filas)
+
+    def _vence_ya(self, fila):
+        """
+        Vencimiento según la fila, no según el montículo: si otro proceso
+        reprogramó la entrevista, la entrada del montículo es la antigua.
+        """
+        try:
+            vence = (_inicio(fila['fecha'], fila['hora']) - self.antelacion).timestamp()
+        except (TypeError, ValueError):
+            return False
+        ahora = time.time()
+        if vence <= ahora:
+            return True
+        if vence <= ahora + self.horizonte:
+            self._encolar(fila['id'], vence)
+        return False
+
+    def _tarea(self, janitor):
+        self.tick()
+        return 0
@@ -0,0 +1,191 @@
+"""
+Resúmenes diarios para las tendencias de reclutamiento.
+
+    resumen_reclutas     -- por día, estado y puesto: altas menos bajas de ese
+                            día. Un recluta que cambia de estado resta en el
+                            anterior y suma en el nuevo, así que los reclutas
+                            en un estado a fecha D son la suma de ``cambio``
+                            hasta D.
+    resumen_entrevistas  -- por fecha de la entrevista, estado y tipo: cuántas
+                            hay.
+
+Los handlers de escritura llaman a ``reclutas`` y ``entrevistas`` dentro de su
+unidad de trabajo: el resumen se confirma en la misma transacción que el
+cambio, con un INSERT ... ON CONFLICT DO UPDATE por clave. Archivar o
+restaurar no cambia los resúmenes (cuentan activos y archivados).
+
+``reconstruir`` los rehace desde las tablas (``admin_tools.py
+--rebuild-rollups``; bootstrap lo hace si están vacíos). Las entrevistas
+quedan exactas. De los reclutas solo se conoce el estado actual, que se
+asigna a su día de registro: los cambios de estado anteriores se pierden.
+
+Las tendencias agrupan por periodo en SQL: se leen como mucho periodos x
+claves filas más una por clave para el saldo anterior al rango.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import Entrevista, EntrevistaArchivo, Recluta, ReclutaArchivo, ResumenEntrevistas, ResumenReclutas
+
+# strftime de SQLite y de Python (mismo significado) y días mínimos por periodo
+PERIODOS = {
+    'dia': ('%Y-%m-%d', 1),
+    'semana': ('%Y-%W', 7),
+    'mes': ('%Y-%m', 28),
+    'anio': ('%Y', 365),
+}
+
+
+class RangoInvalido(ValueError):
+    """Parámetros de tendencia no válidos"""
+
+
+def cambio(antes, despues):
+    """Cambios de una fila que pasa de la clave ``antes`` a ``despues`` (None = no existe)"""
+    if antes == despues:
+        return []
+    return [(clave, n) for clave, n in ((antes, -1), (despues, 1)) if clave is not None]
+
+
+def _registrar(ejecutor, tabla, columnas, valor, cambios):
+    acumulado = Counter()
+    for clave, n in cambios:
+        acumulado[tuple('' if v is None else v for v in clave)] += n
+    filas = [dict(zip(columnas, clave), **{valor: n}) for clave, n in acumulado.items() if n]
+    if not filas:
+        return
+    insert = sqlite_insert(tabla)
+    ejecutor.execute(insert.on_conflict_do_update(
+        index_elements=columnas, set_={valor: tabla.c[valor] + insert.excluded[valor]}
+    ), filas)
+
+
+def reclutas(ejecutor, cambios, dia=None):
+    """Aplica ``cambios`` [((estado, puesto), n), ...] al resumen de hoy"""
+    dia = dia or datetime.utcnow().date()
+    _registrar(ejecutor, ResumenReclutas.__table__, ['dia', 'estado', 'puesto'], 'cambio',
+               (((dia,) + tuple(clave), n) for clave, n in cambios))
+
+
+def entrevistas(ejecutor, cambios):
+    """Aplica ``cambios`` [((fecha, estado, tipo), n), ...]"""
+    _registrar(ejecutor, ResumenEntrevistas.__table__, ['dia', 'estado', 'tipo'], 'total', cambios)
+
+
+def reconstruir(ejecutor):
+    """Vacía y recalcula los dos resúmenes. Devuelve las filas escritas"""
+    filas = 0
+    rr, ren = ResumenReclutas.__table__, ResumenEntrevistas.__table__
+    ejecutor.execute(sa.delete(rr))
+    ejecutor.execute(sa.delete(ren))
+
+    origen = sa.union_all(*(
+        sa.select(sa.func.date(m.fecha_registro).label('dia'), sa.func.coalesce(m.estado, '').label('estado'),
+                  sa.func.coalesce(m.puesto, '').label('puesto'))
+        for m in (Recluta, ReclutaArchivo)
+    )).subquery()
+    filas += ejecutor.execute(sa.insert(rr).from_select(
+        ['dia', 'estado', 'puesto', 'cambio'],
+        sa.select(origen.c.dia, origen.c.estado, origen.c.puesto, sa.func.count())
+        .where(origen.c.dia.isnot(None)).group_by(origen.c.dia, origen.c.estado, origen.c.puesto)
+    )).rowcount
+
+    origen = sa.union_all(*(
+        sa.select(m.fecha.label('dia'), sa.func.coalesce(m.estado, '').label('estado'),
+                  sa.func.coalesce(m.tipo, '').label('tipo'))
+        for m in (Entrevista, EntrevistaArchivo)
+    )).subquery()
+    filas += ejecutor.execute(sa.insert(ren).from_select(
+        ['dia', 'estado', 'tipo', 'total'],
+        sa.select(origen.c.dia, origen.c.estado, origen.c.tipo, sa.func.count())
+        .group_by(origen.c.dia, origen.c.estado, origen.c.tipo)
+    )).rowcount
+    return filas
+
+
+def vacios(ejecutor):
+    return (ejecutor.execute(sa.select(ResumenReclutas.id).limit(1)).first() is None
+            and ejecutor.execute(sa.select(ResumenEntrevistas.id).limit(1)).first() is None)
+
+
+# ----- Tendencias -----
+
+def etiquetas(desde, hasta, periodo, max_puntos):
+    """Periodos entre ``desde`` y ``hasta`` (incluidos) en el formato de strftime"""
+    if periodo not in PERIODOS:
+        raise RangoInvalido(f"periodo debe ser uno de: {', '.join(PERIODOS)}")
+    if hasta < desde:
+        raise RangoInvalido("hasta es anterior a desde")
+    formato, dias = PERIODOS[periodo]
+    if (hasta - desde).days // dias + 1 > max_puntos:
+        raise RangoInvalido(f"Más de {max_puntos} periodos: use un periodo mayor o un rango menor")
+    resultado = {}
+    dia = desde
+    while dia <= hasta:
+        resultado[dia.strftime(formato)] = None
+        dia += timedelta(days=1)
+    return list(resultado)
+
+
+def tendencia_reclutas(ejecutor, desde, hasta, periodo, por, max_puntos):
+    """
+    Reclutas al final de cada periodo por ``por`` (estado o puesto):
+    {'periodos': [...], 'series': {clave: [...]}}
+    """
+    if por not in ('estado', 'puesto'):
+        raise RangoInvalido("por debe ser estado o puesto")
+    periodos = etiquetas(desde, hasta, periodo, max_puntos)
+    t = ResumenReclutas.__table__
+    clave = t.c[por]
+    etiqueta = sa.func.strftime(PERIODOS[periodo][0], t.c.dia)
+
+    saldo = dict(ejecutor.execute(
+        sa.select(clave, sa.func.sum(t.c.cambio)).where(t.c.dia < desde).group_by(clave)
+    ).all())
+    cambios = {}
+    for p, k, n in ejecutor.execute(
+        sa.select(etiqueta, clave, sa.func.sum(t.c.cambio))
+        .where(t.c.dia >= desde, t.c.dia <= hasta).group_by(etiqueta, clave)
+    ):
+        cambios.setdefault(k, {})[p] = n
+
+    series = {}
+    for k in sorted(set(saldo) | set(cambios)):
+        if not k:
+            # Sin puesto (como en distribucion_puestos)
+            continue
+        total = saldo.get(k) or 0
+        serie = []
+        for p in periodos:
+            total += cambios.get(k, {}).get(p, 0)
+            serie.append(total)
+        if any(serie):
+            series[k] = serie
+    return {'periodos': periodos, 'series': series}
+
+
+def tendencia_entrevistas(ejecutor, desde, hasta, periodo, por, max_puntos):
+    """
+    Entrevistas con fecha en cada periodo por ``por`` (estado o tipo):
+    {'periodos': [...], 'series': {clave: [...]}}
+    """
+    if por not in ('estado', 'tipo'):
+        raise RangoInvalido("por debe ser estado o tipo")
+    periodos = etiquetas(desde, hasta, periodo, max_puntos)
+    t = ResumenEntrevistas.__table__
+    clave = t.c[por]
+    etiqueta = sa.func.strftime(PERIODOS[periodo][0], t.c.dia)
+
+    series = {}
+    indice = {p: i for i, p in enumerate(periodos)}
+    for p, k, n in ejecutor.execute(
+        sa.select(etiqueta, clave, sa.func.sum(t.c.total))
+        .where(t.c.dia >= desde, t.c.dia <= hasta).group_by(etiqueta, clave)
+    ):
+        if n:
+            series.setdefault(k, [0] * len(periodos))[indice[p]] = n
+    return {'periodos': periodos, 'series': dict(sorted(series.items()))}
@@ -0,0 +1,307 @@
+"""
+Generación de datos sintéticos a gran escala.
+
+Inserta reclutas, entrevistas, usuarios y sesiones con ``executemany`` en
+lotes grandes sobre una conexión sqlite3, con los PRAGMA relajados durante la
+carga (synchronous=OFF, caché grande, sin autocheckpoint del WAL) y
+restaurados al terminar.
+
+Los datos son deterministas: la misma semilla y la misma fecha de referencia
+producen exactamente las mismas filas.
+
+Las entrevistas siguen una distribución por día realista (más los martes y
+miércoles, casi ninguna en fin de semana) y no se solapan entre sí dentro del
+mismo día, igual que exige la API. Los días que ya tienen entrevistas en la
+base se saltan.
+"""
+
+import logging
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+NOMBRES = ('Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Pedro', 'Sofía', 'Miguel',
+           'Elena', 'Carlos', 'Laura', 'Diego', 'Paula', 'Javier', 'Marta', 'Andrés', 'Rosa', 'Pablo')
+APELLIDOS = ('García', 'López', 'Martínez', 'Sánchez', 'Pérez', 'Gómez', 'Díaz', 'Torres', 'Ruiz', 'Flores',
+             'Hernández', 'Ramírez', 'Morales', 'Ortiz', 'Castro', 'Vargas', 'Romero', 'Navarro')
+PUESTOS = ('Desarrollador', 'Analista', 'Soporte', 'Ventas', 'Operaciones', 'Administración', 'Diseño', '')
+DOMINIOS = ('example.com', 'correo.example', 'mail.example')
+
+# (valor, peso)
+ESTADOS_RECLUTA = (('Activo', 40), ('En proceso', 35), ('Rechazado', 25))
+TIPOS_ENTREVISTA = (('presencial', 50), ('virtual', 40), ('telefonica', 10))
+DURACIONES = ((30, 40), (45, 25), (60, 35))
+# Entrevistas medias por día de la semana (lunes = 0)
+MEDIA_POR_DIA = (6, 8, 8, 7, 5, 0.5, 0.1)
+
+HORA_INICIO = 8 * 60
+HORA_FIN = 18 * 60
+
+LOTE = 50000
+
+
+def _ponderado(rng, opciones):
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos)[0]
+
+
+def _texto_fecha(valor):
+    # Mismo formato que usa SQLAlchemy para DateTime en SQLite
+    return valor.isoformat(' ')
+
+
+def generar_reclutas(rng, primer_id, n, referencia):
+    """Filas de recluta con fechas de registro repartidas en los dos últimos años"""
+    for i in range(n):
+        rid = primer_id + i
+        nombre = rng.choice(NOMBRES)
+        apellido = rng.choice(APELLIDOS)
+        # Más altas recientes que antiguas
+        dias = int(730 * rng.random() ** 1.5)
+        registro = datetime.combine(referencia, dtime()) - timedelta(days=dias, minutes=rng.randrange(1440))
+        actualizado = registro + timedelta(days=rng.randrange(dias + 1))
+        yield (
+            rid,
+            f"{nombre} {apellido} {rng.choice(APELLIDOS)}",
+            f"{nombre.lower()}.{apellido.lower()}{rid}@{rng.choice(DOMINIOS)}",
+            f"55{rng.randrange(10 ** 8):08d}",
+            _ponderado(rng, ESTADOS_RECLUTA),
+            rng.choice(PUESTOS),
+            '',
+            '',
+            _texto_fecha(registro),
+            _texto_fecha(actualizado),
+        )
+
+
+def _horario_del_dia(rng, objetivo):
+    """Horas de inicio y duraciones sin solapamiento entre 08:00 y 18:00"""
+    inicio = HORA_INICIO + rng.choice((0, 0, 30, 60))
+    horario = []
+    while len(horario) < objetivo:
+        duracion = _ponderado(rng, DURACIONES)
+        if inicio + duracion > HORA_FIN:
+            break
+        horario.append((f"{inicio // 60:02d}:{inicio % 60:02d}", duracion))
+        inicio += duracion + rng.choice((0, 0, 15, 15, 30, 60))
+    return horario
+
+
+def generar_entrevistas(rng, primer_id, n, reclutas_ids, referencia, dias_ocupados=()):
+    """
+    Filas de entrevista. Se recorren los días hacia delante hasta colocar
+    ``n`` entrevistas, empezando de forma que ~80% queden en el pasado.
+    """
+    ocupados = set(dias_ocupados)
+    creacion_base = datetime.combine(referencia, dtime())
+    dias_necesarios = n * 7 / sum(MEDIA_POR_DIA)
+    dia = referencia - timedelta(days=int(dias_necesarios * 0.8))
+    eid = primer_id
+    colocadas = 0
+    while colocadas < n:
+        fecha_texto = dia.isoformat()
+        if fecha_texto not in ocupados:
+            media = MEDIA_POR_DIA[dia.weekday()]
+            objetivo = min(n - colocadas, max(0, round(rng.gauss(media, media / 3))))
+            pasada = dia < referencia
+            for hora, duracion in _horario_del_dia(rng, objetivo):
+                if pasada:
+                    estado = _ponderado(rng, (('completada', 75), ('cancelada', 15), ('pendiente', 10)))
+                else:
+                    estado = _ponderado(rng, (('pendiente', 90), ('cancelada', 10)))
+                creacion = min(creacion_base, datetime.combine(dia, dtime())) - timedelta(days=rng.randrange(1, 21))
+                yield (
+                    eid,
+                    rng.choice(reclutas_ids) if isinstance(reclutas_ids, list) else rng.randint(*reclutas_ids),
+                    fecha_texto,
+                    hora,
+                    duracion,
+                    _ponderado(rng, TIPOS_ENTREVISTA),
+                    '',
+                    '',
+                    estado,
+                    _texto_fecha(creacion),
+                    None,
+                    1 if pasada else 0,
+                )
+                eid += 1
+                colocadas += 1
+        dia += timedelta(days=1)
+
+
+def generar_usuarios(rng, primer_id, n, password_hash, referencia):
+    for i in range(n):
+        uid = primer_id + i
+        creado = datetime.combine(referencia, dtime()) - timedelta(days=rng.randrange(365))
+        yield (
+            uid,
+            f"usuario{uid}@example.com",
+            password_hash,
+            f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}",
+            f"55{rng.randrange(10 ** 8):08d}",
+            None,
+            _texto_fecha(creado),
+            None,
+            1,
+            0,
+            0,
+            None,
+        )
+
+
+def generar_sesiones(rng, primer_id, n, usuarios_ids, referencia):
+    ahora = datetime.combine(referencia, dtime(12))
+    for i in range(n):
+        inicio = ahora - timedelta(minutes=rng.randrange(60 * 24 * 60))
+        expira = inicio + timedelta(hours=24)
+        yield (
+            primer_id + i,
+            rng.choice(usuarios_ids),
+            f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+            'seed',
+            f"{rng.getrandbits(128):032x}",
+            _texto_fecha(inicio),
+            _texto_fecha(inicio + timedelta(minutes=rng.randrange(120))),
+            _texto_fecha(expira),
+            1 if expira > ahora else 0,
+        )
+
+
+SQL_INSERT = {
+    'recluta': 'INSERT INTO recluta (id, nombre, email, telefono, estado, puesto, notas, foto_url, '
+               'fecha_registro, last_updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+    'entrevista': 'INSERT INTO entrevista (id, recluta_id, fecha, hora, duracion, tipo, ubicacion, notas, '
+                  'estado, fecha_creacion, codigo_acceso, recordatorio_enviado) '
+                  'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+    'usuario': 'INSERT INTO usuario (id, email, password_hash, nombre, telefono, foto_url, created_at, '
+               'last_login, is_active, is_admin, failed_login_attempts, locked_until) '
+               'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+    'user_session': 'INSERT INTO user_session (id, usuario_id, ip_address, user_agent, session_token, '
+                    'created_at, last_activity, expires_at, is_valid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+}
+
+PRAGMAS_CARGA = {
+    'synchronous': 'OFF',
+    'cache_size': '-262144',  # 256 MiB
+    'temp_store': 'MEMORY',
+    'wal_autocheckpoint': '0',
+}
+
+
+def _insertar(conn, tabla, filas, lote, progreso):
+    total = 0
+    sql = SQL_INSERT[tabla]
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= lote:
+            conn.executemany(sql, bloque)
+            conn.commit()
+            total += len(bloque)
+            bloque = []
+            if progreso:
+                progreso(tabla, total)
+    if bloque:
+        conn.executemany(sql, bloque)
+        conn.commit()
+        total += len(bloque)
+        if progreso:
+            progreso(tabla, total)
+    return total
+
+
+# Ids ya usados que no están en la tabla activa: archivados y borrados
+ARCHIVOS = {'recluta': 'recluta_archivo', 'entrevista': 'entrevista_archivo'}
+
+
+def _siguiente_id(conn, tabla):
+    """
+    Primer id por encima de todo id ya usado, como lo daría AUTOINCREMENT:
+    un recluta sembrado no puede ocupar el id de uno archivado (restaurar
+    fallaría) ni el de una baja que los clientes ya quitaron de su lista.
+    """
+    tablas = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    consultas = [(f'SELECT MAX(id) FROM {tabla}', ())]
+    if 'sqlite_sequence' in tablas:
+        consultas.append(('SELECT MAX(seq) FROM sqlite_sequence WHERE name = ?', (tabla,)))
+    if ARCHIVOS.get(tabla) in tablas:
+        consultas.append((f'SELECT MAX(id) FROM {ARCHIVOS[tabla]}', ()))
+    if 'tombstone' in tablas:
+        consultas.append(('SELECT MAX(entity_id) FROM tombstone WHERE entity = ?', (tabla,)))
+    return max(conn.execute(sql, parametros).fetchone()[0] or 0 for sql, parametros in consultas) + 1
+
+
+def sembrar(conn, reclutas, semilla=42, entrevistas=None, usuarios=0, sesiones=None,
+            password='Seed-1234', referencia=None, lote=LOTE, progreso=None):
+    """
+    Inserta datos sintéticos en una conexión sqlite3 con las tablas ya creadas.
+
+    entrevistas -- por defecto la mitad que reclutas
+    sesiones    -- por defecto una por cada 10 reclutas (repartidas entre los
+                   usuarios sembrados o, si no hay, los existentes)
+    password    -- contraseña común de los usuarios sembrados (un solo hash
+                   bcrypt para todos)
+    referencia  -- fecha "de hoy" de los datos (por defecto la actual)
+
+    Devuelve un diccionario con las filas insertadas por tabla y los segundos.
+    """
+    rng = random.Random(semilla)
+    referencia = referencia or date.today()
+    entrevistas = reclutas // 2 if entrevistas is None else entrevistas
+    sesiones = reclutas // 10 if sesiones is None else sesiones
+
+    anteriores = {}
+    for pragma in PRAGMAS_CARGA:
+        anteriores[pragma] = conn.execute(f'PRAGMA {pragma}').fetchone()[0]
+    for pragma, valor in PRAGMAS_CARGA.items():
+        conn.execute(f'PRAGMA {pragma}={valor}')
+
+    inicio = time.perf_counter()
+    resultado = {}
+    try:
+        primer_recluta = _siguiente_id(conn, 'recluta')
+        resultado['recluta'] = _insertar(
+            conn, 'recluta', generar_reclutas(rng, primer_recluta, reclutas, referencia), lote, progreso
+        )
+
+        if entrevistas:
+            if reclutas:
+                rango = (primer_recluta, primer_recluta + reclutas - 1)
+            else:
+                rango = [fila[0] for fila in conn.execute('SELECT id FROM recluta')]
+            if rango:
+                ocupados = [fila[0] for fila in conn.execute('SELECT DISTINCT fecha FROM entrevista')]
+                resultado['entrevista'] = _insertar(conn, 'entrevista', generar_entrevistas(
+                    rng, _siguiente_id(conn, 'entrevista'), entrevistas, rango, referencia, ocupados
+                ), lote, progreso)
+
+        if usuarios:
+            # bcrypt es deliberadamente lento: un único hash para todos los usuarios sembrados
+            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            primer_usuario = _siguiente_id(conn, 'usuario')
+            resultado['usuario'] = _insertar(conn, 'usuario', generar_usuarios(
+                rng, primer_usuario, usuarios, password_hash, referencia
+            ), lote, progreso)
+            usuarios_ids = list(range(primer_usuario, primer_usuario + usuarios))
+        else:
+            usuarios_ids = [fila[0] for fila in conn.execute('SELECT id FROM usuario')]
+
+        if sesiones and usuarios_ids:
+            resultado['user_session'] = _insertar(conn, 'user_session', generar_sesiones(
+                rng, _siguiente_id(conn, 'user_session'), sesiones, usuarios_ids, referencia
+            ), lote, progreso)
+
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        for pragma, valor in anteriores.items():
+            conn.execute(f'PRAGMA {pragma}={valor}')
+
+    resultado['segundos'] = time.perf_counter() - inicio
+    logger.info(f"Datos sintéticos insertados (semilla {semilla}): {resultado}")
+    return resultado
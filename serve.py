@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Sistema de Gestión de Reclutas - Servidor de producción
+---------------------------------------------------------
+Arranca la aplicación con gunicorn embebido: varios procesos worker con
+varios hilos cada uno, la app precargada en el proceso maestro antes del
+fork, reciclado de workers tras un número máximo de peticiones y TLS con los
+certificados indicados en la sección [SERVER] de config.ini.
+
+Señales (gestionadas por gunicorn):
+    SIGHUP  -- reinicia los workers de forma ordenada (sin cortar peticiones)
+    SIGTERM -- parada ordenada
+    SIGTTIN / SIGTTOU -- añade / quita un worker
+
+Uso:
+    python app.py bootstrap   # solo la primera vez: config.ini, tablas y usuarios
+    python serve.py [--bind 0.0.0.0:5000] [--workers N] [--threads N]
+"""
+
+import argparse
+import configparser
+import multiprocessing
+import os
+import sys
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError as e:
+    print(f"Error: No se puede importar gunicorn: {e}")
+    print("Instálalo con 'pip install gunicorn' (solo disponible en Linux/macOS)")
+    sys.exit(1)
+
+
+def load_server_config(config_file):
+    """Lee la sección [SERVER] de config.ini con valores predeterminados"""
+    config = configparser.ConfigParser()
+    if os.path.exists(config_file):
+        config.read(config_file)
+
+    workers = config.getint('SERVER', 'WORKERS', fallback=0)
+    if workers <= 0:
+        workers = multiprocessing.cpu_count() * 2 + 1
+
+    opciones = {
+        'bind': config.get('SERVER', 'BIND', fallback='0.0.0.0:5000'),
+        'workers': workers,
+        'threads': config.getint('SERVER', 'THREADS', fallback=4),
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'max_requests': config.getint('SERVER', 'MAX_REQUESTS', fallback=10000),
+        'max_requests_jitter': config.getint('SERVER', 'MAX_REQUESTS_JITTER', fallback=500),
+        'timeout': config.getint('SERVER', 'TIMEOUT', fallback=60),
+        'graceful_timeout': config.getint('SERVER', 'GRACEFUL_TIMEOUT', fallback=30),
+        'keepalive': config.getint('SERVER', 'KEEPALIVE', fallback=5),
+        'accesslog': config.get('SERVER', 'ACCESS_LOG', fallback='') or None,
+        'errorlog': config.get('SERVER', 'ERROR_LOG', fallback='-'),
+    }
+
+    certfile = config.get('SERVER', 'CERTFILE', fallback='')
+    keyfile = config.get('SERVER', 'KEYFILE', fallback='')
+    if certfile and keyfile:
+        opciones['certfile'] = certfile
+        opciones['keyfile'] = keyfile
+        ca_certs = config.get('SERVER', 'CA_CERTS', fallback='')
+        if ca_certs:
+            opciones['ca_certs'] = ca_certs
+
+    return opciones
+
+
+def when_ready(server):
+    """El maestro no atiende peticiones: detener los hilos que solo sirven a los workers"""
+    from app import read_router
+    from views import change_feed, janitor, mail_queue
+    read_router.stop_refresher()
+    janitor.stop()
+    mail_queue.stop()
+    change_feed.stop()
+
+
+def post_fork(server, worker):
+    """Reinicia en cada worker el estado que no sobrevive al fork"""
+    from app import app, db, read_router
+    from views import change_feed, file_cleanup, group_commit, janitor, mail_queue
+
+    # Las conexiones heredadas del maestro no se pueden compartir entre procesos
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    group_commit.after_fork()
+    read_router.after_fork()
+    janitor.after_fork()
+    mail_queue.after_fork()
+    change_feed.after_fork()
+    file_cleanup.after_fork()
+
+
+class ReclutasApplication(BaseApplication):
+    """Aplicación gunicorn que carga la app de Flask una sola vez en el maestro"""
+
+    def __init__(self, opciones):
+        self.opciones = opciones
+        super().__init__()
+
+    def load_config(self):
+        for clave, valor in self.opciones.items():
+            if clave in self.cfg.settings and valor is not None:
+                self.cfg.set(clave, valor)
+        self.cfg.set('when_ready', when_ready)
+        self.cfg.set('post_fork', post_fork)
+
+    def load(self):
+        from app import app
+        from views import change_feed
+        if self.opciones['workers'] > 1 and change_feed.enabled and change_feed.relay == 'none':
+            print(f"Aviso: [CHANGE_FEED] relay = none con {self.opciones['workers']} workers: cada navegador "
+                  "solo verá los cambios hechos en su worker. Use relay = sqlite", file=sys.stderr)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor de producción del Sistema de Gestión de Reclutas')
+    parser.add_argument('--bind', help='Dirección y puerto (por defecto [SERVER] bind)')
+    parser.add_argument('--workers', type=int, help='Número de procesos worker')
+    parser.add_argument('--threads', type=int, help='Hilos por worker')
+    args = parser.parse_args()
+
+    opciones = load_server_config(os.environ.get('CONFIG_FILE', 'config.ini'))
+    if args.bind:
+        opciones['bind'] = args.bind
+    if args.workers:
+        opciones['workers'] = args.workers
+    if args.threads:
+        opciones['threads'] = args.threads
+
+    ReclutasApplication(opciones).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Registro de consultas lentas.
+
+Un listener ``before/after_cursor_execute`` en cada engine mide todas las
+sentencias y escribe en un archivo rotativo (una línea JSON por consulta) las
+que superan ``[SLOW_QUERY] threshold_ms``: duración, endpoint que la lanzó,
+sentencia normalizada con su huella, parámetros redactados y, la primera vez
+que aparece cada sentencia normalizada, la salida de ``EXPLAIN QUERY PLAN``.
+
+Todos los workers de gunicorn escriben en el mismo archivo, así que ninguno
+lo rota: cada uno lo abre con ``WatchedFileHandler``, que lo reabre si cambia
+de inodo, y lo rota solo la tarea ``slow_queries`` del janitor (un único
+proceso) cuando pasa de ``max_bytes``. Sin janitor el archivo no se rota.
+
+``python admin_tools.py --slow-queries`` resume el archivo (ver ``resumir``).
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from logging.handlers import WatchedFileHandler
+
+import sqlalchemy as sa
+from flask import has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+_RE_CADENA = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar(sentencia):
+    """Sustituye literales por ? y colapsa listas y espacios para agrupar sentencias iguales"""
+    texto = _RE_CADENA.sub('?', sentencia)
+    texto = _RE_NUMERO.sub('?', texto)
+    texto = _RE_LISTA.sub('(?...)', texto)
+    return _RE_ESPACIOS.sub(' ', texto).strip()
+
+
+def huella(normalizada):
+    return hashlib.sha1(normalizada.encode('utf-8')).hexdigest()[:12]
+
+
+def redactar(valor):
+    """Conserva números, booleanos y nulos; de textos y binarios solo el tipo y la longitud"""
+    if valor is None or isinstance(valor, (bool, int, float)):
+        return valor
+    if isinstance(valor, (str, bytes)):
+        return f"<{type(valor).__name__}:{len(valor)}>"
+    if isinstance(valor, dict):
+        return {k: redactar(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [redactar(v) for v in valor]
+    return f"<{type(valor).__name__}>"
+
+
+class SlowQueryLog:
+    """
+    Extensión de registro de consultas lentas.
+
+    Configuración (app.config):
+        SLOW_QUERY_ENABLED       -- activa los listeners
+        SLOW_QUERY_THRESHOLD_MS  -- umbral en milisegundos
+        SLOW_QUERY_LOG_FILE      -- archivo de registro (rotativo)
+        SLOW_QUERY_MAX_BYTES     -- tamaño máximo antes de rotar
+        SLOW_QUERY_BACKUP_COUNT  -- archivos rotados que se conservan (0 = no se rota)
+        SLOW_QUERY_ROTATE_INTERVAL -- segundos entre comprobaciones del tamaño (tarea del janitor)
+        SLOW_QUERY_EXPLAIN       -- capturar EXPLAIN QUERY PLAN
+    """
+
+    def __init__(self, app=None, db=None, janitor=None):
+        self.enabled = False
+        self.threshold = 0.1
+        self.explain = True
+        self.log_file = 'slow_queries.log'
+        self.max_bytes = 5 * 1024 * 1024
+        self.backup_count = 5
+        self._vistas = set()
+        self._lock = threading.Lock()
+        self._log = logging.getLogger('slow_queries')
+        self._log.propagate = False
+        if app is not None:
+            self.init_app(app, db, janitor)
+
+    def init_app(self, app, db, janitor=None):
+        self.enabled = app.config.get('SLOW_QUERY_ENABLED', True)
+        self.threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 100) / 1000.0
+        self.explain = app.config.get('SLOW_QUERY_EXPLAIN', True)
+        self.log_file = app.config.get('SLOW_QUERY_LOG_FILE', 'slow_queries.log')
+        self.max_bytes = app.config.get('SLOW_QUERY_MAX_BYTES', 5 * 1024 * 1024)
+        self.backup_count = app.config.get('SLOW_QUERY_BACKUP_COUNT', 5)
+        app.extensions['slow_queries'] = self
+        if not self.enabled:
+            return
+
+        if not self._log.handlers:
+            # Sin rotación propia: con varios workers cada uno rotaría por su cuenta
+            handler = WatchedFileHandler(self.log_file, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._log.addHandler(handler)
+            self._log.setLevel(logging.INFO)
+        if janitor is not None and self.max_bytes > 0 and self.backup_count > 0:
+            janitor.add_job('slow_queries', app.config.get('SLOW_QUERY_ROTATE_INTERVAL', 300), self._tarea)
+
+        with app.app_context():
+            for engine in db.engines.values():
+                sa.event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                sa.event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def rotar(self):
+        """
+        Rota el archivo si pasa de ``max_bytes`` (.1 el más reciente, como
+        RotatingFileHandler). Devuelve True si lo rotó. Los workers lo
+        reabren en su siguiente escritura.
+        """
+        try:
+            if os.path.getsize(self.log_file) < self.max_bytes:
+                return False
+        except FileNotFoundError:
+            return False
+        for n in range(self.backup_count - 1, 0, -1):
+            origen = f"{self.log_file}.{n}"
+            if os.path.exists(origen):
+                os.replace(origen, f"{self.log_file}.{n + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
+        logger.info(f"Registro de consultas lentas rotado: {self.log_file}")
+        return True
+
+    def _tarea(self, janitor):
+        self.rotar()
+        return 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_inicio', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        pila = conn.info.get('slow_inicio')
+        if not pila:
+            return
+        duracion = time.perf_counter() - pila.pop()
+        if duracion < self.threshold:
+            return
+        try:
+            self._registrar(cursor, statement, parameters, executemany, duracion)
+        except Exception as e:
+            # El registro nunca debe romper la consulta
+            logger.error(f"Error al registrar consulta lenta: {str(e)}")
+
+    def _registrar(self, cursor, statement, parameters, executemany, duracion):
+        normalizada = normalizar(statement)
+        clave = huella(normalizada)
+        with self._lock:
+            primera = clave not in self._vistas
+            self._vistas.add(clave)
+
+        if has_request_context():
+            origen = request.endpoint or request.path
+        else:
+            origen = threading.current_thread().name
+
+        registro = {
+            'ts': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'ms': round(duracion * 1000, 2),
+            'endpoint': origen,
+            'fingerprint': clave,
+            'statement': normalizada,
+            'params': redactar(parameters[:10] if executemany else parameters),
+        }
+        if primera and self.explain and not executemany and normalizada.upper().startswith(('SELECT', 'WITH')):
+            registro['plan'] = self._plan(cursor, statement, parameters)
+        self._log.info(json.dumps(registro, ensure_ascii=False, default=str))
+
+    def _plan(self, cursor, statement, parameters):
+        # Un cursor nuevo en la misma conexión: no altera el resultado pendiente
+        explicacion = cursor.connection.cursor()
+        try:
+            explicacion.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [fila[-1] for fila in explicacion.fetchall()]
+        except Exception as e:
+            return [f"EXPLAIN no disponible: {str(e)}"]
+        finally:
+            explicacion.close()
+
+
+def resumir(log_file, top=10):
+    """
+    Lee el archivo de consultas lentas (y sus rotaciones) y agrupa por huella.
+    Devuelve una lista ordenada por tiempo total con conteo, total, máximo,
+    p95, endpoints, sentencia y plan.
+    """
+    grupos = {}
+    archivos = sorted(glob.glob(f"{log_file}.*"), reverse=True) + [log_file]
+    for ruta in archivos:
+        if not os.path.exists(ruta):
+            continue
+        with open(ruta, encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                grupo = grupos.setdefault(registro['fingerprint'], {
+                    'fingerprint': registro['fingerprint'],
+                    'statement': registro['statement'],
+                    'tiempos': [],
+                    'endpoints': {},
+                    'plan': None,
+                    'ultima': None,
+                })
+                grupo['tiempos'].append(registro['ms'])
+                grupo['endpoints'][registro['endpoint']] = grupo['endpoints'].get(registro['endpoint'], 0) + 1
+                grupo['ultima'] = registro['ts']
+                if registro.get('plan') and not grupo['plan']:
+                    grupo['plan'] = registro['plan']
+
+    resumen = []
+    for grupo in grupos.values():
+        tiempos = sorted(grupo.pop('tiempos'))
+        grupo['count'] = len(tiempos)
+        grupo['total_ms'] = sum(tiempos)
+        grupo['max_ms'] = tiempos[-1]
+        grupo['p95_ms'] = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        resumen.append(grupo)
+    resumen.sort(key=lambda g: g['total_ms'], reverse=True)
+    return resumen[:top]
@@ -0,0 +1,119 @@
+"""
+Perfil de rendimiento para SQLite.
+
+Aplica los PRAGMA de la sección [DATABASE] de config.ini en cada conexión
+nueva (evento ``connect`` del engine) y ofrece la tarea de mantenimiento
+(``wal_checkpoint`` + ``optimize``) que programa el janitor.
+"""
+
+import logging
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Valores permitidos para los PRAGMA que aceptan palabras clave
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+SYNCHRONOUS_LEVELS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+TEMP_STORES = {'DEFAULT', 'FILE', 'MEMORY'}
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,      # negativo = KiB (20 MB)
+    'mmap_size': 268435456,    # 256 MB
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,      # milisegundos
+    'foreign_keys': False,
+}
+
+
+def load_pragmas(config, section='DATABASE'):
+    """Lee los PRAGMA desde un ConfigParser, validando cada valor"""
+    pragmas = {
+        'journal_mode': config.get(section, 'JOURNAL_MODE', fallback=DEFAULT_PRAGMAS['journal_mode']).upper(),
+        'synchronous': config.get(section, 'SYNCHRONOUS', fallback=DEFAULT_PRAGMAS['synchronous']).upper(),
+        'cache_size': config.getint(section, 'CACHE_SIZE', fallback=DEFAULT_PRAGMAS['cache_size']),
+        'mmap_size': config.getint(section, 'MMAP_SIZE', fallback=DEFAULT_PRAGMAS['mmap_size']),
+        'temp_store': config.get(section, 'TEMP_STORE', fallback=DEFAULT_PRAGMAS['temp_store']).upper(),
+        'busy_timeout': config.getint(section, 'BUSY_TIMEOUT', fallback=DEFAULT_PRAGMAS['busy_timeout']),
+        'foreign_keys': config.getboolean(section, 'FOREIGN_KEYS', fallback=DEFAULT_PRAGMAS['foreign_keys']),
+    }
+
+    if pragmas['journal_mode'] not in JOURNAL_MODES:
+        raise ValueError(f"journal_mode no válido: {pragmas['journal_mode']}")
+    if pragmas['synchronous'] not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f"synchronous no válido: {pragmas['synchronous']}")
+    if pragmas['temp_store'] not in TEMP_STORES:
+        raise ValueError(f"temp_store no válido: {pragmas['temp_store']}")
+
+    return pragmas
+
+
+def apply_pragmas(dbapi_connection, pragmas, readonly=False):
+    """
+    Ejecuta los PRAGMA sobre una conexión sqlite3 recién abierta.
+    Con ``readonly`` se omiten los que escriben en el archivo y se activa query_only.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        # busy_timeout primero, para que el cambio de journal_mode también espere
+        cursor.execute(f"PRAGMA busy_timeout = {int(pragmas['busy_timeout'])}")
+        if readonly:
+            cursor.execute("PRAGMA query_only = ON")
+        else:
+            cursor.execute(f"PRAGMA journal_mode = {pragmas['journal_mode']}")
+            cursor.execute(f"PRAGMA synchronous = {pragmas['synchronous']}")
+        cursor.execute(f"PRAGMA cache_size = {int(pragmas['cache_size'])}")
+        cursor.execute(f"PRAGMA mmap_size = {int(pragmas['mmap_size'])}")
+        cursor.execute(f"PRAGMA temp_store = {pragmas['temp_store']}")
+        cursor.execute(f"PRAGMA foreign_keys = {'ON' if pragmas['foreign_keys'] else 'OFF'}")
+    finally:
+        cursor.close()
+
+
+def install_pragmas(engine, pragmas, readonly=False):
+    """Registra el listener de conexión sobre un engine SQLite"""
+    if engine.dialect.name != 'sqlite':
+        return False
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas, readonly=readonly)
+
+    # Las conexiones que ya existieran en el pool no tienen los PRAGMA
+    engine.dispose()
+    return True
+
+
+def init_sqlite(app, db):
+    """Aplica el perfil de SQLite configurado en app.config['SQLITE_PRAGMAS']"""
+    pragmas = app.config.get('SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+    with app.app_context():
+        if install_pragmas(db.engine, pragmas):
+            logger.info(f"PRAGMA de SQLite aplicados: {pragmas}")
+        # Engines de solo lectura registrados como binds (ver db_routing)
+        for bind_key, engine in db.engines.items():
+            if bind_key is not None and engine.url.query.get('mode') == 'ro':
+                install_pragmas(engine, pragmas, readonly=True)
+
+
+def run_maintenance(engine, checkpoint_mode='PASSIVE'):
+    """
+    Ejecuta el mantenimiento de SQLite: checkpoint del WAL y PRAGMA optimize.
+    Devuelve el resultado del checkpoint (busy, páginas de log, páginas copiadas).
+    """
+    if checkpoint_mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+        raise ValueError(f"Modo de checkpoint no válido: {checkpoint_mode}")
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(f"PRAGMA wal_checkpoint({checkpoint_mode})")
+        resultado = cursor.fetchone()
+        cursor.execute("PRAGMA optimize")
+        cursor.close()
+        raw.commit()
+    finally:
+        raw.close()
+    return resultado
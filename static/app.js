@@ -18,15 +18,48 @@ document.addEventListener('DOMContentLoaded', function() {
     // Comprobar si hay un tema guardado
     checkSavedTheme();
     
-    // Comprobar si hay una sesión activa
-    checkSession();
-    
     // Inicializar calendario si estamos en esa sección
     initCalendar();
-    // Verificar estado de autenticación
-    checkAuthentication();
+    
+    // Sesión, reclutas, estadísticas y entrevistas en una sola petición
+    loadDashboard();
 });
 
+// Carga inicial del panel con /api/batch: una sola comprobación de IP, sesión y usuario
+function loadDashboard() {
+    const params = new URLSearchParams();
+    ['/api/check-auth', '/api/reclutas?fields=tabla', '/api/estadisticas', '/api/entrevistas?fields=calendario']
+        .forEach(ruta => params.append('r', ruta));
+    
+    fetch(`/api/batch?${params}`)
+        .then(response => {
+            if (!response.ok) throw new Error('Error en la carga inicial');
+            return response.json();
+        })
+        .then(data => {
+            const [auth, lista, estadisticas, listaEntrevistas] = data.respuestas;
+            
+            if (auth.status !== 200 || !auth.body.authenticated) {
+                // Mostrar pantalla de login
+                document.getElementById('login-section').style.display = 'block';
+                document.getElementById('dashboard-section').style.display = 'none';
+                return;
+            }
+            
+            loginSuccess(auth.body.usuario, lista.status === 200 ? lista.body.reclutas : null);
+            displayUsuario(auth.body.usuario);
+            if (estadisticas.status === 200) displayEstadisticas(estadisticas.body);
+            if (listaEntrevistas.status === 200) {
+                displayEntrevistas(listaEntrevistas.body.entrevistas, currentYear, currentMonth);
+            }
+        })
+        .catch(error => {
+            // Servidor sin /api/batch: peticiones por separado
+            console.error('Error en la carga inicial:', error);
+            checkAuthentication();
+        });
+}
+
 // Comprobar si existe una sesión de usuario activa
 function checkSession() {
     fetch('/api/usuario')
@@ -42,60 +75,13 @@ function checkSession() {
             document.getElementById('login-section').style.display = 'none';
             document.getElementById('dashboard-section').style.display = 'block';
             
-            // Actualizar UI con datos de usuario
-            document.getElementById('gerente-name').textContent = currentGerente.nombre || currentGerente.email;
-            document.getElementById('dropdown-user-name').textContent = currentGerente.nombre || currentGerente.email;
-            
-            // Cargar foto de perfil si existe
-            if (currentGerente.foto_url) {
-                document.getElementById('dashboard-profile-pic').src = currentGerente.foto_url.startsWith('http')
-                    ? currentGerente.foto_url
-                    : (currentGerente.foto_url === 'default_profile.jpg' 
-                        ? "/api/placeholder/100/100" 
-                        : `/${currentGerente.foto_url}`);
-            } else {
-                document.getElementById('dashboard-profile-pic').src = "/api/placeholder/100/100";
-            }
-            
-            // Rellenar campos del perfil
-            if (document.getElementById('user-name')) 
-                document.getElementById('user-name').value = currentGerente.nombre || '';
-            if (document.getElementById('user-email')) 
-                document.getElementById('user-email').value = currentGerente.email || '';
-            if (document.getElementById('user-phone'))
-                document.getElementById('user-phone').value = currentGerente.telefono || '';
-            
-            // Carga la lista de reclutas desde el backend
-            function loadReclutas() {
-                fetch('/api/reclutas')
-                    .then(response => {
-                        if (!response.ok) {
-                            if (response.status === 401) {
-                                // Si no está autenticado, mostrar login
-                                document.getElementById('login-section').style.display = 'block';
-                                document.getElementById('dashboard-section').style.display = 'none';
-                                showNotification('Sesión expirada. Por favor inicie sesión nuevamente.', 'warning');
-                                throw new Error('No autenticado');
-                            }
-                            throw new Error('Error al cargar reclutas');
-                        }
-                        return response.json();
-                    })
-                    .then(data => {
-                        reclutas = data;
-                        displayReclutas(reclutas);
-                    })
-                    .catch(error => {
-                        console.error('Error:', error);
-                        // Solo mostrar notificación si no es un error de autenticación
-                        if (error.message !== 'No autenticado') {
-                            showNotification('Error al cargar reclutas', 'error');
-                        }
-                    });
-            }
+            displayUsuario(currentGerente);
             
             // Cargar estadísticas
             loadEstadisticas();
+            
+            // Recibir los cambios de otros usuarios sin recargar la lista
+            startChangeFeed();
         })
         .catch(error => {
             console.log('No hay sesión activa:', error);
@@ -105,6 +91,31 @@ function checkSession() {
         });
 }
 
+// Actualizar UI con datos de usuario
+function displayUsuario(usuario) {
+    document.getElementById('gerente-name').textContent = usuario.nombre || usuario.email;
+    document.getElementById('dropdown-user-name').textContent = usuario.nombre || usuario.email;
+    
+    // Cargar foto de perfil si existe
+    if (usuario.foto_url) {
+        document.getElementById('dashboard-profile-pic').src = usuario.foto_url.startsWith('http')
+            ? usuario.foto_url
+            : (usuario.foto_url === 'default_profile.jpg' 
+                ? "/api/placeholder/100/100" 
+                : `/${usuario.foto_url}`);
+    } else {
+        document.getElementById('dashboard-profile-pic').src = "/api/placeholder/100/100";
+    }
+    
+    // Rellenar campos del perfil
+    if (document.getElementById('user-name')) 
+        document.getElementById('user-name').value = usuario.nombre || '';
+    if (document.getElementById('user-email')) 
+        document.getElementById('user-email').value = usuario.email || '';
+    if (document.getElementById('user-phone'))
+        document.getElementById('user-phone').value = usuario.telefono || '';
+}
+
 // Cargar estadísticas
 function loadEstadisticas() {
     fetch('/api/estadisticas')
@@ -112,25 +123,27 @@ function loadEstadisticas() {
             if (!response.ok) throw new Error('Error al cargar estadísticas');
             return response.json();
         })
-        .then(data => {
-            // Actualizar elementos de estadísticas
-            const stats = {
-                totalReclutas: document.querySelector('.stat-card:nth-child(1) .stat-number'),
-                reclutasActivos: document.querySelector('.stat-card:nth-child(2) .stat-number'),
-                enProceso: document.querySelector('.stat-card:nth-child(3) .stat-number'),
-                entrevistasPendientes: document.querySelector('.stat-card:nth-child(4) .stat-number')
-            };
-            
-            if (stats.totalReclutas) stats.totalReclutas.textContent = data.total_reclutas;
-            if (stats.reclutasActivos) stats.reclutasActivos.textContent = data.reclutas_activos;
-            if (stats.enProceso) stats.enProceso.textContent = data.reclutas_proceso;
-            if (stats.entrevistasPendientes) stats.entrevistasPendientes.textContent = data.entrevistas_pendientes;
-        })
+        .then(displayEstadisticas)
         .catch(error => {
             console.error('Error:', error);
         });
 }
 
+// Actualizar elementos de estadísticas
+function displayEstadisticas(data) {
+    const stats = {
+        totalReclutas: document.querySelector('.stat-card:nth-child(1) .stat-number'),
+        reclutasActivos: document.querySelector('.stat-card:nth-child(2) .stat-number'),
+        enProceso: document.querySelector('.stat-card:nth-child(3) .stat-number'),
+        entrevistasPendientes: document.querySelector('.stat-card:nth-child(4) .stat-number')
+    };
+    
+    if (stats.totalReclutas) stats.totalReclutas.textContent = data.total_reclutas;
+    if (stats.reclutasActivos) stats.reclutasActivos.textContent = data.reclutas_activos;
+    if (stats.enProceso) stats.enProceso.textContent = data.reclutas_proceso;
+    if (stats.entrevistasPendientes) stats.entrevistasPendientes.textContent = data.entrevistas_pendientes;
+}
+
 // Inicialización de todos los event listeners
 function initEventListeners() {
     // Listeners de navegación del dashboard
@@ -387,7 +400,7 @@ function login() {
 }
 
 // Función que se ejecuta después de un login exitoso
-function loginSuccess(usuario) {
+function loginSuccess(usuario, listaReclutas) {
     currentGerente = usuario;
     
     document.getElementById('login-section').style.display = 'none';
@@ -404,13 +417,214 @@ function loginSuccess(usuario) {
     
     showNotification(`¡Bienvenido ${usuario.email}!`, 'success');
     
-    // Cargar datos reales de reclutas
-    loadReclutas();
+    // Cargar datos reales de reclutas (ya vienen si la carga fue por /api/batch)
+    if (listaReclutas) {
+        reclutas = listaReclutas;
+        displayReclutas(reclutas);
+    } else {
+        loadReclutas();
+    }
+    
+    // Recibir los cambios de otros usuarios sin recargar la lista
+    startChangeFeed();
+}
+
+// ----- FEED DE CAMBIOS (SSE) -----
+
+let changeFeed = null;
+let changeFeedRetry = null;
+let changeFeedDelay = 5000;
+let changeFeedFailures = 0;
+
+// Sin SSE (navegador sin EventSource, o el servidor rechaza la conexión con
+// 503 porque su worker ya tiene [CHANGE_FEED] max_clients) la lista se
+// sondea con ?updated_since= mientras se sigue reintentando el feed
+const CHANGE_FEED_MAX_FAILURES = 2;
+const CHANGE_POLL_INTERVAL = 30000;
+let changePollTimer = null;
+let reclutasMarca = null;
+
+// Abre /api/cambios; cada evento trae {entity, id, op, last_updated}
+function startChangeFeed() {
+    if (!window.EventSource) {
+        startChangePolling();
+        return;
+    }
+    if (changeFeed) return;
+    
+    changeFeed = new EventSource('/api/cambios');
+    
+    changeFeed.addEventListener('open', function() {
+        changeFeedDelay = 5000;
+        changeFeedFailures = 0;
+        // Lo que cambió mientras se sondeaba llega con una última consulta
+        if (changePollTimer) {
+            stopChangePolling();
+            pollReclutaChanges();
+        }
+    });
+    
+    changeFeed.addEventListener('cambio', function(e) {
+        const cambio = JSON.parse(e.data);
+        if (cambio.entity === 'recluta') {
+            queueReclutaChange(cambio);
+        }
+    });
+    
+    // Se perdieron eventos (reconexión tardía o cliente lento): recargar una vez
+    changeFeed.addEventListener('reset', function() {
+        loadReclutas();
+    });
+    
+    changeFeed.addEventListener('error', function() {
+        // EventSource reconecta solo, salvo si el servidor rechazó la conexión (503, 401)
+        if (changeFeed && changeFeed.readyState === EventSource.CLOSED) {
+            changeFeed = null;
+            if (currentGerente) {
+                changeFeedFailures++;
+                if (changeFeedFailures >= CHANGE_FEED_MAX_FAILURES) {
+                    startChangePolling();
+                }
+                changeFeedRetry = setTimeout(startChangeFeed, changeFeedDelay);
+                changeFeedDelay = Math.min(changeFeedDelay * 2, 120000);
+            }
+        }
+    });
+}
+
+function stopChangeFeed() {
+    clearTimeout(changeFeedRetry);
+    stopChangePolling();
+    changeFeedFailures = 0;
+    if (changeFeed) {
+        changeFeed.close();
+        changeFeed = null;
+    }
+}
+
+function startChangePolling() {
+    if (changePollTimer) return;
+    changePollTimer = setInterval(pollReclutaChanges, CHANGE_POLL_INTERVAL);
+}
+
+function stopChangePolling() {
+    clearInterval(changePollTimer);
+    changePollTimer = null;
+}
+
+// Pide solo lo que cambió desde la última marca ({reclutas, eliminados, hasta, hay_mas})
+function pollReclutaChanges() {
+    if (!reclutasMarca) {
+        loadReclutas();
+        return;
+    }
+    fetch(`/api/reclutas?fields=tabla&updated_since=${encodeURIComponent(reclutasMarca)}`)
+        .then(response => {
+            // 410: la marca es más antigua que las bajas guardadas
+            if (response.status === 410) {
+                loadReclutas();
+                return null;
+            }
+            if (!response.ok) throw new Error('Error al consultar cambios');
+            return response.json();
+        })
+        .then(data => {
+            if (!data) return;
+            data.reclutas.forEach(recluta => {
+                const index = reclutas.findIndex(r => r.id === recluta.id);
+                if (index !== -1) {
+                    reclutas[index] = recluta;
+                } else {
+                    reclutas.unshift(recluta);
+                }
+            });
+            data.eliminados.forEach(id => {
+                const index = reclutas.findIndex(r => r.id === id);
+                if (index !== -1) reclutas.splice(index, 1);
+            });
+            reclutasMarca = data.hasta;
+            if (data.reclutas.length || data.eliminados.length) {
+                refreshReclutasView();
+            }
+            if (data.hay_mas) {
+                pollReclutaChanges();
+            }
+        })
+        .catch(error => console.error('Error al consultar cambios:', error));
+}
+
+// Vuelve a pintar la tabla respetando la búsqueda y el filtro actuales
+function refreshReclutasView() {
+    const searchInput = document.getElementById('search-reclutas');
+    const filterEstado = document.getElementById('filter-estado');
+    if (reclutas.length > 0 && (searchInput || filterEstado)) {
+        filterReclutas();
+    } else {
+        displayReclutas(reclutas);
+    }
+}
+
+// Los cambios se agrupan unos milisegundos: una operación por lote llega como
+// muchos eventos seguidos y entonces es más barato recargar la lista una vez
+let pendingReclutaChanges = [];
+let pendingReclutaTimer = null;
+const MAX_INCREMENTAL_CHANGES = 20;
+
+function queueReclutaChange(cambio) {
+    pendingReclutaChanges.push(cambio);
+    if (!pendingReclutaTimer) {
+        pendingReclutaTimer = setTimeout(flushReclutaChanges, 200);
+    }
+}
+
+function flushReclutaChanges() {
+    const cambios = pendingReclutaChanges;
+    pendingReclutaChanges = [];
+    pendingReclutaTimer = null;
+    
+    if (cambios.length > MAX_INCREMENTAL_CHANGES) {
+        loadReclutas();
+        return;
+    }
+    cambios.forEach(applyReclutaChange);
+}
+
+// Aplica un cambio a la lista local y vuelve a pintar solo con los datos en memoria
+function applyReclutaChange(cambio) {
+    const index = reclutas.findIndex(r => r.id === cambio.id);
+    
+    if (cambio.op === 'delete') {
+        if (index !== -1) {
+            reclutas.splice(index, 1);
+            refreshReclutasView();
+        }
+        return;
+    }
+    
+    fetch(`/api/reclutas/${cambio.id}?fields=tabla`)
+        .then(response => {
+            if (response.status === 404) return null;
+            if (!response.ok) throw new Error('Error al cargar recluta');
+            return response.json();
+        })
+        .then(recluta => {
+            const actual = reclutas.findIndex(r => r.id === cambio.id);
+            if (!recluta) {
+                if (actual !== -1) reclutas.splice(actual, 1);
+            } else if (actual !== -1) {
+                reclutas[actual] = recluta;
+            } else {
+                reclutas.unshift(recluta);
+            }
+            refreshReclutasView();
+        })
+        .catch(error => console.error('Error al aplicar cambio:', error));
 }
 
 // Agregar esta nueva función
 function loadReclutas() {
-    fetch('/api/reclutas')
+    // Solo las columnas que muestra la tabla (sin notas); el detalle se pide al abrir el recluta
+    fetch('/api/reclutas?fields=tabla')
         .then(response => {
             if (!response.ok) {
                 if (response.status === 401) {
@@ -424,7 +638,9 @@ function loadReclutas() {
             return response.json();
         })
         .then(data => {
-            reclutas = data;
+            // La API devuelve la página dentro de 'reclutas' junto con el total
+            reclutas = Array.isArray(data) ? data : data.reclutas;
+            reclutasMarca = data.hasta || null;
             displayReclutas(reclutas);
         })
         .catch(error => {
@@ -466,6 +682,7 @@ function logout() {
     .then(data => {
         if (data.success) {
             currentGerente = null;
+            stopChangeFeed();
             document.getElementById('login-section').style.display = 'block';
             document.getElementById('dashboard-section').style.display = 'none';
             
@@ -2699,92 +2916,95 @@ function showNotification(message, type = 'info', duration = 5000) {
 
 // Cargar entrevistas del mes
 function loadEntrevistas(year, month) {
-    fetch('/api/entrevistas')
+    fetch('/api/entrevistas?fields=calendario')
         .then(response => {
             if (!response.ok) throw new Error('Error al cargar entrevistas');
             return response.json();
         })
-        .then(entrevistas => {
-            // Filtrar entrevistas para el mes actual
-            const entrevistasMes = entrevistas.filter(entrevista => {
-                const fecha = new Date(entrevista.fecha);
-                return fecha.getFullYear() === year && fecha.getMonth() === month;
-            });
-            
-            // Mostrar entrevistas en el calendario
-            entrevistasMes.forEach(entrevista => {
-                const fecha = new Date(entrevista.fecha);
-                const dia = fecha.getDate();
-                
-                // Buscar la celda correspondiente
-                const dayCells = document.querySelectorAll('.calendar-day:not(.other-month)');
-                dayCells.forEach(cell => {
-                    const dayNumber = cell.querySelector('.calendar-day-number');
-                    if (dayNumber && parseInt(dayNumber.textContent) === dia) {
-                        // Añadir evento al día
-                        const eventDiv = document.createElement('div');
-                        eventDiv.className = 'calendar-event';
-                        eventDiv.textContent = `Entrevista: ${entrevista.recluta_nombre}`;
-                        cell.appendChild(eventDiv);
-                    }
-                });
-            });
-            
-            // Mostrar próximas entrevistas en sidebar
-            const upcomingEvents = document.querySelector('.upcoming-events');
-            if (upcomingEvents && entrevistas.length > 0) {
-                // Limpiar eventos existentes
-                const eventsContainer = upcomingEvents.querySelector('h5');
-                if (eventsContainer) {
-                    let nextSibling = eventsContainer.nextElementSibling;
-                    while (nextSibling) {
-                        const toRemove = nextSibling;
-                        nextSibling = nextSibling.nextElementSibling;
-                        upcomingEvents.removeChild(toRemove);
-                    }
-                }
-                
-                // Ordenar entrevistas por fecha
-                entrevistas.sort((a, b) => new Date(a.fecha) - new Date(b.fecha));
-                
-                // Mostrar máximo 3 entrevistas
-                const now = new Date();
-                const proximasEntrevistas = entrevistas
-                    .filter(e => new Date(e.fecha) >= now)
-                    .slice(0, 3);
-                
-                proximasEntrevistas.forEach(entrevista => {
-                    const fecha = new Date(entrevista.fecha);
-                    const eventItem = document.createElement('div');
-                    eventItem.className = 'event-item';
-                    eventItem.innerHTML = `
-                        <div class="event-date">
-                            <span class="event-day">${fecha.getDate()}</span>
-                            <span class="event-month">${getMonthShortName(fecha.getMonth())}</span>
-                        </div>
-                        <div class="event-details">
-                            <h6>Entrevista con ${entrevista.recluta_nombre}</h6>
-                            <p><i class="fas fa-clock"></i> ${entrevista.hora}</p>
-                        </div>
-                    `;
-                    upcomingEvents.appendChild(eventItem);
-                });
-                
-                // Si no hay entrevistas futuras, mostrar mensaje
-                if (proximasEntrevistas.length === 0) {
-                    const noEvents = document.createElement('p');
-                    noEvents.style.textAlign = 'center';
-                    noEvents.style.margin = '20px 0';
-                    noEvents.textContent = 'No hay entrevistas programadas';
-                    upcomingEvents.appendChild(noEvents);
-                }
-            }
-        })
+        .then(data => displayEntrevistas(data.entrevistas, year, month))
         .catch(error => {
             console.error('Error:', error);
         });
 }
 
+// Pintar las entrevistas del mes en el calendario y las próximas en la barra lateral
+function displayEntrevistas(entrevistas, year, month) {
+    // Filtrar entrevistas para el mes actual
+    const entrevistasMes = entrevistas.filter(entrevista => {
+        const fecha = new Date(entrevista.fecha);
+        return fecha.getFullYear() === year && fecha.getMonth() === month;
+    });
+    
+    // Mostrar entrevistas en el calendario
+    entrevistasMes.forEach(entrevista => {
+        const fecha = new Date(entrevista.fecha);
+        const dia = fecha.getDate();
+        
+        // Buscar la celda correspondiente
+        const dayCells = document.querySelectorAll('.calendar-day:not(.other-month)');
+        dayCells.forEach(cell => {
+            const dayNumber = cell.querySelector('.calendar-day-number');
+            if (dayNumber && parseInt(dayNumber.textContent) === dia) {
+                // Añadir evento al día
+                const eventDiv = document.createElement('div');
+                eventDiv.className = 'calendar-event';
+                eventDiv.textContent = `Entrevista: ${entrevista.recluta_nombre}`;
+                cell.appendChild(eventDiv);
+            }
+        });
+    });
+    
+    // Mostrar próximas entrevistas en sidebar
+    const upcomingEvents = document.querySelector('.upcoming-events');
+    if (upcomingEvents && entrevistas.length > 0) {
+        // Limpiar eventos existentes
+        const eventsContainer = upcomingEvents.querySelector('h5');
+        if (eventsContainer) {
+            let nextSibling = eventsContainer.nextElementSibling;
+            while (nextSibling) {
+                const toRemove = nextSibling;
+                nextSibling = nextSibling.nextElementSibling;
+                upcomingEvents.removeChild(toRemove);
+            }
+        }
+        
+        // Ordenar entrevistas por fecha
+        entrevistas.sort((a, b) => new Date(a.fecha) - new Date(b.fecha));
+        
+        // Mostrar máximo 3 entrevistas
+        const now = new Date();
+        const proximasEntrevistas = entrevistas
+            .filter(e => new Date(e.fecha) >= now)
+            .slice(0, 3);
+        
+        proximasEntrevistas.forEach(entrevista => {
+            const fecha = new Date(entrevista.fecha);
+            const eventItem = document.createElement('div');
+            eventItem.className = 'event-item';
+            eventItem.innerHTML = `
+                <div class="event-date">
+                    <span class="event-day">${fecha.getDate()}</span>
+                    <span class="event-month">${getMonthShortName(fecha.getMonth())}</span>
+                </div>
+                <div class="event-details">
+                    <h6>Entrevista con ${entrevista.recluta_nombre}</h6>
+                    <p><i class="fas fa-clock"></i> ${entrevista.hora}</p>
+                </div>
+            `;
+            upcomingEvents.appendChild(eventItem);
+        });
+        
+        // Si no hay entrevistas futuras, mostrar mensaje
+        if (proximasEntrevistas.length === 0) {
+            const noEvents = document.createElement('p');
+            noEvents.style.textAlign = 'center';
+            noEvents.style.margin = '20px 0';
+            noEvents.textContent = 'No hay entrevistas programadas';
+            upcomingEvents.appendChild(noEvents);
+        }
+    }
+}
+
 // Generar días del calendario
 function generateCalendarDays(year, month) {
     const calendarGrid = document.getElementById('calendar-grid');
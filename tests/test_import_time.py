@@ -0,0 +1,14 @@
+"""
+Arranque sin las rutas ni el login: cada escenario de
+benchmarks/bench_import_time.py en un intérprete limpio.
+"""
+
+import pytest
+
+from benchmarks.bench_import_time import ESCENARIOS, cargados, medir
+
+
+@pytest.mark.parametrize('nombre, codigo, prohibidos', ESCENARIOS, ids=[e[0] for e in ESCENARIOS])
+def test_no_importa_modulos_prohibidos(tmp_path, nombre, codigo, prohibidos):
+    _, modulos = medir(codigo, str(tmp_path))
+    assert cargados(modulos, prohibidos) == []
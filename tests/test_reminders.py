@@ -0,0 +1,106 @@
+"""
+Recordatorios con varios procesos: solo el líder del janitor mantiene el
+montículo, y la fecha que cuenta al enviar es la de la fila.
+"""
+
+import configparser
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as appmod
+from models import db, Entrevista, Recluta
+from reminders import ReminderScheduler
+
+
+def _janitor(lider):
+    return types.SimpleNamespace(lider=lider, add_job=lambda *args: None)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = configparser.ConfigParser()
+    config.read_dict(appmod.DEFAULT_CONFIG)
+    config['DEFAULT']['SECRET_KEY'] = 'test'
+    config['DEFAULT']['DATABASE_URI'] = f"sqlite:///{tmp_path / 'test.db'}"
+    config['DEFAULT']['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    config['READ_REPLICA']['MODE'] = 'off'
+    with open(tmp_path / 'config.ini', 'w') as f:
+        config.write(f)
+    appmod.bootstrap(str(tmp_path / 'config.ini'))
+    return appmod.create_app(str(tmp_path / 'config.ini'), minimal=True)
+
+
+def _entrevista(inicio):
+    with db.session.begin():
+        recluta = Recluta(nombre='Ana', email='ana@example.com', telefono='600000000', estado='Activo')
+        db.session.add(recluta)
+        db.session.flush()
+        entrevista = Entrevista(recluta_id=recluta.id, fecha=inicio.date(), hora=inicio.strftime('%H:%M'))
+        db.session.add(entrevista)
+    return entrevista.id
+
+
+def _reprogramar(entrevista_id, inicio):
+    """Lo que hace PUT /api/entrevistas/<id> en otro worker"""
+    with db.engine.begin() as conn:
+        conn.execute(Entrevista.__table__.update().where(Entrevista.id == entrevista_id).values(
+            fecha=inicio.date(), hora=inicio.strftime('%H:%M'), recordatorio_enviado=False
+        ))
+
+
+def _enviado(entrevista_id):
+    with db.engine.connect() as conn:
+        return conn.execute(
+            db.select(Entrevista.recordatorio_enviado).where(Entrevista.id == entrevista_id)
+        ).scalar()
+
+
+def test_reprogramada_en_otro_proceso_no_se_envia_con_la_fecha_antigua(app):
+    with app.app_context():
+        # Vence ya: empieza dentro de 2 horas y la antelación es de 24
+        entrevista_id = _entrevista(datetime.now() + timedelta(hours=2))
+        lider = ReminderScheduler(app, db, _janitor(lider=True))
+        assert lider.recargar() == 1
+
+        # Otro worker la mueve a la semana que viene; el montículo del líder no se entera
+        otro = ReminderScheduler(app, db, _janitor(lider=False))
+        nuevo_inicio = datetime.now() + timedelta(days=7)
+        _reprogramar(entrevista_id, nuevo_inicio)
+        otro.programar(entrevista_id, nuevo_inicio.date(), nuevo_inicio.strftime('%H:%M'), 'pendiente')
+        assert otro._heap == []
+
+        assert lider.tick() == 0
+        assert not _enviado(entrevista_id)
+
+        # La recarga del día anterior la vuelve a traer y entonces sí se envía
+        _reprogramar(entrevista_id, datetime.now() + timedelta(hours=3))
+        lider.recargar()
+        assert lider.tick() == 1
+        assert _enviado(entrevista_id)
+
+
+def test_reprogramada_dentro_del_horizonte_vuelve_al_monticulo(app):
+    with app.app_context():
+        entrevista_id = _entrevista(datetime.now() + timedelta(hours=2))
+        lider = ReminderScheduler(app, db, _janitor(lider=True))
+        lider.recargar()
+
+        # Ahora vence dentro de media hora (horizonte de una hora)
+        _reprogramar(entrevista_id, datetime.now() + timedelta(hours=24, minutes=30))
+        assert lider.tick() == 0
+        assert not _enviado(entrevista_id)
+        assert entrevista_id in lider._vence
+
+
+def test_despues_se_llama_con_el_lote_ya_confirmado(app):
+    with app.app_context():
+        entrevista_id = _entrevista(datetime.now() + timedelta(hours=2))
+        lider = ReminderScheduler(app, db, _janitor(lider=True))
+        vistos = []
+        # Lo que hace la cola de correo: al despertar, otra conexión tiene que ver la fila
+        lider.destino(lambda conn, filas: None, despues=lambda: vistos.append(_enviado(entrevista_id)))
+        assert lider.tick() == 1
+        assert vistos == [True]
@@ -0,0 +1,1254 @@
+"""
+Rutas de la aplicación (blueprint ``main``) y extensiones que usan.
+
+app.py solo lo importa desde ``create_app()`` para la aplicación completa:
+los comandos de consola (``create_app(minimal=True)``, admin_tools.py) no
+cargan Flask-WTF, Flask-Login ni las extensiones.
+"""
+
+from flask import Blueprint, current_app, render_template, request, jsonify, send_file, session
+from werkzeug.utils import secure_filename
+from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from flask_wtf.csrf import CSRFProtect  # Añadido para protección CSRF
+import secrets
+import os
+import logging
+from datetime import datetime, timedelta
+import uuid
+import io
+import json
+import hashlib  # Para verificar la integridad de archivos subidos
+import sqlalchemy as sa
+
+from models import db, Recluta, Usuario, Entrevista, UserSession, AuditLog, ReclutaArchivo, EntrevistaArchivo
+from compression import Compression
+from group_commit import GroupCommit, EscrituraRechazada
+from ip_allowlist import IPAllowlist
+from metrics import metrics
+from slow_queries import SlowQueryLog
+from profiling import RequestProfiler
+from janitor import Janitor
+from reminders import ReminderScheduler
+from mail_queue import MailQueue
+from change_feed import ChangeFeed
+from delta_sync import DeltaSync
+from batch import BatchDispatcher
+from file_cleanup import PREFIJO_URL, FileCleanup
+from fieldsets import Fieldset, FieldsetError
+from archivo import Archivo, NoArchivado, IdOcupado
+import rollups
+
+logger = logging.getLogger(__name__)
+
+# Extensiones: se crean sin app y se ligan en app.create_app()
+csrf = CSRFProtect()
+group_commit = GroupCommit()
+compression = Compression()
+slow_queries = SlowQueryLog()
+profiler = RequestProfiler()
+janitor = Janitor()
+reminders = ReminderScheduler()
+mail_queue = MailQueue()
+change_feed = ChangeFeed()
+delta_sync = DeltaSync()
+batch = BatchDispatcher()
+file_cleanup = FileCleanup()
+archivo = Archivo()
+login_manager = LoginManager()
+login_manager.login_view = 'main.index'
+ip_allowlist = IPAllowlist()
+
+bp = Blueprint('main', __name__)
+
+# Extensiones de archivo permitidas
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return Usuario.query.get(int(user_id))
+
+# Función para verificar si una extensión de archivo es válida
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+# Función para calcular el hash de un archivo
+def calculate_file_hash(file_path):
+    """Calcula el hash SHA-256 de un archivo."""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+# Middleware para verificar IP permitida
+@bp.before_app_request
+def check_ip():
+    # Evitar verificación para activos estáticos
+    if request.path.startswith('/static/'):
+        return
+        
+    # Obtener IP real (incluso detrás de proxy)
+    client_ip = ip_allowlist.client_ip(request)
+    if not ip_allowlist.is_allowed(client_ip):
+        # Registrar intento de acceso no autorizado
+        logger.warning(f"Intento de acceso no autorizado desde IP: {client_ip}")
+        return jsonify({"error": "Acceso no autorizado"}), 403
+
+# Middleware para renovar la sesión en cada petición
+@bp.before_app_request
+def renew_session():
+    if current_user.is_authenticated:
+        # Evitar renovación para activos estáticos
+        if not request.path.startswith('/static/'):
+            session.modified = True
+
+# Función auxiliar para guardar archivos
+def guardar_archivo(archivo, tipo):
+    """
+    Guarda un archivo en el servidor y devuelve la ruta relativa.
+    tipo puede ser 'recluta' o 'usuario'
+    """
+    if not archivo:
+        return None
+    
+    if not allowed_file(archivo.filename):
+        return None
+    
+    # Generar nombre único para el archivo
+    filename = secure_filename(archivo.filename)
+    nombre_base, extension = os.path.splitext(filename)
+    nombre_unico = f"{nombre_base}_{uuid.uuid4().hex}{extension}"
+    
+    # Crear subdirectorio si no existe
+    directorio = os.path.join(current_app.config['UPLOAD_FOLDER'], tipo)
+    if not os.path.exists(directorio):
+        os.makedirs(directorio)
+    
+    # Guardar el archivo
+    ruta_completa = os.path.join(directorio, nombre_unico)
+    archivo.save(ruta_completa)
+    metrics.observe_upload(tipo, os.path.getsize(ruta_completa))
+    
+    # Verificar el archivo guardado (opcional: escaneo antivirus)
+    file_hash = calculate_file_hash(ruta_completa)
+    logger.info(f"Archivo guardado: {ruta_completa}, Hash: {file_hash}")
+    
+    # Devolver ruta relativa para guardar en BD
+    return os.path.join(f"{PREFIJO_URL}/{tipo}", nombre_unico)
+
+# Ruta para placeholders de imágenes
+@bp.route('/api/placeholder/<int:width>/<int:height>')
+def placeholder(width, height):
+    # Limitar tamaños para evitar problemas de recursos
+    width = min(width, 800)
+    height = min(height, 800)
+    
+    # Pillow solo se importa cuando se sirve una imagen
+    from PIL import Image, ImageDraw, ImageFont
+    
+    # Crear una imagen gris con las dimensiones especificadas
+    img = Image.new('RGB', (width, height), color=(200, 200, 200))
+    draw = ImageDraw.Draw(img)
+    
+    # Dibujar un borde
+    draw.rectangle([(0, 0), (width-1, height-1)], outline=(150, 150, 150))
+    
+    # Añadir texto con el tamaño
+    text = f"{width}x{height}"
+    # Usar una fuente por defecto si está disponible
+    try:
+        font = ImageFont.truetype("arial.ttf", 15)
+    except IOError:
+        font = ImageFont.load_default()
+        
+    draw.text((width//2-20, height//2-10), text, fill=(100, 100, 100), font=font)
+    
+    # Convertir a bytes para enviar
+    img_io = io.BytesIO()
+    img.save(img_io, 'PNG')
+    img_io.seek(0)
+    
+    # Cachear imagen por un día
+    response = send_file(img_io, mimetype='image/png')
+    response.headers['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+# Añadir ruta para favicon
+@bp.route('/favicon.ico')
+def favicon():
+    from PIL import Image
+    
+    # Crear un favicon vacío
+    empty_ico = io.BytesIO()
+    img = Image.new('RGB', (16, 16), color=(255, 255, 255))
+    img.save(empty_ico, 'ICO')
+    empty_ico.seek(0)
+    return send_file(empty_ico, mimetype='image/x-icon')
+
+# Rutas principales
+@bp.route('/')
+def index():
+    return render_template('index.html')
+
+# ----- RUTAS API PARA RECLUTAS -----
+
+def _como_serialize_entrevista(datos):
+    # Mismos formatos que Entrevista.serialize
+    if 'codigo_acceso' in datos and datos.get('tipo') != 'virtual':
+        datos['codigo_acceso'] = None
+    if datos.get('fecha_creacion') is not None:
+        datos['fecha_creacion'] = datos['fecha_creacion'].isoformat()
+
+# Campos de ?fields= (columnas, presets y calculados) de reclutas y entrevistas
+# (completo = lo mismo que serialize(), para las consultas que unen el archivo)
+PRESETS_RECLUTA = {
+    'tabla': ('nombre', 'email', 'telefono', 'estado', 'puesto', 'foto_url', 'fecha_registro', 'last_updated'),
+    'resumen': ('nombre', 'estado', 'puesto'),
+    'completo': ('nombre', 'email', 'telefono', 'estado', 'puesto', 'notas', 'foto_url', 'fecha_registro',
+                 'last_updated'),
+}
+PRESETS_ENTREVISTA = {
+    'calendario': ('recluta_id', 'recluta_nombre', 'fecha', 'hora', 'duracion', 'tipo', 'estado', 'last_updated'),
+    'resumen': ('recluta_nombre', 'fecha', 'hora', 'estado'),
+    'completo': ('recluta_id', 'recluta_nombre', 'fecha', 'hora', 'duracion', 'tipo', 'ubicacion', 'notas',
+                 'estado', 'fecha_creacion', 'codigo_acceso', 'last_updated'),
+}
+CAMPOS_RECLUTA = Fieldset(Recluta, presets=PRESETS_RECLUTA)
+CAMPOS_RECLUTA_ARCHIVO = Fieldset(ReclutaArchivo, presets=PRESETS_RECLUTA)
+CAMPOS_ENTREVISTA = Fieldset(
+    Entrevista,
+    presets=PRESETS_ENTREVISTA,
+    calculados={'recluta_nombre': (Recluta.nombre, (Recluta, Recluta.id == Entrevista.recluta_id))},
+    depende={'codigo_acceso': ('tipo',)},
+    post=_como_serialize_entrevista,
+)
+CAMPOS_ENTREVISTA_ARCHIVO = Fieldset(
+    EntrevistaArchivo,
+    presets=PRESETS_ENTREVISTA,
+    calculados={'recluta_nombre': (ReclutaArchivo.nombre,
+                                   (ReclutaArchivo, ReclutaArchivo.id == EntrevistaArchivo.recluta_id))},
+    depende={'codigo_acceso': ('tipo',)},
+    post=_como_serialize_entrevista,
+)
+
+def campos_pedidos(fieldset, extra=()):
+    """Campos de ?fields= o None; FieldsetError si hay nombres no válidos"""
+    return fieldset.parse(request.args.get('fields'), extra)
+
+def incluir_archivo():
+    """?incluir_archivo=1: las lecturas unen también las tablas de archivo"""
+    return request.args.get('incluir_archivo', '').lower() in ('1', 'true')
+
+def unir_archivo(fieldset, fieldset_archivo, campos, condiciones):
+    """
+    UNION ALL de las filas activas y las archivadas con las columnas de
+    ``campos`` más ``archivado``. ``condiciones(modelo)`` da los filtros de
+    cada tabla. Los order_by posteriores con columnas del modelo activo se
+    aplican sobre la unión (deben estar en ``campos``).
+    """
+    activas = fieldset.aplicar(fieldset.modelo.query.filter(*condiciones(fieldset.modelo)), campos)
+    archivadas = fieldset_archivo.aplicar(
+        fieldset_archivo.modelo.query.filter(*condiciones(fieldset_archivo.modelo)), campos
+    )
+    return activas.add_columns(sa.literal(False).label('archivado')).union_all(
+        archivadas.add_columns(sa.literal(True).label('archivado'))
+    )
+
+def condiciones_reclutas(estado=None, busqueda=None, puesto=None, modelo=Recluta):
+    """Condiciones SQL de los filtros de reclutas (listado y operaciones por lote)"""
+    condiciones = []
+    if estado and estado != 'todos':
+        condiciones.append(modelo.estado == estado)
+    if busqueda:
+        search_term = f"%{busqueda}%"
+        condiciones.append(
+            (modelo.nombre.like(search_term)) | 
+            (modelo.email.like(search_term)) |
+            (modelo.telefono.like(search_term))
+        )
+    if puesto:
+        condiciones.append(modelo.puesto == puesto)
+    return condiciones
+
+@bp.route('/api/reclutas', methods=['GET'])
+@login_required
+def get_reclutas():
+    # Implementar paginación
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    
+    # Limitar per_page para evitar sobrecarga
+    per_page = min(per_page, 50)
+    
+    # Campos pedidos (la sincronización incremental necesita last_updated)
+    updated_since = request.args.get('updated_since')
+    con_archivo = incluir_archivo()
+    if updated_since and con_archivo:
+        return jsonify({"error": "incluir_archivo no se admite con updated_since"}), 400
+    try:
+        campos = campos_pedidos(CAMPOS_RECLUTA, ('last_updated',) if updated_since else ())
+    except FieldsetError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Ordenamiento
+    sort_by = request.args.get('sort_by', 'fecha_registro')
+    sort_dir = request.args.get('sort_dir', 'desc')
+    
+    if sort_by not in ['nombre', 'email', 'fecha_registro', 'estado']:
+        sort_by = 'fecha_registro'
+    
+    # Construir consulta base con los filtros opcionales (con el archivo: unión de las dos tablas)
+    def condiciones(modelo):
+        return condiciones_reclutas(
+            request.args.get('estado'), request.args.get('busqueda'), request.args.get('puesto'), modelo
+        )
+    salida = campos
+    if con_archivo:
+        campos = campos or CAMPOS_RECLUTA.parse('completo')
+        salida = campos + ['archivado']
+        query = unir_archivo(CAMPOS_RECLUTA, CAMPOS_RECLUTA_ARCHIVO, campos + [sort_by], condiciones)
+    else:
+        query = Recluta.query.filter(*condiciones(Recluta))
+        if campos:
+            query = CAMPOS_RECLUTA.aplicar(query, campos)
+    
+    # Sincronización incremental: solo lo cambiado y borrado desde la marca
+    if updated_since:
+        respuesta, status = delta_sync.cambios(query, Recluta, 'recluta', 'reclutas', updated_since,
+                                               lambda r: CAMPOS_RECLUTA.serializar(r, campos))
+        return jsonify(respuesta), status
+    marca = delta_sync.marca_actual()
+    
+    if sort_dir == 'asc':
+        query = query.order_by(getattr(Recluta, sort_by).asc())
+    else:
+        query = query.order_by(getattr(Recluta, sort_by).desc())
+    
+    # Ejecutar consulta paginada
+    paginacion = query.paginate(page=page, per_page=per_page, error_out=False)
+    
+    # Preparar respuesta
+    respuesta = {
+        'reclutas': [CAMPOS_RECLUTA.serializar(r, salida) for r in paginacion.items],
+        'total': paginacion.total,
+        'paginas': paginacion.pages,
+        'pagina_actual': page,
+        'hasta': marca
+    }
+    
+    return jsonify(respuesta)
+
+@bp.route('/api/reclutas/<int:id>', methods=['GET'])
+@login_required
+def get_recluta(id):
+    try:
+        campos = campos_pedidos(CAMPOS_RECLUTA)
+    except FieldsetError as e:
+        return jsonify({"error": str(e)}), 400
+    if incluir_archivo():
+        campos = campos or CAMPOS_RECLUTA.parse('completo')
+        recluta = unir_archivo(CAMPOS_RECLUTA, CAMPOS_RECLUTA_ARCHIVO, campos, lambda m: [m.id == id]).first_or_404()
+        return jsonify(CAMPOS_RECLUTA.serializar(recluta, campos + ['archivado']))
+    if campos:
+        recluta = CAMPOS_RECLUTA.aplicar(Recluta.query.filter(Recluta.id == id), campos).first_or_404()
+        return jsonify(CAMPOS_RECLUTA.serializar(recluta, campos))
+    recluta = Recluta.query.get_or_404(id)
+    return jsonify(recluta.serialize())
+
+@bp.route('/api/reclutas', methods=['POST'])
+@login_required
+def add_recluta():
+    # Si hay datos de formulario multipart (con archivo)
+    if 'multipart/form-data' in request.content_type or 'form-data' in request.content_type:
+        data = request.form.to_dict()
+        
+        # Procesar archivo si existe
+        if 'foto' in request.files:
+            foto = request.files['foto']
+            if foto and foto.filename:
+                foto_url = guardar_archivo(foto, 'recluta')
+                if foto_url:
+                    data['foto_url'] = foto_url
+    else:
+        # JSON data
+        data = request.get_json()
+    
+    # Verificar datos obligatorios
+    if not all(key in data for key in ['nombre', 'email', 'telefono', 'estado']):
+        return jsonify({"success": False, "message": "Faltan datos requeridos"}), 400
+    
+    def crear():
+        nuevo = Recluta(
+            nombre=data['nombre'],
+            email=data['email'],
+            telefono=data['telefono'],
+            estado=data['estado'],
+            puesto=data.get('puesto', ''),
+            notas=data.get('notas', ''),
+            foto_url=data.get('foto_url', '')
+        )
+        
+        db.session.add(nuevo)
+        db.session.flush()
+        rollups.reclutas(db.session, [((nuevo.estado, nuevo.puesto), 1)])
+        return nuevo.serialize()
+    
+    try:
+        resultado = group_commit.ejecutar(crear)
+        change_feed.publicar('recluta', resultado['id'], 'create', resultado['last_updated'])
+        logger.info(f"Recluta creado: ID={resultado['id']}, Nombre={resultado['nombre']}")
+        return jsonify(resultado), 201
+    except Exception as e:
+        logger.error(f"Error al crear recluta: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al crear el recluta: {str(e)}"}), 500
+
+@bp.route('/api/reclutas/<int:id>', methods=['PUT'])
+@login_required
+def update_recluta(id):
+    foto_nueva = None
+    
+    # Si hay datos de formulario multipart (con archivo)
+    if 'multipart/form-data' in request.content_type or 'form-data' in request.content_type:
+        data = request.form.to_dict()
+        
+        # Procesar archivo si existe
+        if 'foto' in request.files:
+            foto = request.files['foto']
+            if foto and foto.filename:
+                foto_nueva = guardar_archivo(foto, 'recluta')
+                if foto_nueva:
+                    data['foto_url'] = foto_nueva
+    else:
+        # JSON data
+        data = request.get_json()
+    
+    def actualizar():
+        recluta = Recluta.query.get(id)
+        if recluta is None:
+            return None
+        antes = (recluta.estado, recluta.puesto)
+        
+        # Actualizar campos si están presentes
+        if 'nombre' in data:
+            recluta.nombre = data['nombre']
+        if 'email' in data:
+            recluta.email = data['email']
+        if 'telefono' in data:
+            recluta.telefono = data['telefono']
+        if 'estado' in data:
+            recluta.estado = data['estado']
+        if 'puesto' in data:
+            recluta.puesto = data['puesto']
+        if 'notas' in data:
+            recluta.notas = data['notas']
+        foto_anterior = None
+        if 'foto_url' in data and data['foto_url'] != recluta.foto_url:
+            foto_anterior = recluta.foto_url
+            recluta.foto_url = data['foto_url']
+        
+        db.session.flush()
+        rollups.reclutas(db.session, rollups.cambio(antes, (recluta.estado, recluta.puesto)))
+        return recluta.serialize(), foto_anterior
+    
+    try:
+        resultado = group_commit.ejecutar(actualizar)
+        if resultado is None:
+            # La foto subida no la referencia nadie
+            file_cleanup.borrar([foto_nueva])
+            return jsonify({"error": "Recurso no encontrado"}), 404
+        resultado, foto_anterior = resultado
+        # La foto anterior se borra solo si el cambio se confirmó
+        file_cleanup.borrar([foto_anterior])
+        change_feed.publicar('recluta', resultado['id'], 'update', resultado['last_updated'])
+        logger.info(f"Recluta actualizado: ID={resultado['id']}, Nombre={resultado['nombre']}")
+        return jsonify(resultado)
+    except Exception as e:
+        logger.error(f"Error al actualizar recluta: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al actualizar el recluta: {str(e)}"}), 500
+
+@bp.route('/api/reclutas/<int:id>', methods=['DELETE'])
+@login_required
+def delete_recluta(id):
+    try:
+        def eliminar():
+            recluta = Recluta.query.get(id)
+            if recluta is None:
+                return None
+            # Las entrevistas se borran en cascada: también se anuncian
+            entrevistas = [e.id for e in recluta.entrevistas]
+            rollups.reclutas(db.session, [((recluta.estado, recluta.puesto), -1)])
+            rollups.entrevistas(db.session, [((e.fecha, e.estado, e.tipo), -1) for e in recluta.entrevistas])
+            db.session.delete(recluta)
+            delta_sync.registrar_bajas('recluta', [id])
+            delta_sync.registrar_bajas('entrevista', entrevistas)
+            return entrevistas, recluta.foto_url
+        
+        resultado = group_commit.ejecutar(eliminar)
+        if resultado is None:
+            return jsonify({"error": "Recurso no encontrado"}), 404
+        entrevistas, foto_url = resultado
+        # Si el recluta tenía una foto personalizada, se borra en segundo plano
+        file_cleanup.borrar([foto_url])
+        for entrevista_id in entrevistas:
+            reminders.cancelar(entrevista_id)
+        change_feed.publicar_lote([('recluta', id, 'delete', None)]
+                                  + [('entrevista', entrevista_id, 'delete', None) for entrevista_id in entrevistas])
+        logger.info(f"Recluta eliminado: ID={id}")
+        return jsonify({"success": True, "message": "Recluta eliminado correctamente"})
+    except Exception as e:
+        logger.error(f"Error al eliminar recluta: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al eliminar el recluta: {str(e)}"}), 500
+
+# ----- OPERACIONES POR LOTE SOBRE RECLUTAS -----
+
+# Campos que se pueden cambiar a la vez en muchos reclutas
+CAMPOS_LOTE = ('estado', 'puesto', 'notas')
+
+def seleccion_lote(data):
+    """
+    Condición SQL de una operación por lote: {"ids": [...]} o
+    {"filtro": {"estado", "busqueda", "puesto"}}. None si no selecciona nada;
+    un filtro vacío no se acepta para no afectar a todos los reclutas.
+    """
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise ValueError("ids debe ser una lista de enteros")
+        return Recluta.id.in_(ids) if ids else None
+    filtro = data.get('filtro') or {}
+    condiciones = condiciones_reclutas(filtro.get('estado'), filtro.get('busqueda'), filtro.get('puesto'))
+    return sa.and_(*condiciones) if condiciones else None
+
+def autor_peticion():
+    """
+    (usuario, IP) de la petición. Se obtiene antes de la unidad de trabajo:
+    con GROUP_COMMIT esta se ejecuta en el hilo escritor, sin contexto de petición.
+    """
+    return current_user.id, ip_allowlist.client_ip(request)
+
+def auditar_lote(autor, accion, ids, detalles=None):
+    """Entradas de AuditLog de una operación por lote (se insertan en un solo executemany)"""
+    user_id, client_ip = autor
+    AuditLog.log_lote([
+        {'user_id': user_id, 'ip_address': client_ip, 'action': accion,
+         'entity_type': 'recluta', 'entity_id': recluta_id, 'details': detalles}
+        for recluta_id in ids
+    ])
+
+@bp.route('/api/reclutas', methods=['PATCH'])
+@login_required
+def bulk_update_reclutas():
+    data = request.get_json(silent=True) or {}
+    cambios = data.get('cambios') or {}
+    
+    if not cambios or any(campo not in CAMPOS_LOTE for campo in cambios):
+        return jsonify({"success": False, "message": f"cambios admite solo: {', '.join(CAMPOS_LOTE)}"}), 400
+    if 'estado' in cambios and not cambios['estado']:
+        return jsonify({"success": False, "message": "El estado no puede estar vacío"}), 400
+    try:
+        condicion = seleccion_lote(data)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if condicion is None:
+        return jsonify({"success": False, "message": "Indique ids o un filtro"}), 400
+    
+    tabla = Recluta.__table__
+    autor = autor_peticion()
+    
+    def actualizar():
+        # Ids para auditoría y feed; la actualización es un único UPDATE con la misma condición
+        ids = db.session.execute(sa.select(Recluta.id).where(condicion)).scalars().all()
+        if not ids:
+            return [], None
+        ahora = datetime.utcnow()
+        if 'estado' in cambios or 'puesto' in cambios:
+            grupos = db.session.execute(
+                sa.select(Recluta.estado, Recluta.puesto, sa.func.count()).where(condicion)
+                .group_by(Recluta.estado, Recluta.puesto)
+            ).all()
+            rollups.reclutas(db.session, [
+                (clave, n * total) for estado, puesto, total in grupos
+                for clave, n in rollups.cambio((estado, puesto),
+                                               (cambios.get('estado', estado), cambios.get('puesto', puesto)))
+            ])
+        db.session.execute(sa.update(tabla).where(condicion).values(**cambios, last_updated=ahora))
+        auditar_lote(autor, 'recluta_actualizado_lote', ids, json.dumps(cambios, ensure_ascii=False))
+        return ids, ahora
+    
+    try:
+        ids, ahora = group_commit.ejecutar(actualizar)
+        change_feed.publicar_lote([('recluta', recluta_id, 'update', ahora) for recluta_id in ids])
+        logger.info(f"Reclutas actualizados por lote: {len(ids)} ({', '.join(cambios)})")
+        return jsonify({"success": True, "actualizados": len(ids)})
+    except Exception as e:
+        logger.error(f"Error al actualizar reclutas por lote: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al actualizar los reclutas: {str(e)}"}), 500
+
+@bp.route('/api/reclutas', methods=['DELETE'])
+@login_required
+def bulk_delete_reclutas():
+    data = request.get_json(silent=True) or {}
+    try:
+        condicion = seleccion_lote(data)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if condicion is None:
+        return jsonify({"success": False, "message": "Indique ids o un filtro"}), 400
+    autor = autor_peticion()
+    
+    def eliminar():
+        filas = db.session.execute(sa.select(Recluta.id, Recluta.foto_url).where(condicion)).all()
+        if not filas:
+            return [], [], []
+        ids = [fila.id for fila in filas]
+        
+        # Las entrevistas de esos reclutas primero (la cascada del ORM no aplica a un DELETE masivo)
+        seleccion = sa.select(Recluta.id).where(condicion).scalar_subquery()
+        entrevistas = db.session.execute(
+            sa.select(Entrevista.id).where(Entrevista.recluta_id.in_(seleccion))
+        ).scalars().all()
+        rollups.reclutas(db.session, [
+            ((estado, puesto), -total) for estado, puesto, total in db.session.execute(
+                sa.select(Recluta.estado, Recluta.puesto, sa.func.count()).where(condicion)
+                .group_by(Recluta.estado, Recluta.puesto))
+        ])
+        rollups.entrevistas(db.session, [
+            ((fecha, estado, tipo), -total) for fecha, estado, tipo, total in db.session.execute(
+                sa.select(Entrevista.fecha, Entrevista.estado, Entrevista.tipo, sa.func.count())
+                .where(Entrevista.recluta_id.in_(seleccion))
+                .group_by(Entrevista.fecha, Entrevista.estado, Entrevista.tipo))
+        ])
+        db.session.execute(sa.delete(Entrevista.__table__).where(Entrevista.__table__.c.recluta_id.in_(seleccion)))
+        db.session.execute(sa.delete(Recluta.__table__).where(condicion))
+        
+        delta_sync.registrar_bajas('recluta', ids)
+        delta_sync.registrar_bajas('entrevista', entrevistas)
+        auditar_lote(autor, 'recluta_eliminado_lote', ids)
+        return ids, entrevistas, [fila.foto_url for fila in filas]
+    
+    try:
+        ids, entrevistas, fotos = group_commit.ejecutar(eliminar)
+        file_cleanup.borrar(fotos)
+        for entrevista_id in entrevistas:
+            reminders.cancelar(entrevista_id)
+        change_feed.publicar_lote([('recluta', recluta_id, 'delete', None) for recluta_id in ids]
+                                  + [('entrevista', entrevista_id, 'delete', None) for entrevista_id in entrevistas])
+        logger.info(f"Reclutas eliminados por lote: {len(ids)} (entrevistas: {len(entrevistas)})")
+        return jsonify({"success": True, "eliminados": len(ids), "entrevistas_eliminadas": len(entrevistas)})
+    except Exception as e:
+        logger.error(f"Error al eliminar reclutas por lote: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al eliminar los reclutas: {str(e)}"}), 500
+
+# ----- ARCHIVO DE RECLUTAS CERRADOS -----
+
+@bp.route('/api/reclutas/<int:id>/restaurar', methods=['POST'])
+@login_required
+def restaurar_recluta(id):
+    autor = autor_peticion()
+    
+    def restaurar():
+        entrevistas = archivo.restaurar(db.session, id)
+        auditar_lote(autor, 'recluta_restaurado', [id])
+        return Recluta.query.get(id).serialize(), entrevistas
+    
+    try:
+        resultado, entrevistas = group_commit.ejecutar(restaurar)
+    except NoArchivado:
+        return jsonify({"error": "Recurso no encontrado"}), 404
+    except IdOcupado as e:
+        return jsonify({"success": False, "message": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error al restaurar recluta: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al restaurar el recluta: {str(e)}"}), 500
+    
+    change_feed.publicar_lote([('recluta', id, 'create', resultado['last_updated'])]
+                              + [('entrevista', entrevista_id, 'create', resultado['last_updated'])
+                                 for entrevista_id in entrevistas])
+    logger.info(f"Recluta restaurado del archivo: ID={id} (entrevistas: {len(entrevistas)})")
+    return jsonify(resultado)
+
+# ----- RUTAS PARA AUTENTICACIÓN -----
+
+@bp.route('/api/login', methods=['POST'])
+def login_usuario():
+    data = request.get_json()
+    email = data.get('email')
+    password = data.get('password')
+
+    if not email or not password:
+        return jsonify({"success": False, "message": "Email y contraseña son requeridos"}), 400
+
+    usuario = Usuario.query.filter_by(email=email).first()
+
+    if usuario and usuario.check_password(password):
+        # Registrar la sesión
+        session_token = secrets.token_hex(16)
+        client_ip = ip_allowlist.client_ip(request)
+        
+        # Crear registro de sesión
+        user_session = UserSession(
+            usuario_id=usuario.id,
+            ip_address=client_ip,
+            session_token=session_token,
+            expires_at=datetime.utcnow() + timedelta(hours=24),
+            is_valid=True
+        )
+        
+        db.session.add(user_session)
+        db.session.commit()
+        
+        # Iniciar sesión con Flask-Login
+        login_user(usuario, remember=True)
+        
+        # Guardar token en sesión
+        session['session_token'] = session_token
+        session.permanent = True
+        
+        logger.info(f"Inicio de sesión exitoso: Usuario={email}, IP={client_ip}")
+        return jsonify({"success": True, "usuario": usuario.serialize()}), 200
+    else:
+        # Registrar intento fallido
+        client_ip = ip_allowlist.client_ip(request)
+        logger.warning(f"Intento de inicio de sesión fallido: Email={email}, IP={client_ip}")
+        return jsonify({"success": False, "message": "Credenciales incorrectas"}), 401
+
+@bp.route('/api/logout', methods=['POST'])
+@login_required
+def logout_usuario():
+    # Invalidar la sesión actual en la base de datos
+    if 'session_token' in session:
+        user_session = UserSession.query.filter_by(
+            usuario_id=current_user.id,
+            session_token=session['session_token']
+        ).first()
+        
+        if user_session:
+            user_session.is_valid = False
+            db.session.commit()
+    
+    # Limpiar la sesión de Flask
+    logout_user()
+    session.clear()
+    
+    return jsonify({"success": True}), 200
+
+@bp.route('/api/check-auth', methods=['GET'])
+def check_auth():
+    if current_user.is_authenticated:
+        # Verificar si la sesión sigue siendo válida en la base de datos
+        if 'session_token' in session:
+            user_session = UserSession.query.filter_by(
+                usuario_id=current_user.id,
+                session_token=session['session_token'],
+                is_valid=True
+            ).first()
+            
+            if user_session and user_session.expires_at > datetime.utcnow():
+                return jsonify({"authenticated": True, "usuario": current_user.serialize()}), 200
+            else:
+                # Sesión expirada o inválida
+                logout_user()
+                session.clear()
+    
+    return jsonify({"authenticated": False}), 401
+
+# ----- RUTAS PARA GESTIÓN DE PERFIL -----
+
+@bp.route('/api/perfil', methods=['PUT'])
+@login_required
+def actualizar_perfil():
+    usuario = current_user
+    foto_anterior = None
+    
+    if request.content_type and 'multipart/form-data' in request.content_type:
+        # Form data con posible archivo
+        nombre = request.form.get('nombre')
+        telefono = request.form.get('telefono')
+        
+        if 'foto' in request.files:
+            archivo = request.files['foto']
+            if archivo and archivo.filename:
+                ruta_relativa = guardar_archivo(archivo, 'usuario')
+                if ruta_relativa:
+                    # La foto anterior se borra tras confirmar el cambio
+                    foto_anterior = usuario.foto_url
+                    usuario.foto_url = ruta_relativa
+    else:
+        # JSON data
+        data = request.get_json()
+        nombre = data.get('nombre')
+        telefono = data.get('telefono')
+    
+    # Actualizar datos
+    if hasattr(usuario, 'nombre') and nombre:
+        usuario.nombre = nombre
+    if hasattr(usuario, 'telefono') and telefono:
+        usuario.telefono = telefono
+    
+    try:
+        db.session.commit()
+        file_cleanup.borrar([foto_anterior])
+        logger.info(f"Perfil actualizado: Usuario={usuario.email}")
+        return jsonify({"success": True, "usuario": usuario.serialize()})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al actualizar perfil: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al actualizar perfil: {str(e)}"}), 500
+
+@bp.route('/api/cambiar-password', methods=['POST'])
+@login_required
+def cambiar_password():
+    data = request.get_json()
+    
+    current_password = data.get('current_password')
+    new_password = data.get('new_password')
+    
+    if not current_password or not new_password:
+        return jsonify({"success": False, "message": "Las contraseñas son requeridas"}), 400
+    
+    # Verificar que la contraseña actual sea correcta
+    if not current_user.check_password(current_password):
+        # Registrar intento fallido
+        client_ip = ip_allowlist.client_ip(request)
+        logger.warning(f"Intento de cambio de contraseña fallido: Usuario={current_user.email}, IP={client_ip}")
+        return jsonify({"success": False, "message": "Contraseña actual incorrecta"}), 400
+    
+    # Validar nueva contraseña
+    if len(new_password) < 8:
+        return jsonify({"success": False, "message": "La nueva contraseña debe tener al menos 8 caracteres"}), 400
+    
+    try:
+        # Actualizar contraseña
+        current_user.password = new_password
+        db.session.commit()
+        
+        # Registrar cambio exitoso
+        logger.info(f"Contraseña cambiada: Usuario={current_user.email}")
+        
+        return jsonify({"success": True, "message": "Contraseña actualizada correctamente"})
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error al cambiar contraseña: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al cambiar contraseña: {str(e)}"}), 500
+
+# ----- RUTAS PARA ENTREVISTAS -----
+
+@bp.route('/api/entrevistas', methods=['GET'])
+@login_required
+def get_entrevistas():
+    # Implementar paginación
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    
+    # Limitar per_page para evitar sobrecarga
+    per_page = min(per_page, 50)
+    
+    # Filtros opcionales
+    estado = request.args.get('estado')
+    recluta_id = request.args.get('recluta_id')
+    fecha_desde = request.args.get('fecha_desde')
+    fecha_hasta = request.args.get('fecha_hasta')
+    
+    def condiciones(modelo):
+        condiciones = []
+        
+        # Aplicar filtros si existen
+        if estado:
+            condiciones.append(modelo.estado == estado)
+        
+        if recluta_id:
+            condiciones.append(modelo.recluta_id == recluta_id)
+        
+        if fecha_desde:
+            try:
+                fecha_desde_dt = datetime.strptime(fecha_desde, '%Y-%m-%d').date()
+                condiciones.append(modelo.fecha >= fecha_desde_dt)
+            except ValueError:
+                pass
+        
+        if fecha_hasta:
+            try:
+                fecha_hasta_dt = datetime.strptime(fecha_hasta, '%Y-%m-%d').date()
+                condiciones.append(modelo.fecha <= fecha_hasta_dt)
+            except ValueError:
+                pass
+        return condiciones
+    
+    # Campos pedidos (la sincronización incremental necesita last_updated)
+    updated_since = request.args.get('updated_since')
+    con_archivo = incluir_archivo()
+    if updated_since and con_archivo:
+        return jsonify({"error": "incluir_archivo no se admite con updated_since"}), 400
+    try:
+        campos = campos_pedidos(CAMPOS_ENTREVISTA, ('last_updated',) if updated_since else ())
+    except FieldsetError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # Construir consulta base (con el archivo: unión de las dos tablas)
+    salida = campos
+    if con_archivo:
+        campos = campos or CAMPOS_ENTREVISTA.parse('completo')
+        salida = campos + ['archivado']
+        query = unir_archivo(CAMPOS_ENTREVISTA, CAMPOS_ENTREVISTA_ARCHIVO, campos + ['fecha', 'hora'], condiciones)
+    else:
+        query = Entrevista.query.filter(*condiciones(Entrevista))
+        if campos:
+            query = CAMPOS_ENTREVISTA.aplicar(query, campos)
+    
+    # Sincronización incremental: solo lo cambiado y borrado desde la marca
+    if updated_since:
+        respuesta, status = delta_sync.cambios(query, Entrevista, 'entrevista', 'entrevistas', updated_since,
+                                               lambda e: CAMPOS_ENTREVISTA.serializar(e, campos))
+        return jsonify(respuesta), status
+    marca = delta_sync.marca_actual()
+    
+    # Ordenamiento por fecha
+    query = query.order_by(Entrevista.fecha.asc(), Entrevista.hora.asc())
+    
+    # Ejecutar consulta paginada
+    paginacion = query.paginate(page=page, per_page=per_page, error_out=False)
+    
+    # Preparar respuesta
+    respuesta = {
+        'entrevistas': [CAMPOS_ENTREVISTA.serializar(e, salida) for e in paginacion.items],
+        'total': paginacion.total,
+        'paginas': paginacion.pages,
+        'pagina_actual': page,
+        'hasta': marca
+    }
+    
+    return jsonify(respuesta)
+
+@bp.route('/api/entrevistas/<int:id>', methods=['GET'])
+@login_required
+def get_entrevista(id):
+    try:
+        campos = campos_pedidos(CAMPOS_ENTREVISTA)
+    except FieldsetError as e:
+        return jsonify({"error": str(e)}), 400
+    if incluir_archivo():
+        campos = campos or CAMPOS_ENTREVISTA.parse('completo')
+        entrevista = unir_archivo(CAMPOS_ENTREVISTA, CAMPOS_ENTREVISTA_ARCHIVO, campos,
+                                  lambda m: [m.id == id]).first_or_404()
+        return jsonify(CAMPOS_ENTREVISTA.serializar(entrevista, campos + ['archivado']))
+    if campos:
+        entrevista = CAMPOS_ENTREVISTA.aplicar(Entrevista.query.filter(Entrevista.id == id), campos).first_or_404()
+        return jsonify(CAMPOS_ENTREVISTA.serializar(entrevista, campos))
+    entrevista = Entrevista.query.get_or_404(id)
+    return jsonify(entrevista.serialize())
+
+@bp.route('/api/entrevistas', methods=['POST'])
+@login_required
+def add_entrevista():
+    data = request.get_json()
+    
+    # Verificar datos obligatorios
+    if not all(key in data for key in ['recluta_id', 'fecha', 'hora']):
+        return jsonify({"success": False, "message": "Faltan datos requeridos"}), 400
+    
+    try:
+        # Convertir la fecha de string a objeto Date
+        fecha = datetime.strptime(data['fecha'], '%Y-%m-%d').date()
+        
+        # Verificar si ya existe una entrevista en el mismo horario
+        hora_inicio = data['hora']
+        duracion = data.get('duracion', 60)  # duración en minutos
+        
+        # Calcular hora de finalización
+        hora_inicio_dt = datetime.strptime(hora_inicio, '%H:%M')
+        hora_fin_dt = hora_inicio_dt + timedelta(minutes=duracion)
+        hora_fin = hora_fin_dt.strftime('%H:%M')
+        
+        def crear():
+            # Verificar que el recluta existe
+            recluta = Recluta.query.get(data['recluta_id'])
+            if not recluta:
+                raise EscrituraRechazada({"success": False, "message": "El recluta no existe"}, 404)
+            
+            # Verificar colisiones
+            entrevistas_existentes = Entrevista.query.filter_by(fecha=fecha).all()
+            for entrevista in entrevistas_existentes:
+                e_hora_inicio_dt = datetime.strptime(entrevista.hora, '%H:%M')
+                e_hora_fin_dt = e_hora_inicio_dt + timedelta(minutes=entrevista.duracion)
+                
+                # Convertir a minutos desde medianoche para comparación fácil
+                nueva_inicio_min = hora_inicio_dt.hour * 60 + hora_inicio_dt.minute
+                nueva_fin_min = hora_fin_dt.hour * 60 + hora_fin_dt.minute
+                exist_inicio_min = e_hora_inicio_dt.hour * 60 + e_hora_inicio_dt.minute
+                exist_fin_min = e_hora_fin_dt.hour * 60 + e_hora_fin_dt.minute
+                
+                # Verificar si hay solapamiento
+                if (nueva_inicio_min < exist_fin_min and nueva_fin_min > exist_inicio_min):
+                    raise EscrituraRechazada({
+                        "success": False, 
+                        "message": f"La entrevista se solapa con otra programada para el recluta {entrevista.recluta_nombre} a las {entrevista.hora}"
+                    }, 400)
+            
+            # Crear la nueva entrevista
+            nueva = Entrevista(
+                recluta_id=data['recluta_id'],
+                fecha=fecha,
+                hora=data['hora'],
+                duracion=data.get('duracion', 60),
+                tipo=data.get('tipo', 'presencial'),
+                ubicacion=data.get('ubicacion', ''),
+                notas=data.get('notas', ''),
+                estado=data.get('estado', 'pendiente')
+            )
+            
+            db.session.add(nueva)
+            db.session.flush()
+            rollups.entrevistas(db.session, [((nueva.fecha, nueva.estado, nueva.tipo), 1)])
+            entrevista = nueva.serialize()
+            
+            # Invitación por correo: se encola en la misma transacción y la envía el hilo de correo
+            if data.get('enviar_invitacion', False):
+                mail_queue.encolar('invitacion', recluta.email, entrevista)
+            return entrevista
+        
+        resultado = group_commit.ejecutar(crear)
+        
+        # Registrar la creación de la entrevista
+        logger.info(f"Entrevista creada: ID={resultado['id']}, Recluta={resultado['recluta_nombre']}, Fecha={fecha}, Hora={data['hora']}")
+        reminders.programar(resultado['id'], fecha, resultado['hora'], resultado['estado'])
+        change_feed.publicar('entrevista', resultado['id'], 'create', resultado['last_updated'])
+        
+        if data.get('enviar_invitacion', False):
+            logger.info(f"Invitación encolada para entrevista ID={resultado['id']}")
+            mail_queue.despertar()
+        
+        return jsonify(resultado), 201
+    except EscrituraRechazada as e:
+        return jsonify(e.respuesta), e.status
+    except ValueError as e:
+        logger.error(f"Error de formato en datos de entrevista: {str(e)}")
+        return jsonify({"success": False, "message": "Formato de fecha u hora incorrecto"}), 400
+    except Exception as e:
+        logger.error(f"Error al crear entrevista: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al crear la entrevista: {str(e)}"}), 500
+
+@bp.route('/api/entrevistas/<int:id>', methods=['PUT'])
+@login_required
+def update_entrevista(id):
+    Entrevista.query.get_or_404(id)
+    data = request.get_json()
+    
+    def actualizar():
+        entrevista = Entrevista.query.get(id)
+        if entrevista is None:
+            return {"error": "Recurso no encontrado"}, 404
+        antes = (entrevista.fecha, entrevista.estado, entrevista.tipo)
+        
+        # Actualizar campos si están presentes
+        if 'fecha' in data:
+            entrevista.fecha = datetime.strptime(data['fecha'], '%Y-%m-%d').date()
+        
+        if 'hora' in data:
+            entrevista.hora = data['hora']
+        
+        if 'duracion' in data:
+            entrevista.duracion = data['duracion']
+        
+        if 'tipo' in data:
+            entrevista.tipo = data['tipo']
+        
+        if 'ubicacion' in data:
+            entrevista.ubicacion = data['ubicacion']
+        
+        if 'notas' in data:
+            entrevista.notas = data['notas']
+        
+        if 'estado' in data:
+            entrevista.estado = data['estado']
+        
+        # Si se cambia la fecha u hora, verificar colisiones
+        if 'fecha' in data or 'hora' in data:
+            # Entrevista reprogramada: hay que volver a recordarla
+            entrevista.recordatorio_enviado = False
+            
+            hora_inicio_dt = datetime.strptime(entrevista.hora, '%H:%M')
+            hora_fin_dt = hora_inicio_dt + timedelta(minutes=entrevista.duracion)
+            
+            # Buscar otras entrevistas en la misma fecha
+            otras_entrevistas = Entrevista.query.filter(
+                Entrevista.fecha == entrevista.fecha,
+                Entrevista.id != entrevista.id
+            ).all()
+            
+            for otra in otras_entrevistas:
+                otra_inicio_dt = datetime.strptime(otra.hora, '%H:%M')
+                otra_fin_dt = otra_inicio_dt + timedelta(minutes=otra.duracion)
+                
+                # Convertir a minutos para comparación
+                entrevista_inicio_min = hora_inicio_dt.hour * 60 + hora_inicio_dt.minute
+                entrevista_fin_min = hora_fin_dt.hour * 60 + hora_fin_dt.minute
+                otra_inicio_min = otra_inicio_dt.hour * 60 + otra_inicio_dt.minute
+                otra_fin_min = otra_fin_dt.hour * 60 + otra_fin_dt.minute
+                
+                # Verificar solapamiento (los cambios de esta unidad se descartan)
+                if (entrevista_inicio_min < otra_fin_min and entrevista_fin_min > otra_inicio_min):
+                    raise EscrituraRechazada({
+                        "success": False, 
+                        "message": f"La entrevista se solapa con otra programada para el recluta {otra.recluta_nombre} a las {otra.hora}"
+                    }, 400)
+        
+        db.session.flush()
+        rollups.entrevistas(db.session, rollups.cambio(antes, (entrevista.fecha, entrevista.estado, entrevista.tipo)))
+        return entrevista.serialize(), 200
+    
+    try:
+        resultado, status = group_commit.ejecutar(actualizar)
+        if status != 200:
+            return jsonify(resultado), status
+        logger.info(f"Entrevista actualizada: ID={resultado['id']}")
+        reminders.programar(resultado['id'], resultado['fecha'], resultado['hora'], resultado['estado'])
+        change_feed.publicar('entrevista', resultado['id'], 'update', resultado['last_updated'])
+        return jsonify(resultado)
+    except EscrituraRechazada as e:
+        return jsonify(e.respuesta), e.status
+    except ValueError as e:
+        logger.error(f"Error de formato en datos de entrevista: {str(e)}")
+        return jsonify({"success": False, "message": "Formato de fecha u hora incorrecto"}), 400
+    except Exception as e:
+        logger.error(f"Error al actualizar entrevista: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al actualizar la entrevista: {str(e)}"}), 500
+
+@bp.route('/api/entrevistas/<int:id>', methods=['DELETE'])
+@login_required
+def delete_entrevista(id):
+    entrevista = Entrevista.query.get_or_404(id)
+    
+    try:
+        # Guardar info para el log
+        entrevista_info = f"ID={entrevista.id}, Recluta={entrevista.recluta_id}, Fecha={entrevista.fecha}"
+        
+        def eliminar():
+            entrevista = Entrevista.query.get(id)
+            if entrevista is not None:
+                rollups.entrevistas(db.session, [((entrevista.fecha, entrevista.estado, entrevista.tipo), -1)])
+                db.session.delete(entrevista)
+                delta_sync.registrar_bajas('entrevista', [id])
+        
+        group_commit.ejecutar(eliminar)
+        reminders.cancelar(id)
+        change_feed.publicar('entrevista', id, 'delete')
+        
+        logger.info(f"Entrevista eliminada: {entrevista_info}")
+        return jsonify({"success": True, "message": "Entrevista eliminada correctamente"})
+    except Exception as e:
+        logger.error(f"Error al eliminar entrevista: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al eliminar la entrevista: {str(e)}"}), 500
+
+# ----- RUTAS PARA ESTADÍSTICAS -----
+
+@bp.route('/api/estadisticas', methods=['GET'])
+@login_required
+def get_estadisticas():
+    # Con ?incluir_archivo=1 se suman también los reclutas y entrevistas archivados
+    con_archivo = incluir_archivo()
+    
+    def contar(modelo, modelo_archivo, **filtros):
+        total = modelo.query.filter_by(**filtros).count()
+        if con_archivo:
+            total += modelo_archivo.query.filter_by(**filtros).count()
+        return total
+    
+    try:
+        # Estadísticas de reclutas
+        total_reclutas = contar(Recluta, ReclutaArchivo)
+        reclutas_activos = contar(Recluta, ReclutaArchivo, estado='Activo')
+        reclutas_proceso = contar(Recluta, ReclutaArchivo, estado='En proceso')
+        reclutas_rechazados = contar(Recluta, ReclutaArchivo, estado='Rechazado')
+        
+        # Estadísticas de entrevistas
+        entrevistas_pendientes = contar(Entrevista, EntrevistaArchivo, estado='pendiente')
+        entrevistas_completadas = contar(Entrevista, EntrevistaArchivo, estado='completada')
+        entrevistas_canceladas = contar(Entrevista, EntrevistaArchivo, estado='cancelada')
+        
+        # Entrevistas por día (últimos 30 días)
+        fecha_inicio = datetime.utcnow().date() - timedelta(days=30)
+        entrevistas_por_dia = {}
+        
+        for i in range(31):  # 0 a 30 días atrás
+            fecha = fecha_inicio + timedelta(days=i)
+            fecha_str = fecha.strftime('%Y-%m-%d')
+            entrevistas_por_dia[fecha_str] = contar(Entrevista, EntrevistaArchivo, fecha=fecha)
+        
+        # Distribución de reclutas por puesto
+        distribucion_puestos = {}
+        for modelo in (Recluta, ReclutaArchivo) if con_archivo else (Recluta,):
+            reclutas_por_puesto = db.session.query(
+                modelo.puesto, db.func.count(modelo.id)
+            ).group_by(modelo.puesto).all()
+            for puesto, count in reclutas_por_puesto:
+                if puesto:
+                    distribucion_puestos[puesto] = distribucion_puestos.get(puesto, 0) + count
+        
+        return jsonify({
+            'total_reclutas': total_reclutas,
+            'reclutas_activos': reclutas_activos,
+            'reclutas_proceso': reclutas_proceso,
+            'reclutas_rechazados': reclutas_rechazados,
+            'entrevistas_pendientes': entrevistas_pendientes,
+            'entrevistas_completadas': entrevistas_completadas,
+            'entrevistas_canceladas': entrevistas_canceladas,
+            'entrevistas_por_dia': entrevistas_por_dia,
+            'distribucion_puestos': distribucion_puestos
+        })
+    except Exception as e:
+        logger.error(f"Error al obtener estadísticas: {str(e)}")
+        return jsonify({"success": False, "message": f"Error al obtener estadísticas: {str(e)}"}), 500
+
+def parametros_tendencia(por_defecto):
+    """desde, hasta, periodo y por de una consulta de tendencia (por defecto: el último año por meses)"""
+    try:
+        hasta = datetime.strptime(request.args['hasta'], '%Y-%m-%d').date() if 'hasta' in request.args \
+            else datetime.utcnow().date()
+        desde = datetime.strptime(request.args['desde'], '%Y-%m-%d').date() if 'desde' in request.args \
+            else hasta - timedelta(days=365)
+    except ValueError:
+        raise rollups.RangoInvalido("desde y hasta deben tener el formato AAAA-MM-DD")
+    return desde, hasta, request.args.get('periodo', 'mes'), request.args.get('por', por_defecto)
+
+@bp.route('/api/estadisticas/tendencia/reclutas', methods=['GET'])
+@login_required
+def get_tendencia_reclutas():
+    # Reclutas al final de cada periodo, por estado o puesto (incluye los archivados)
+    try:
+        desde, hasta, periodo, por = parametros_tendencia('estado')
+        resultado = rollups.tendencia_reclutas(db.session, desde, hasta, periodo, por,
+                                               current_app.config['ROLLUPS_MAX_POINTS'])
+    except rollups.RangoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({'desde': desde, 'hasta': hasta, 'periodo': periodo, 'por': por, **resultado})
+
+@bp.route('/api/estadisticas/tendencia/entrevistas', methods=['GET'])
+@login_required
+def get_tendencia_entrevistas():
+    # Entrevistas con fecha en cada periodo, por estado o tipo (incluye las archivadas)
+    try:
+        desde, hasta, periodo, por = parametros_tendencia('estado')
+        resultado = rollups.tendencia_entrevistas(db.session, desde, hasta, periodo, por,
+                                                  current_app.config['ROLLUPS_MAX_POINTS'])
+    except rollups.RangoInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({'desde': desde, 'hasta': hasta, 'periodo': periodo, 'por': por, **resultado})
+
+# Manejadores de errores
+@bp.app_errorhandler(404)
+def not_found(error):
+    return jsonify({"error": "Recurso no encontrado"}), 404
+
+@bp.app_errorhandler(500)
+def server_error(error):
+    logger.error(f"Error del servidor: {str(error)}")
+    return jsonify({"error": "Error interno del servidor"}), 500
+
+@bp.app_errorhandler(403)
+def forbidden(error):
+    return jsonify({"error": "Acceso prohibido"}), 403
+
+@bp.app_errorhandler(401)
+def unauthorized(error):
+    return jsonify({"error": "No autorizado"}), 401